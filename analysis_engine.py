@@ -1,14 +1,15 @@
 import os
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-import talib
-import mplfinance as mpf
-import cv2
 from pathlib import Path
-from scipy.signal import find_peaks
+from indicator_cache import memoize
+from rolling_patterns import rolling_visual_patterns, visual_labels
 
 CHART_DIR = 'temp_charts'
-Path(CHART_DIR).mkdir(exist_ok=True)
+OHLCV_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+# TA-Lib and SciPy are imported inside the functions that use them, so importing
+# this module (e.g. via strategy_tester) does not pay for them up front.
 
 # helper to clear temp charts
 def clear_temp_charts():
@@ -20,6 +21,7 @@ def clear_temp_charts():
 
 # === TA FEATURE EXTRACTION ===
 def compute_ta_indicators(df):
+    import talib
     df = df.copy()
     open_ = df['open'].astype(float).values
     high = df['high'].astype(float).values
@@ -41,27 +43,66 @@ def compute_ta_indicators(df):
     df['BB_lower'] = lower
     df['ADX'] = talib.ADX(high, low, close, timeperiod=14)
     df['SAR'] = talib.SAR(high, low, acceleration=0.02, maximum=0.2)
-    df['AROON_up'], df['AROON_down'] = talib.AROON(high, low, timeperiod=14)
+    df['AROON_down'], df['AROON_up'] = talib.AROON(high, low, timeperiod=14)
     return df
 
 # === DYNAMIC TA-LIB CANDLE PATTERNS ===
-def detect_ta_patterns_dynamic(df):
+TAIL_BARS = 3
+
+@lru_cache(maxsize=1)
+def candle_pattern_names():
+    import talib
+    names = talib.get_function_groups().get('Pattern Recognition', [])
+    return tuple(name for name in names if getattr(talib, name, None) is not None)
+
+@lru_cache(maxsize=1)
+def candle_lookback():
+    """Longest lookback of any candle function; a bar's signal depends on no older bars."""
+    from talib import abstract
+    return max((abstract.Function(name).lookback for name in candle_pattern_names()), default=0)
+
+def candle_pattern_matrix(df):
+    """Every TA-Lib candle pattern for every bar as an int8 (bars x patterns) matrix.
+
+    Values are TA-Lib's output divided by 100: +1/-1 for bullish/bearish signals,
+    +2/-2 for confirmed ones, 0 for none. Columns follow ``candle_pattern_names()``.
+    Computed once per ticker for dataset building and backtests.
+    """
+    import talib
     open_ = df['open'].astype(float).values
     high = df['high'].astype(float).values
     low = df['low'].astype(float).values
     close = df['close'].astype(float).values
-    pattern_funcs = talib.get_function_groups().get('Pattern Recognition', [])
-    pattern_results = []
-    for name in pattern_funcs:
-        func = getattr(talib, name, None)
-        if func is not None:
-            result = func(open_, high, low, close)
-            if result[-1] != 0:
-                pattern_results.append(name)
-    return ', '.join(pattern_results) if pattern_results else 'None'
+    names = candle_pattern_names()
+    matrix = np.zeros((len(close), len(names)), dtype=np.int8)
+    for j, name in enumerate(names):
+        matrix[:, j] = getattr(talib, name)(open_, high, low, close) // 100
+    return matrix
+
+def candle_pattern_tail(df, bars=TAIL_BARS):
+    """Candle pattern matrix for only the last ``bars`` bars, for the live screener.
+
+    Runs the TA-Lib functions over just ``bars + candle_lookback()`` rows, which
+    gives the same values as the full-history matrix for those bars.
+    """
+    window = df.iloc[-(bars + candle_lookback()):]
+    return candle_pattern_matrix(window)[-bars:]
+
+def pattern_labels(flags, names=None):
+    """Comma-joined names of the non-zero entries of one matrix row, or ``'None'``."""
+    names = candle_pattern_names() if names is None else names
+    hits = np.flatnonzero(flags)
+    return ', '.join(names[i] for i in hits) if len(hits) else 'None'
+
+def detect_ta_patterns_dynamic(df):
+    """Patterns on the latest bar, as the ``TA-Lib Pattern`` label."""
+    if df.empty:
+        return 'None'
+    return pattern_labels(candle_pattern_tail(df, bars=1)[-1])
 
 # === OPENCV PATTERN DETECTION ===
 def detect_visual_pattern(df):
+    from scipy.signal import find_peaks
     prices = df['close'].astype(float).values
     patterns = []
     peaks, _ = find_peaks(prices, distance=2)
@@ -89,21 +130,43 @@ def detect_visual_pattern(df):
             patterns.append('Bull Flag')
     return ', '.join(patterns) if patterns else 'None'
 
+# === CACHED PER-TICKER ANALYSIS ===
+def analyze_ticker(ticker, df):
+    """Indicators and patterns for one ticker's bars, computed once per bar content.
+
+    Returns ``(df_ta, ta_pattern, visual_pattern)`` for the latest bar; ``df_ta`` is
+    shared through the cache and must not be modified in place.
+    """
+    bars = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+    df_ta = memoize('ta_indicators', ticker, bars, compute_ta_indicators)
+    ta_pattern = memoize('ta_patterns', ticker, df, detect_ta_patterns_dynamic)
+    visual_pattern = memoize('visual_pattern', ticker, df, detect_visual_pattern)
+    return df_ta, ta_pattern, visual_pattern
+
+def row_positions(rows, df):
+    """Bar index in ``df`` of each row, matched on ``date``; the last bar when undated."""
+    if 'date' not in rows.columns or 'date' not in df.columns:
+        return np.full(len(rows), len(df) - 1)
+    dates = pd.Index(df['date'])
+    positions = pd.Series(np.arange(len(df)), index=dates)[~dates.duplicated(keep='last')]
+    return positions.reindex(rows['date']).fillna(-1).astype(int).to_numpy()
+
 # === MAIN WRAPPER ===
 def enrich_with_technical_analysis(filtered_df, ticker_ohlcv_map):
-    clear_temp_charts()
-    enriched_rows = []
-    for _, row in filtered_df.iterrows():
-        ticker = row['Ticker']
+    """Attach the candle and visual patterns as of each row's own bar."""
+    enriched = []
+    filtered_df = filtered_df.reset_index(drop=True)
+    for ticker, rows in filtered_df.groupby('Ticker', sort=False):
         df = ticker_ohlcv_map.get(ticker)
         if df is None or df.empty:
             continue
-        df_ta = compute_ta_indicators(df)
-        ta_pattern = detect_ta_patterns_dynamic(df_ta)
-        visual_pattern = detect_visual_pattern(df_ta)
-        enriched = row.to_dict()
-        enriched['TA-Lib Pattern'] = ta_pattern
-        enriched['Visual Pattern'] = visual_pattern
-        enriched_rows.append(enriched)
-    clear_temp_charts()
-    return pd.DataFrame(enriched_rows)
+        matrix = memoize('candle_matrix', ticker, df, candle_pattern_matrix)
+        visual_flags = memoize('visual_flags', ticker, df, rolling_visual_patterns).to_numpy()
+        rows = rows.copy()
+        positions = row_positions(rows, df)
+        rows['TA-Lib Pattern'] = [pattern_labels(matrix[p]) if p >= 0 else 'None' for p in positions]
+        rows['Visual Pattern'] = [visual_labels(visual_flags[p]) if p >= 0 else 'None' for p in positions]
+        enriched.append(rows)
+    if not enriched:
+        return filtered_df.iloc[0:0].assign(**{'TA-Lib Pattern': [], 'Visual Pattern': []})
+    return pd.concat(enriched).sort_index().reset_index(drop=True)
@@ -1,14 +1,22 @@
 import os
-import yfinance as yf
 import pandas as pd
 import numpy as np
-from strategy_tester import run_all_strategies
+from datetime import timedelta
+from bar_store import get_bars
+from dataset_schema import BIAS_DTYPE
+from strategy_tester import run_all_strategies, add_technical_indicators, smart_filter
+
+TRADING_DAYS = 252
+PORTFOLIO_LABEL = 'PORTFOLIO'
+STATS_COLUMNS = ['Total Return', 'Win Rate', 'Sharpe Ratio', 'Ticker']
 
 
 def download_data(ticker: str, start: str, end: str) -> pd.DataFrame:
-    """Fetch historical price data from Yahoo Finance."""
-    df = yf.download(ticker, start=start, end=end, progress=False).reset_index()
-    df.columns = [c.lower() for c in df.columns]
+    """Load historical price data from the local bar store, fetching any missing range.
+
+    ``end`` is exclusive, as with ``yf.download``.
+    """
+    df = get_bars(ticker, start, pd.Timestamp(end) - timedelta(days=1))[ticker]
     df['Ticker'] = ticker
     return df
 
@@ -24,7 +32,7 @@ def backtest_signals(signals: pd.DataFrame) -> pd.DataFrame:
     signals['market_return'] = signals['next_close'] / signals['close'] - 1
     position = signals['Bias'].map({'Long': 1, 'Short': -1}).fillna(0)
     signals['strategy_return'] = position * signals['market_return']
-    signals['strategy_return'].fillna(0, inplace=True)
+    signals['strategy_return'] = signals['strategy_return'].fillna(0)
     signals['equity_curve'] = (1 + signals['strategy_return']).cumprod()
     return signals
 
@@ -42,19 +50,106 @@ def summary_stats(df: pd.DataFrame) -> dict:
     }
 
 
-def backtest(tickers, start, end, output_dir='backtests'):
+def download_universe(tickers, start, end) -> pd.DataFrame:
+    """Long (date, Ticker) price frame for many tickers, topped up in one bar store refresh."""
+    bars = get_bars(tickers, start, pd.Timestamp(end) - timedelta(days=1))
+    frames = [df.assign(Ticker=ticker) for ticker, df in bars.items() if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume', 'Ticker'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def sort_by_ticker(df: pd.DataFrame) -> pd.DataFrame:
+    """Group rows by ticker (in first-appearance order), each ticker in date order."""
+    codes = pd.factorize(df['Ticker'])[0]
+    return df.take(np.lexsort((df['date'].to_numpy(), codes))).reset_index(drop=True)
+
+
+def generate_signals_panel(prices: pd.DataFrame) -> pd.DataFrame:
+    """Bias for every (date, Ticker) row of a multi-ticker frame in grouped, column-wise ops.
+
+    Gives the same ``Bias`` as ``generate_signals`` per ticker, without the TA-Lib
+    pattern enrichment that the backtest does not use.
+    """
+    df = add_technical_indicators(sort_by_ticker(prices), group_col='Ticker')
+    df['Bias'] = smart_filter(df)['Bias']
+    return df
+
+
+def summary_stats_panel(returns: pd.DataFrame, equity: pd.DataFrame, has_bar: pd.DataFrame,
+                        label: str = 'Ticker') -> pd.DataFrame:
+    """``summary_stats`` for every column of (dates x tickers) return/equity panels at once.
+
+    The column names end up in a ``label`` column after the stats.
+    """
+    own_returns = returns.where(has_bar)
+    bars = has_bar.sum()
+    last_equity = equity.where(has_bar).ffill().iloc[-1] if len(equity) else pd.Series(1.0, index=equity.columns)
+    total_return = (last_equity - 1).where(bars > 1, 0)
+    win_rate = (own_returns > 0).sum() / bars
+    mean, std = own_returns.mean(), own_returns.std()
+    sharpe = (mean / std * np.sqrt(TRADING_DAYS)).where(std != 0, 0.0)
+    stats = pd.DataFrame({
+        'Total Return': total_return.astype(float).round(4),
+        'Win Rate': win_rate.astype(float).round(4),
+        'Sharpe Ratio': sharpe.astype(float).round(4),
+    })
+    return stats.rename_axis(label).reset_index()[['Total Return', 'Win Rate', 'Sharpe Ratio', label]]
+
+
+def backtest_panel(signals: pd.DataFrame):
+    """Backtest every ticker of a long signals frame on a shared date index.
+
+    Next-bar returns are taken within each ticker's own history, then positions,
+    strategy returns and equity curves are computed as (dates x tickers) arrays.
+    The portfolio holds every ticker with a bar that day at equal weight.
+    Returns ``(tested, stats)``: the long frame with return/equity columns and a
+    ``summary_stats`` row per ticker plus a ``PORTFOLIO`` row. ``Ticker`` and
+    ``Bias`` in ``tested`` are categoricals; returns stay float64 for the stats.
+    With no signals both frames are empty.
+    """
+    if signals.empty:
+        return signals.copy(), pd.DataFrame(columns=STATS_COLUMNS)
+    tested = sort_by_ticker(signals)
+    tested['next_close'] = tested.groupby('Ticker', sort=False)['close'].shift(-1)
+    tested['market_return'] = tested['next_close'] / tested['close'] - 1
+    position = tested['Bias'].map({'Long': 1, 'Short': -1}).fillna(0)
+    tested['strategy_return'] = (position * tested['market_return']).fillna(0)
+
+    returns = tested.pivot(index='date', columns='Ticker', values='strategy_return')[tested['Ticker'].unique()]
+    has_bar = returns.notna()
+    returns = returns.fillna(0)
+    equity = (1 + returns).cumprod()
+    stacked = equity.stack()
+    tested['equity_curve'] = stacked.reindex(pd.MultiIndex.from_frame(tested[['date', 'Ticker']])).to_numpy()
+
+    stats = summary_stats_panel(returns, equity, has_bar)
+    portfolio_returns = (returns.sum(axis=1) / has_bar.sum(axis=1)).fillna(0).to_frame(PORTFOLIO_LABEL)
+    portfolio_equity = (1 + portfolio_returns).cumprod()
+    portfolio_stats = summary_stats_panel(portfolio_returns, portfolio_equity, portfolio_returns.notna())
+    tested['Ticker'] = tested['Ticker'].astype('category')
+    tested['Bias'] = tested['Bias'].astype(BIAS_DTYPE)
+    return tested, pd.concat([stats, portfolio_stats], ignore_index=True)
+
+
+def backtest(tickers, start, end, output_dir='backtests', per_ticker_csv=True):
+    """Backtest ``tickers`` over ``[start, end)`` with the vectorized panel engine.
+
+    Writes ``summary.csv`` (one row per ticker) and, unless ``per_ticker_csv`` is
+    False, a ``{ticker}_backtest.csv`` per ticker; the ``PORTFOLIO`` row is saved
+    to ``portfolio_summary.csv``.
+    """
     os.makedirs(output_dir, exist_ok=True)
-    results = []
-    for ticker in tickers:
-        price_df = download_data(ticker, start, end)
-        signals = generate_signals(price_df)
-        tested = backtest_signals(signals)
-        stats = summary_stats(tested)
-        stats['Ticker'] = ticker
-        results.append(stats)
-        tested.to_csv(os.path.join(output_dir, f'{ticker}_backtest.csv'), index=False)
-    pd.DataFrame(results).to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
-    return pd.DataFrame(results)
+    prices = download_universe(tickers, start, end)
+    # nothing downloaded: the indicators cannot run on the empty, untyped frame
+    tested, stats = backtest_panel(generate_signals_panel(prices) if not prices.empty else prices)
+    if per_ticker_csv:
+        for ticker, rows in tested.groupby('Ticker', sort=False):
+            rows.to_csv(os.path.join(output_dir, f'{ticker}_backtest.csv'), index=False)
+    results = stats[stats['Ticker'] != PORTFOLIO_LABEL].reset_index(drop=True)
+    stats[stats['Ticker'] == PORTFOLIO_LABEL].to_csv(os.path.join(output_dir, 'portfolio_summary.csv'), index=False)
+    results.to_csv(os.path.join(output_dir, 'summary.csv'), index=False)
+    return results
 
 
 if __name__ == '__main__':
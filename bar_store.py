@@ -0,0 +1,212 @@
+import os
+import json
+import threading
+import pandas as pd
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from market_data import download
+
+# === CONFIGURATION ===
+STORE_DIR = 'bar_store'
+MANIFEST_FILE = 'manifest.json'
+BAR_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+_manifest_lock = threading.Lock()
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, run one scanning process per store
+    fcntl = None
+
+# === PATH HELPERS ===
+def _ticker_path(ticker):
+    return os.path.join(STORE_DIR, f'{ticker}.parquet')
+
+def _manifest_path():
+    return os.path.join(STORE_DIR, MANIFEST_FILE)
+
+def _to_day(value):
+    day = pd.Timestamp(value)
+    if day.tzinfo is not None:
+        day = day.tz_localize(None)
+    return day.normalize()
+
+def last_trading_day(now=None):
+    """Most recent weekday on or before ``now``; no daily bar can be newer than this."""
+    day = _to_day(now or datetime.now())
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+# === MANIFEST ===
+# The manifest records the date ranges that have been *requested* for each
+# ticker, not just the range of stored bars, so that a symbol listed mid-range
+# or a holiday at the edge of a window does not trigger a refetch on every run.
+# Each ticker keeps a sorted list of disjoint ``[start, end]`` ranges, so a
+# recent window fetched after an old backtest does not mark the gap between
+# them as covered.
+def load_manifest():
+    path = _manifest_path()
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+@contextmanager
+def _locked_manifest():
+    """Serialize manifest updates between threads and, via ``flock``, between scan processes."""
+    with _manifest_lock:
+        os.makedirs(STORE_DIR, exist_ok=True)
+        with open(_manifest_path() + '.lock', 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+def covered_ranges(entry):
+    """Sorted disjoint ``(start, end)`` timestamps of a manifest entry."""
+    if not entry:
+        return []
+    if 'ranges' in entry:
+        return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in entry['ranges']]
+    # manifests written before ranges were kept hold one start/end span
+    return [(pd.Timestamp(entry['start']), pd.Timestamp(entry['end']))]
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        # ranges are inclusive, so ones that overlap or meet on adjacent days join
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _update_manifest(tickers, start, end):
+    with _locked_manifest():
+        manifest = load_manifest()
+        for ticker in tickers:
+            ranges = _merge_ranges(covered_ranges(manifest.get(ticker)) + [(_to_day(start), _to_day(end))])
+            manifest[ticker] = {'ranges': [[str(s.date()), str(e.date())] for s, e in ranges]}
+        tmp = _manifest_path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, _manifest_path())
+
+# === NORMALIZATION ===
+def normalize_bars(df):
+    """Return ``df`` as lowercase ``date/open/high/low/close/volume`` daily bars."""
+    if df is None or df.empty:
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    df = df.reset_index()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    if 'date' not in df.columns:
+        df = df.rename(columns={'datetime': 'date', 'index': 'date'})
+    df['date'] = pd.to_datetime(df['date'], utc=False)
+    if df['date'].dt.tz is not None:
+        df['date'] = df['date'].dt.tz_localize(None)
+    df['date'] = df['date'].dt.normalize()
+    df = df[[c for c in BAR_COLUMNS if c in df.columns]]
+    df = df.dropna(subset=['close'])
+    return df.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
+
+# === DOWNLOAD ===
+def download_bars(tickers, start, end=None):
+    """Download daily bars for ``tickers`` in one request; returns ``{ticker: bars}``.
+
+    Tickers that came back without bars (a failed download or no data in the
+    range) are absent, so they are not recorded as covered.
+    """
+    tickers = list(tickers)
+    if not tickers:
+        return {}
+    # yfinance treats ``end`` as exclusive
+    end = end + timedelta(days=1) if end is not None else None
+    fetched = download(tickers, start=start, end=end, interval='1d', group_by='ticker',
+                       progress=False, threads=True)
+    return {t: normalize_bars(f) for t, f in fetched.items()}
+
+# === STORE READ / WRITE ===
+def read_bars(ticker, start=None, end=None):
+    path = _ticker_path(ticker)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=BAR_COLUMNS)
+    df = pd.read_parquet(path)
+    if start is not None:
+        df = df[df['date'] >= _to_day(start)]
+    if end is not None:
+        df = df[df['date'] <= _to_day(end)]
+    return df.reset_index(drop=True)
+
+def write_bars(ticker, bars):
+    """Merge ``bars`` into the stored series; newer rows win on duplicate dates."""
+    if bars is None or bars.empty:
+        return read_bars(ticker)
+    os.makedirs(STORE_DIR, exist_ok=True)
+    merged = pd.concat([read_bars(ticker), normalize_bars(bars)], ignore_index=True)
+    merged = merged.drop_duplicates('date', keep='last').sort_values('date').reset_index(drop=True)
+    path = _ticker_path(ticker)
+    tmp = path + '.tmp'
+    merged.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    return merged
+
+# === INCREMENTAL REFRESH ===
+def _missing_ranges(ticker, start, end, manifest):
+    """Date ranges of ``[start, end]`` not yet covered for ``ticker``."""
+    ranges, cursor, covered = [], start, False
+    for have_start, have_end in covered_ranges(manifest.get(ticker)):
+        if have_end < cursor:
+            continue
+        if have_start > end:
+            break
+        if have_start > cursor:
+            ranges.append((cursor, have_start))
+        cursor, covered = have_end, True
+    if not covered:
+        return [(start, end)]
+    # the last stored bar may have been a partial intraday bar, so refetch it
+    if cursor < end or (cursor == end and end == last_trading_day()):
+        ranges.append((cursor, end))
+    return ranges
+
+def refresh_bars(tickers, start, end=None):
+    """Fetch only the bars missing from the store for ``tickers`` over ``[start, end]``.
+
+    Tickers that need the same range are grouped into a single multi-ticker
+    download, so a daily run is one small request per distinct gap. Tickers
+    the download returned no bars for stay uncovered and are requested again
+    on the next call.
+    """
+    start = _to_day(start)
+    end = min(_to_day(end), last_trading_day()) if end is not None else last_trading_day()
+    if start > end:
+        return
+    manifest = load_manifest()
+    groups = {}
+    for ticker in dict.fromkeys(tickers):
+        for rng in _missing_ranges(ticker, start, end, manifest):
+            groups.setdefault(rng, []).append(ticker)
+    for (fetch_start, fetch_end), group in groups.items():
+        try:
+            fetched = download_bars(group, fetch_start, fetch_end)
+        except Exception as e:
+            print(f'⚠️ Bar download failed for {len(group)} tickers: {e}')
+            continue
+        for ticker, bars in fetched.items():
+            write_bars(ticker, bars)
+        failed = len(group) - len(fetched)
+        if failed:
+            print(f'⚠️ No bars for {failed} of {len(group)} tickers; they will be fetched again next run')
+        _update_manifest(list(fetched), fetch_start, fetch_end)
+
+def get_bars(tickers, start, end=None, refresh=True):
+    """Return ``{ticker: bars}`` for ``[start, end]``, topping up the store first."""
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    if refresh:
+        refresh_bars(tickers, start, end)
+    return {ticker: read_bars(ticker, start, end) for ticker in tickers}
+
+def get_recent_bars(tickers, days, refresh=True):
+    """Bars for the last ``days`` calendar days, like yfinance's ``period=f'{days}d'``."""
+    start = last_trading_day() - timedelta(days=days)
+    return get_bars(tickers, start, refresh=refresh)
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from datetime import datetime, timezone
+from synthetic_ohlcv import synthetic_bars, synthetic_universe
+
+# === CONFIGURATION ===
+# (tickers, bars): ~1, 3 and 5 years of daily bars
+SCALES = {
+    'small': (50, 252),
+    'medium': (500, 756),
+    'large': (2000, 1260),
+}
+REPEAT = 3
+SEED = 7
+RESULTS_FILE = 'results/benchmark_results.json'
+# timings are only comparable on the machine that recorded them, so the
+# baseline is not versioned: record one locally with ``--update-baseline``
+BASELINE_FILE = 'benchmark_baseline.json'
+# a case regresses when it runs this much slower than its baseline, plus a
+# fixed allowance so millisecond-scale cases are not flagged by timer jitter
+REGRESSION_TOLERANCE = 0.25
+NOISE_FLOOR_SECONDS = 0.01
+
+# === CASES ===
+# Each case is (name, prepare, run): ``prepare(ctx)`` builds fresh arguments
+# outside the timed region, ``run(*args)`` is what gets timed.
+def _per_ticker(func):
+    def run(bars):
+        for df in bars.values():
+            func(df)
+    return run
+
+def _cases():
+    from strategy_tester import add_technical_indicators, smart_filter
+    from analysis_engine import compute_ta_indicators, detect_ta_patterns_dynamic, detect_visual_pattern
+    from pattern_scanner import run_pattern_scanner
+    from backtester import backtest_panel, backtest_signals
+    from indicator_cache import INDICATOR_CACHE
+
+    def scanner(ctx):
+        INDICATOR_CACHE.clear()
+        return (ctx['scanner_bars'],)
+
+    return [
+        ('add_technical_indicators', lambda ctx: (ctx['universe'].copy(), 'Ticker'), add_technical_indicators),
+        ('compute_ta_indicators', lambda ctx: (ctx['bars'],), _per_ticker(compute_ta_indicators)),
+        ('detect_ta_patterns_dynamic', lambda ctx: (ctx['bars'],), _per_ticker(detect_ta_patterns_dynamic)),
+        ('detect_visual_pattern', lambda ctx: (ctx['bars'],), _per_ticker(detect_visual_pattern)),
+        ('smart_filter', lambda ctx: (ctx['indicators'],), smart_filter),
+        ('run_pattern_scanner', scanner, run_pattern_scanner),
+        ('backtest_signals', lambda ctx: ({t: df.copy() for t, df in ctx['signal_frames'].items()},),
+         _per_ticker(backtest_signals)),
+        ('backtest_panel', lambda ctx: (ctx['signals'],), backtest_panel),
+    ]
+
+def build_context(n_tickers, n_bars, seed=SEED):
+    """Synthetic inputs shared by every case at one scale."""
+    from backtester import generate_signals_panel
+    universe = synthetic_universe(n_tickers, n_bars, seed)
+    signals = generate_signals_panel(universe.copy())
+    bars = synthetic_bars(n_tickers, n_bars, seed)
+    return {
+        'universe': universe,
+        'bars': bars,
+        # the scanner reads yfinance-style capitalised columns
+        'scanner_bars': {t: df.rename(columns=str.capitalize) for t, df in bars.items()},
+        'indicators': signals.drop(columns='Bias'),
+        'signals': signals,
+        'signal_frames': {t: df.reset_index(drop=True) for t, df in signals.groupby('Ticker', sort=False)},
+    }
+
+def time_case(prepare, run, ctx, repeat=REPEAT):
+    """Best-of-``repeat`` wall time of ``run``; the minimum is the least noisy estimate."""
+    best = float('inf')
+    for _ in range(repeat):
+        args = prepare(ctx)
+        started = time.perf_counter()
+        run(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+# === BASELINE ===
+def machine_id():
+    """What a baseline's timings depend on; one recorded elsewhere is not compared against."""
+    return {'node': platform.node(), 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+def load_baseline(path=BASELINE_FILE):
+    """``{scale: {case: seconds}}`` recorded on this machine, or ``{}``."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('machine') != machine_id():
+        print(f'⚠️ {path} was recorded on another machine; rerun with --update-baseline to compare timings')
+        return {}
+    return baseline['cases']
+
+def compare(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Add baseline, threshold, speedup and status (ok/regression/no-baseline) to each result."""
+    for result in results:
+        base = baseline.get(result['scale'], {}).get(result['case'])
+        if base is None:
+            result.update(baseline=None, threshold=None, speedup=None, status='no-baseline')
+            continue
+        threshold = base * (1 + tolerance) + NOISE_FLOOR_SECONDS
+        result.update(baseline=base, threshold=threshold, speedup=round(base / result['seconds'], 3),
+                      status='regression' if result['seconds'] > threshold else 'ok')
+    return results
+
+def update_baseline(results, path=BASELINE_FILE):
+    cases = load_baseline(path)
+    for result in results:
+        cases.setdefault(result['scale'], {})[result['case']] = round(result['seconds'], 6)
+    with open(path, 'w') as f:
+        json.dump({'machine': machine_id(), 'cases': cases}, f, indent=1, sort_keys=True)
+
+# === RUNNER ===
+def run_benchmarks(scales=('small',), cases=None, repeat=REPEAT, seed=SEED, sizes=None):
+    """Time every case at each scale; ``sizes`` overrides ``SCALES`` (``{name: (tickers, bars)}``)."""
+    sizes = sizes or SCALES
+    selected = [c for c in _cases() if cases is None or c[0] in cases]
+    results = []
+    for scale in scales:
+        n_tickers, n_bars = sizes[scale]
+        print(f'🏁 {scale}: {n_tickers} tickers x {n_bars} bars')
+        ctx = build_context(n_tickers, n_bars, seed)
+        for name, prepare, run in selected:
+            seconds = time_case(prepare, run, ctx, repeat)
+            results.append({'case': name, 'scale': scale, 'tickers': n_tickers, 'bars': n_bars,
+                            'seconds': round(seconds, 6),
+                            'per_ticker_ms': round(seconds / n_tickers * 1000, 4)})
+            print(f'   {name:<28} {seconds:8.3f}s  ({seconds / n_tickers * 1000:.2f} ms/ticker)')
+    return results
+
+def write_results(results, path=RESULTS_FILE, tolerance=REGRESSION_TOLERANCE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    report = {
+        'generated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'tolerance': tolerance,
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1)
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline benchmarks on synthetic OHLCV data.')
+    parser.add_argument('--scale', nargs='+', default=['small'], choices=list(SCALES))
+    parser.add_argument('--case', nargs='+', default=None, help='only run these cases')
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument('--update-baseline', action='store_true', help='record these timings as the new baseline')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.scale, args.case, args.repeat)
+    compare(results, load_baseline(args.baseline), args.tolerance)
+    write_results(results, args.output, args.tolerance)
+    regressions = [r for r in results if r['status'] == 'regression']
+    for r in regressions:
+        print(f"❌ {r['case']} ({r['scale']}): {r['seconds']:.3f}s > {r['threshold']:.3f}s threshold")
+    if args.update_baseline:
+        update_baseline(results, args.baseline)
+        print(f'📌 Baseline updated: {args.baseline}')
+    print(f'✅ Results written to {args.output}')
+    return 1 if regressions and not args.update_baseline else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,41 @@
 import os
+import json
+import shutil
+import hashlib
+import multiprocessing
 import pandas as pd
-import time
-from strategy_tester import run_all_strategies
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataset_schema import MEMORY_BUDGET_MB, SCHEMA_VERSION, compact_frame, memory_bytes, schema_description
+from metrics import METRICS, METRICS_FILE, Metrics, profiled
+from strategy_tester import run_all_strategies, strategy_version
 
 HISTORICAL_DIR = 'historical_data'
 RESULTS_DIR = 'ml_dataset'
-os.makedirs(RESULTS_DIR, exist_ok=True)
+SETUPS_DATASET = 'strategy_setups'
+FILTERED_DATASET = 'filtered_setups'
+SIGNALS_DATASET = 'strategy_signals'
+MANIFEST_FILE = 'manifest.json'
+SCHEMA_FILE = 'schema.json'
+MAX_WORKERS = os.cpu_count()
+# workers start as fresh interpreters: the pipeline runs this build on a stage
+# thread, and a child forked while another thread holds a lock can deadlock
+WORKER_START_METHOD = 'spawn'
+MANIFEST_SAVE_EVERY = 100
+FUTURE_DAYS = [1,2,3]
+LABEL_THRESHOLD = 0.02
+# result of a ticker whose processing raised, as opposed to ``None`` for one too short to use
+FAILED = 'failed'
 
-def add_future_returns(df, days=[1,2,3], threshold=0.02):
+class DatasetBudgetError(ValueError):
+    """A ticker's partition would take the strategy setups over the memory budget."""
+
+    def __init__(self, ticker, size, used, budget_mb):
+        super().__init__(f'{ticker} partition needs {size:,} bytes in memory, taking the strategy setups to '
+                         f'{(used + size) / 2**20:.1f} MB, over the {budget_mb:g} MB budget (DATASET_MEMORY_BUDGET_MB)')
+        self.ticker = ticker
+        self.size = size
+
+def add_future_returns(df, days=FUTURE_DAYS, threshold=LABEL_THRESHOLD):
     for d in days:
         df[f'Return_{d}d'] = df['close'].shift(-d) / df['close'] - 1
     df['Label'] = ((df[[f'Return_{d}d' for d in days]] > threshold).any(axis=1)).astype(int)
@@ -38,57 +66,226 @@ def clean_standard_ohlcv(df):
     df = df.dropna(subset=['date','open','high','low','close','volume'])
     return df
 
-def process_ticker_csv(file_path):
-    try:
-        df = pd.read_csv(file_path, header=None)
-        if df.iloc[0,0].strip().lower() == 'price':
-            df = clean_malformed_ohlcv(df)
-        else:
-            df = pd.read_csv(file_path)
-            df = clean_standard_ohlcv(df)
-        required = {'date','open','high','low','close','volume'}
-        if not required.issubset(df.columns):
-            raise ValueError(f'{file_path} missing OHLCV columns')
-        ticker = os.path.basename(file_path).replace('.csv','')
-        df['Ticker'] = ticker
-        df = df.sort_values('date')
-        if df.shape[0] < 50:
-            return None
-        df = add_future_returns(df)
-        final_df, filtered_df, strategy_results = run_all_strategies(df)
-        return final_df, filtered_df, strategy_results
-    except Exception as e:
-        print(f'❌ Error processing {file_path}: {e}')
-        return None
-
-def main():
-    all_strategy_data = []
-    all_filtered_data = []
-    all_combined_strategies = []
-    print(f'📁 Reading files from: {HISTORICAL_DIR}')
-    for file in os.listdir(HISTORICAL_DIR):
-        if file.endswith('.csv'):
-            path = os.path.join(HISTORICAL_DIR, file)
-            print(f'🔍 Processing {file}...')
-            result = process_ticker_csv(path)
-            if result is not None:
-                final_df, filtered_df, strategy_results = result
-                all_strategy_data.append(final_df)
-                all_filtered_data.append(filtered_df)
-                for strat_df in strategy_results:
-                    strat_df['Ticker File'] = file
-                    all_combined_strategies.append(strat_df)
-            time.sleep(0.2)
-    if all_strategy_data:
-        combined_strategies = pd.concat(all_strategy_data, ignore_index=True)
-        strategies_path = os.path.join(RESULTS_DIR, 'combined_strategy_setups.csv')
-        combined_strategies.to_csv(strategies_path, index=False)
-        print(f'✅ Saved combined strategy setups to {strategies_path}')
-    if all_combined_strategies:
-        os.makedirs('results', exist_ok=True)
-        all_strategies_path = os.path.join('results', 'combined_all_strategy_signals.csv')
-        pd.concat(all_combined_strategies, ignore_index=True).to_csv(all_strategies_path, index=False)
-        print(f'✅ Saved combined strategy signals to {all_strategies_path}')
+def is_malformed_csv(file_path):
+    """yfinance multi-header CSVs start with a ``Price`` cell; sniffed from the first line only."""
+    with open(file_path) as f:
+        first_cell = f.readline().split(',', 1)[0]
+    return first_cell.strip().lower() == 'price'
+
+def read_ohlcv_csv(file_path):
+    if is_malformed_csv(file_path):
+        return clean_malformed_ohlcv(pd.read_csv(file_path, header=None))
+    return clean_standard_ohlcv(pd.read_csv(file_path))
+
+def process_ticker_csv(file_path, metrics=METRICS):
+    ticker = os.path.basename(file_path).replace('.csv','')
+    with metrics.track_ticker('dataset', ticker):
+        try:
+            with metrics.timer('step_seconds', stage='dataset', step='read'):
+                df = read_ohlcv_csv(file_path)
+            required = {'date','open','high','low','close','volume'}
+            if not required.issubset(df.columns):
+                raise ValueError(f'{file_path} missing OHLCV columns')
+            df['Ticker'] = ticker
+            df = df.sort_values('date')
+            if df.shape[0] < 50:
+                metrics.outcome('dataset', 'skipped')
+                return None
+            df = add_future_returns(df)
+            with metrics.timer('step_seconds', stage='dataset', step='strategies'):
+                final_df, filtered_df, strategy_results = run_all_strategies(df, save_filtered=False)
+            metrics.outcome('dataset', 'passed' if len(filtered_df) else 'filtered')
+            return final_df, filtered_df, strategy_results
+        except Exception as e:
+            metrics.error('dataset', ticker, e)
+            return FAILED
+
+# === PARTITIONED OUTPUT ===
+def partition_path(dataset_dir, ticker):
+    return os.path.join(dataset_dir, f'Ticker={ticker}', 'part-0.parquet')
+
+def staged_path(path):
+    # dot-prefixed so ``pd.read_parquet`` skips a partition that was never committed
+    return os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+
+def write_partition(df, dataset_dir, ticker):
+    """Stage one ticker's rows next to its hive partition and return the partition path.
+
+    The ``Ticker`` column lives in the directory name, so it is dropped from the
+    file; ``pd.read_parquet(dataset_dir)`` restores it as a column. The previous
+    run's file stays in place until ``commit_partitions``.
+    """
+    path = partition_path(dataset_dir, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.drop(columns=['Ticker'], errors='ignore').to_parquet(staged_path(path), index=False)
+    return path
+
+def commit_partitions(paths):
+    """Replace each partition with its staged file."""
+    for path in paths:
+        os.replace(staged_path(path), path)
+
+def discard_partitions(paths):
+    """Delete staged files, leaving any committed partition untouched."""
+    for path in paths:
+        if os.path.exists(staged_path(path)):
+            os.remove(staged_path(path))
+        if not os.listdir(os.path.dirname(path)):
+            os.rmdir(os.path.dirname(path))
+
+def build_ticker_partition(file_path, results_dir=RESULTS_DIR, metrics=METRICS):
+    """Worker: process one CSV and stream its results straight to disk.
+
+    Partitions are staged in the compact schema of ``dataset_schema``. Only a
+    small summary ``(ticker, setup rows, setup bytes in memory, partition paths)``
+    goes back to the parent process, which checks the budget before committing
+    them, so memory stays bounded by the files in flight rather than by the
+    whole dataset. Returns ``None`` for a file too short to use and ``FAILED``
+    when processing raised.
+    """
+    result = process_ticker_csv(file_path, metrics)
+    if result is None or result == FAILED:
+        return result
+    final_df, filtered_df, strategy_results = result
+    ticker = os.path.basename(file_path).replace('.csv','')
+    final_df = compact_frame(final_df)
+    with metrics.timer('step_seconds', stage='dataset', step='write'):
+        paths = [write_partition(final_df, os.path.join(results_dir, SETUPS_DATASET), ticker),
+                 write_partition(compact_frame(filtered_df), os.path.join(results_dir, FILTERED_DATASET), ticker)]
+        if strategy_results:
+            signals = pd.concat(strategy_results, ignore_index=True)
+            signals['Ticker File'] = os.path.basename(file_path)
+            paths.append(write_partition(compact_frame(signals), os.path.join(results_dir, SIGNALS_DATASET), ticker))
+    return ticker, len(final_df), memory_bytes(final_df.drop(columns=['Ticker'])), paths
+
+def build_with_metrics(file_path, results_dir=RESULTS_DIR):
+    """``build_ticker_partition`` plus the worker's metrics snapshot for the parent to merge."""
+    metrics = Metrics()
+    return build_ticker_partition(file_path, results_dir, metrics), metrics.snapshot()
+
+def list_input_files(historical_dir=HISTORICAL_DIR):
+    return sorted(os.path.join(historical_dir, f) for f in os.listdir(historical_dir) if f.endswith('.csv'))
+
+# === MANIFEST ===
+# One entry per input file: size, mtime and sha256 of the CSV plus the dataset
+# version it was built with. Unchanged files are skipped on the next run.
+def dataset_version():
+    return f'{strategy_version()}-{FUTURE_DAYS}-{LABEL_THRESHOLD}-s{SCHEMA_VERSION}'
+
+def file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(results_dir=RESULTS_DIR):
+    path = os.path.join(results_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(manifest, results_dir=RESULTS_DIR):
+    path = os.path.join(results_dir, MANIFEST_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def input_entry(file_path, previous, version):
+    """Manifest entry for ``file_path``, reusing the stored hash when size and mtime match."""
+    stat = os.stat(file_path)
+    entry = {'size': stat.st_size, 'mtime': stat.st_mtime, 'version': version}
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime') == stat.st_mtime:
+        entry['sha256'] = previous['sha256']
+    else:
+        entry['sha256'] = file_sha256(file_path)
+    return entry
+
+def is_current(entry, previous):
+    return bool(previous) and previous.get('sha256') == entry['sha256'] and previous.get('version') == entry['version']
+
+def remove_partitions(ticker, results_dir=RESULTS_DIR):
+    for dataset in [SETUPS_DATASET, FILTERED_DATASET, SIGNALS_DATASET]:
+        shutil.rmtree(os.path.dirname(partition_path(os.path.join(results_dir, dataset), ticker)), ignore_errors=True)
+
+def plan_build(files, manifest, version):
+    """Split ``files`` into (stale files to rebuild, manifest entries of all current inputs)."""
+    stale, entries = [], {}
+    for path in files:
+        name = os.path.basename(path)
+        entry = input_entry(path, manifest.get(name), version)
+        entries[name] = entry
+        if not is_current(entry, manifest.get(name)):
+            stale.append(path)
+    return stale, entries
+
+def main(historical_dir=HISTORICAL_DIR, results_dir=RESULTS_DIR, max_workers=MAX_WORKERS, full_rebuild=False,
+         memory_budget_mb=MEMORY_BUDGET_MB):
+    """Build the dataset incrementally, stopping with ``DatasetBudgetError`` before the setups exceed the budget.
+
+    Each manifest entry records its partition's in-memory ``bytes``, so the
+    budget covers unchanged partitions from earlier runs as well as new ones.
+    A partition that would go over is discarded without entering the manifest.
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    files = list_input_files(historical_dir)
+    manifest = {} if full_rebuild else load_manifest(results_dir)
+    stale, entries = plan_build(files, manifest, dataset_version())
+    print(f'📁 {len(files)} files in {historical_dir}; {len(stale)} new or changed since the last build')
+    for name in set(manifest) - set(entries):
+        remove_partitions(name.replace('.csv',''), results_dir)
+        del manifest[name]
+    stale_names = {os.path.basename(path) for path in stale}
+    # unchanged inputs keep their entry, refreshed in case only the mtime moved
+    for name, entry in entries.items():
+        if name not in stale_names:
+            manifest[name] = {**entry, 'bytes': manifest[name].get('bytes', 0)}
+    budget = memory_budget_mb * 2**20
+    used = sum(entry.get('bytes', 0) for name, entry in manifest.items() if name not in stale_names)
+    with open(os.path.join(results_dir, SCHEMA_FILE), 'w') as f:
+        json.dump(schema_description(), f, indent=1)
+    built, rows = 0, 0
+    context = multiprocessing.get_context(WORKER_START_METHOD)
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as executor:
+        futures = {executor.submit(build_with_metrics, path, results_dir): path for path in stale}
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            name = os.path.basename(path)
+            try:
+                summary, worker_metrics = future.result()
+            except Exception as e:
+                print(f'❌ Error writing {path}: {e}')
+                continue
+            METRICS.merge(worker_metrics)
+            if summary == FAILED:
+                # keep the old entry so the next incremental run retries this file
+                print(f'❌ Error processing {path}; it will be rebuilt on the next run')
+                continue
+            if summary is None:
+                # too short to use: drop stale output so it matches the input
+                remove_partitions(name.replace('.csv',''), results_dir)
+                manifest[name] = {**entries[name], 'bytes': 0}
+            else:
+                ticker, ticker_rows, size, paths = summary
+                if used + size > budget:
+                    discard_partitions(paths)
+                    for pending in futures:
+                        pending.cancel()
+                    save_manifest(manifest, results_dir)
+                    raise DatasetBudgetError(ticker, size, used, memory_budget_mb)
+                commit_partitions(paths)
+                built += 1
+                rows += ticker_rows
+                used += size
+                manifest[name] = {**entries[name], 'bytes': size}
+            if done % MANIFEST_SAVE_EVERY == 0:
+                save_manifest(manifest, results_dir)
+    save_manifest(manifest, results_dir)
+    print(f'✅ Saved {rows} strategy setup rows for {built} tickers to {os.path.join(results_dir, SETUPS_DATASET)} '
+          f'({used / 2**20:.1f} of {memory_budget_mb:g} MB budget)')
 
 if __name__ == '__main__':
-    main()
+    with profiled('dataset'):
+        main()
+    METRICS.write(METRICS_FILE)
@@ -0,0 +1,103 @@
+import os
+import operator
+import functools
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from pyarrow import fs
+from build_ml_training_data import RESULTS_DIR, SETUPS_DATASET
+
+# === CONFIGURATION ===
+DATASET_DIR = os.path.join(RESULTS_DIR, SETUPS_DATASET)
+BATCH_SIZE = 1024
+# rows per columnar read from disk; the only other rows held are the shuffle buffer
+READ_BATCH_ROWS = 65_536
+SHUFFLE_BUFFER = 0
+LABEL_COLUMN = 'Label'
+# forward returns are what the label is built from, so never default features
+LEAKY_PREFIXES = ('Return_',)
+
+# === DATASET ===
+def open_dataset(dataset_dir=DATASET_DIR):
+    """The hive-partitioned Parquet dataset, read through memory-mapped files."""
+    return ds.dataset(dataset_dir, format='parquet', partitioning='hive',
+                      filesystem=fs.LocalFileSystem(use_mmap=True))
+
+def default_features(schema, label=LABEL_COLUMN):
+    """Float columns other than the label and forward returns, in schema order."""
+    return [f.name for f in schema if pa.types.is_floating(f.type) and f.name != label
+            and not f.name.startswith(LEAKY_PREFIXES)]
+
+def row_filter(dataset, tickers=None, start=None, end=None):
+    """Expression for ``tickers`` and ``start <= date < end``; the ticker part prunes whole partitions."""
+    clauses = []
+    if tickers is not None:
+        clauses.append(ds.field('Ticker').isin(list(tickers)))
+    date_type = dataset.schema.field('date').type if 'date' in dataset.schema.names else None
+    if start is not None:
+        clauses.append(ds.field('date') >= pa.scalar(pd.Timestamp(start), type=date_type))
+    if end is not None:
+        clauses.append(ds.field('date') < pa.scalar(pd.Timestamp(end), type=date_type))
+    return functools.reduce(operator.and_, clauses) if clauses else None
+
+# === BATCH ITERATORS ===
+def iter_tables(dataset_dir=DATASET_DIR, columns=None, batch_size=BATCH_SIZE, tickers=None, start=None, end=None,
+                shuffle_buffer=SHUFFLE_BUFFER, seed=None, drop_last=False):
+    """Yield ``pyarrow.Table`` batches of ``batch_size`` rows (the last may be short unless ``drop_last``).
+
+    Only ``columns`` are read. With ``shuffle_buffer`` rows, partitions are
+    visited in random order and rows are shuffled within a buffer of that many
+    rows, so memory stays bounded by the buffer plus one read batch however
+    large the dataset is. Pass a different ``seed`` per epoch for a new order.
+    """
+    dataset = open_dataset(dataset_dir)
+    expr = row_filter(dataset, tickers, start, end)
+    rng = np.random.default_rng(seed)
+    fragments = list(dataset.get_fragments(filter=expr))
+    if shuffle_buffer:
+        fragments = [fragments[i] for i in rng.permutation(len(fragments))]
+    pending, rows = [], 0
+    flush_at = max(shuffle_buffer, batch_size)
+
+    def drain(table, final):
+        if shuffle_buffer:
+            table = table.take(rng.permutation(table.num_rows))
+        full = table.num_rows - table.num_rows % batch_size
+        for offset in range(0, full, batch_size):
+            yield table.slice(offset, batch_size)
+        rest = table.slice(full)
+        if final and rest.num_rows and not drop_last:
+            yield rest
+        return rest
+
+    for fragment in fragments:
+        scanner = ds.Scanner.from_fragment(fragment, schema=dataset.schema, columns=columns, filter=expr,
+                                           batch_size=READ_BATCH_ROWS)
+        for batch in scanner.to_batches():
+            if batch.num_rows:
+                pending.append(batch)
+                rows += batch.num_rows
+            if rows >= flush_at:
+                rest = yield from drain(pa.Table.from_batches(pending), final=False)
+                pending, rows = rest.to_batches(), rest.num_rows
+    if rows:
+        yield from drain(pa.Table.from_batches(pending), final=True)
+
+def iter_frames(dataset_dir=DATASET_DIR, columns=None, **kwargs):
+    """``iter_tables`` as pandas DataFrames, for categorical or pattern-mask columns."""
+    for table in iter_tables(dataset_dir, columns, **kwargs):
+        yield table.to_pandas()
+
+def iter_batches(dataset_dir=DATASET_DIR, features=None, label=LABEL_COLUMN, **kwargs):
+    """Yield ``(X, y)``: a float32 (rows x features) matrix and the label vector.
+
+    ``features`` defaults to ``default_features``; other keyword arguments are
+    those of ``iter_tables`` (batch size, ticker/date filters, shuffling).
+    """
+    features = features or default_features(open_dataset(dataset_dir).schema, label)
+    for table in iter_tables(dataset_dir, list(features) + [label], **kwargs):
+        X = np.empty((table.num_rows, len(features)), dtype=np.float32)
+        for j, name in enumerate(features):
+            X[:, j] = table.column(name).to_numpy(zero_copy_only=False)
+        yield X, table.column(label).to_numpy(zero_copy_only=False)
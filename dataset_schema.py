@@ -0,0 +1,96 @@
+import os
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+# Bump when the stored dtypes or encodings change so datasets are rebuilt.
+SCHEMA_VERSION = 1
+FEATURE_DTYPE = 'float32'
+BIAS_DTYPE = pd.CategoricalDtype(['Long', 'Short', 'Neutral'])
+CATEGORY_COLUMNS = ['Ticker', 'Ticker File']
+INT8_COLUMNS = ['Label']
+PATTERN_COLUMNS = ['TA-Lib Pattern', 'Visual Pattern']
+# in-memory size of the whole strategy setups dataset the builder may produce
+MEMORY_BUDGET_MB = float(os.environ.get('DATASET_MEMORY_BUDGET_MB', 2048))
+
+# === PATTERN BITMASKS ===
+def pattern_names(column):
+    """Bit order of a pattern column: bit ``i`` of the mask is ``pattern_names(column)[i]``."""
+    if column == 'TA-Lib Pattern':
+        from analysis_engine import candle_pattern_names
+        return list(candle_pattern_names())
+    if column == 'Visual Pattern':
+        from rolling_patterns import PATTERN_NAMES
+        return list(PATTERN_NAMES)
+    raise ValueError(f'{column!r} is not a pattern column')
+
+def mask_dtype(n_names):
+    for dtype in [np.uint8, np.uint16, np.uint32, np.uint64]:
+        if n_names <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f'{n_names} patterns do not fit in a 64-bit mask')
+
+def encode_patterns(labels, names):
+    """Bitmask per row of comma-joined pattern ``labels``; ``'None'`` and missing are 0.
+
+    Rows repeat a handful of label combinations, so each distinct label is
+    parsed once.
+    """
+    dtype = mask_dtype(len(names))
+    bits = {name: 1 << i for i, name in enumerate(names)}
+    codes, uniques = pd.factorize(pd.Series(labels).fillna('None'))
+    masks = np.zeros(len(uniques), dtype=dtype)
+    for j, label in enumerate(uniques):
+        for name in filter(None, (part.strip() for part in label.split(','))):
+            if name == 'None':
+                continue
+            if name not in bits:
+                raise ValueError(f'unknown pattern {name!r}')
+            masks[j] |= dtype(bits[name])
+    return masks[codes]
+
+def decode_patterns(masks, names):
+    """Comma-joined labels back from ``encode_patterns`` masks (``'None'`` for 0)."""
+    codes, uniques = pd.factorize(pd.Series(masks))
+    labels = [', '.join(name for i, name in enumerate(names) if int(mask) >> i & 1) or 'None' for mask in uniques]
+    return pd.Series(np.array(labels, dtype=object)[codes], index=getattr(masks, 'index', None))
+
+# === COMPACT FRAMES ===
+def compact_frame(df, features=True):
+    """Copy of ``df`` in the compact dataset schema.
+
+    Tickers and bias become categoricals, labels int8 and pattern labels
+    bitmasks (see ``pattern_names``). With ``features`` the float64 columns
+    are stored as float32, which halves the bulk of a training set.
+    """
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    if 'Bias' in df.columns:
+        df['Bias'] = df['Bias'].astype(BIAS_DTYPE)
+    for col in INT8_COLUMNS:
+        if col in df.columns and not df[col].isna().any():
+            df[col] = df[col].astype(np.int8)
+    for col in PATTERN_COLUMNS:
+        if col in df.columns and not pd.api.types.is_integer_dtype(df[col]):
+            df[col] = encode_patterns(df[col], pattern_names(col))
+    if features:
+        floats = df.select_dtypes(include='float64').columns
+        df[floats] = df[floats].astype(FEATURE_DTYPE)
+    return df
+
+def memory_bytes(df):
+    """Deep in-memory size of ``df`` in bytes."""
+    return int(df.memory_usage(deep=True, index=False).sum())
+
+def schema_description():
+    """JSON-able description of the encodings, written next to a dataset for its readers."""
+    return {
+        'version': SCHEMA_VERSION,
+        'feature_dtype': FEATURE_DTYPE,
+        'bias_categories': list(BIAS_DTYPE.categories),
+        'category_columns': CATEGORY_COLUMNS,
+        'int8_columns': INT8_COLUMNS,
+        'pattern_bits': {col: pattern_names(col) for col in PATTERN_COLUMNS},
+    }
@@ -1,54 +1,123 @@
+import os
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
-from analysis_engine import compute_ta_indicators, detect_ta_patterns_dynamic, detect_visual_pattern
-from strategy_tester import add_technical_indicators, smart_filter, determine_bias
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from bar_store import get_recent_bars, last_trading_day
+from analysis_engine import analyze_ticker
+from metrics import METRICS, METRICS_FILE, profiled
+from signal_store import SIGNAL_DB, query_signals
+from strategy_tester import add_technical_indicators, classify_bias, strategy_version
 
 DAYS_FORWARD = [1,2,3]
 LABEL_THRESHOLD = 0.03
+HISTORY_DAYS = 30
+MAX_WORKERS = 8
+# the enriched bar is the newest one with every forward return known
+ROW_OFFSET = max(DAYS_FORWARD) + 1
 
 def calculate_returns(df):
     for d in DAYS_FORWARD:
         df[f'Return_{d}d'] = (df['close'].shift(-d) - df['close']) / df['close']
     return df
 
-def label_signal(row):
-    return int(any([row[f'Return_{d}d'] >= LABEL_THRESHOLD for d in DAYS_FORWARD]))
+# === HISTORY ===
+def history_start():
+    """First weekday of the ``HISTORY_DAYS`` window."""
+    day = last_trading_day() - timedelta(days=HISTORY_DAYS)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
 
-def enrich_row(ticker):
-    try:
-        df = yf.download(ticker, period='30d', interval='1d', progress=False).reset_index()
-        df.columns = [col.lower() if isinstance(col,str) else col for col in df.columns]
-        if len(df) < max(DAYS_FORWARD)+1:
+def load_bars(tickers, bars=None):
+    """``{ticker: bars}`` for the enrichment window.
+
+    Frames in ``bars`` (e.g. the screener's history) are reused when they reach
+    back to the window start. Everything else comes from one batched bar store
+    call, which only downloads the date ranges the store does not hold yet, in
+    one request per range rather than one per ticker.
+    """
+    start = history_start()
+    reused = {t: df[df['date'] >= start].reset_index(drop=True) for t, df in (bars or {}).items()
+              if t in tickers and len(df) and df['date'].min() <= start}
+    missing = [t for t in dict.fromkeys(tickers) if t not in reused]
+    with METRICS.timer('step_seconds', stage='enrich', step='fetch'):
+        fetched = get_recent_bars(missing, HISTORY_DAYS) if missing else {}
+    METRICS.inc('bars_reused_total', len(reused), stage='enrich')
+    return {**fetched, **reused}
+
+# === STORED SIGNALS ===
+def stored_bias(frame, path=SIGNAL_DB):
+    """Bias the signal store holds for each row's ticker and bar under the current ``strategy_version()``.
+
+    One indexed query covers the whole frame; rows the smart filter never stored
+    get NaN, as do all rows when there is no store yet.
+    """
+    if frame.empty or not os.path.exists(path):
+        return pd.Series(float('nan'), index=frame.index, dtype=object)
+    dates = pd.to_datetime(frame['date']).astype('datetime64[ns]')
+    stored = query_signals(path, ticker=frame['Ticker'].tolist(), start=dates.min(),
+                           end=dates.max() + timedelta(days=1), version=strategy_version(), columns=[])
+    stored['date'] = stored['date'].astype('datetime64[ns]')
+    keys = pd.MultiIndex.from_arrays([frame['Ticker'], dates])
+    bias = stored.set_index(['Ticker', 'date'])['Bias'].reindex(keys)
+    return pd.Series(bias.to_numpy(dtype=object), index=frame.index)
+
+# === ENRICHMENT ===
+def enrich_bars(ticker, df):
+    """Indicators, forward returns and patterns for one ticker, as of ``ROW_OFFSET`` bars back.
+
+    Returns the row as a Series, or None when the history is too short or fails.
+    """
+    with METRICS.track_ticker('enrich', ticker):
+        try:
+            if df is None or len(df) < ROW_OFFSET:
+                METRICS.outcome('enrich', 'skipped')
+                return None
+            with METRICS.timer('step_seconds', stage='enrich', step='indicators'):
+                df = add_technical_indicators(calculate_returns(df.copy()))
+            row = df.iloc[-ROW_OFFSET].copy()
+            row['Ticker'] = ticker
+            with METRICS.timer('step_seconds', stage='enrich', step='patterns'):
+                _, row['TA-Lib Pattern'], row['Visual Pattern'] = analyze_ticker(ticker, df)
+            METRICS.outcome('enrich', 'passed')
+            return row
+        except Exception as e:
+            METRICS.error('enrich', ticker, e)
             return None
-        df = calculate_returns(df)
-        df = add_technical_indicators(df)
-        latest = df.iloc[-(max(DAYS_FORWARD)+1)].copy()
-        enriched = latest.to_dict()
-        enriched['Ticker'] = ticker
-        enriched.update({f'Return_{d}d': df.iloc[-(max(DAYS_FORWARD)+1)][f'Return_{d}d'] for d in DAYS_FORWARD})
-        enriched['Label'] = label_signal(df.iloc[-(max(DAYS_FORWARD)+1)])
-        df_ta = compute_ta_indicators(df)
-        enriched['TA-Lib Pattern'] = detect_ta_patterns_dynamic(df_ta)
-        enriched['Visual Pattern'] = detect_visual_pattern(df_ta)
-        bias = determine_bias(latest)
-        enriched['Bias'] = bias
-        return enriched
-    except Exception as e:
-        print(f'Error enriching {ticker}: {e}')
-        return None
-
-def enrich_csv(input_csv, output_csv):
-    base_df = pd.read_csv(input_csv)
-    enriched_rows = []
-    for _, row in base_df.iterrows():
-        ticker = row['Ticker']
-        enriched = enrich_row(ticker)
-        if enriched is not None:
-            enriched_rows.append(enriched)
-    final_df = pd.DataFrame(enriched_rows)
+
+def enrich_tickers(tickers, bars=None, max_workers=MAX_WORKERS, signal_db=SIGNAL_DB):
+    """Enriched rows for ``tickers``, one per ticker with usable history, in input order.
+
+    Tickers are enriched concurrently; the label and bias are then computed
+    column-wise over the assembled frame. ``Stored Bias`` is the bias the
+    signal store already holds for the same bar under the current strategy
+    version, so a bar the smart filter stored can be told from one it did not.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    bars_map = load_bars(tickers, bars)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        rows = [r for r in executor.map(lambda t: enrich_bars(t, bars_map.get(t)), tickers) if r is not None]
+    if not rows:
+        return pd.DataFrame(columns=['Ticker', 'Label', 'TA-Lib Pattern', 'Visual Pattern', 'Bias', 'Stored Bias'])
+    frame = pd.DataFrame(rows).reset_index(drop=True).infer_objects()
+    returns = frame[[f'Return_{d}d' for d in DAYS_FORWARD]]
+    label = (returns >= LABEL_THRESHOLD).any(axis=1).astype(int)
+    frame.insert(frame.columns.get_loc('Ticker') + 1, 'Label', label)
+    with METRICS.timer('step_seconds', stage='enrich', step='filter'):
+        frame['Bias'] = classify_bias(frame)
+    with METRICS.timer('step_seconds', stage='enrich', step='signals'):
+        frame['Stored Bias'] = stored_bias(frame, signal_db)
+    return frame
+
+def enrich_csv(input_csv, output_csv, bars=None, max_workers=MAX_WORKERS, signal_db=SIGNAL_DB):
+    """Enrich every ticker of the screener CSV; ``bars`` may pass history already in memory."""
+    tickers = pd.read_csv(input_csv)['Ticker'].tolist()
+    final_df = enrich_tickers(tickers, bars, max_workers, signal_db)
     final_df.to_csv(output_csv, index=False)
-    print(f'✅ Final enriched CSV saved to: {output_csv}')
+    dropped = len(tickers) - len(final_df)
+    print(f'✅ Final enriched CSV saved to: {output_csv} ({len(final_df)} rows, {dropped} skipped or failed)')
 
 if __name__ == '__main__':
-    enrich_csv('daily_results.csv', 'enriched_signals.csv')
+    with profiled('enrich'):
+        enrich_csv('daily_results.csv', 'enriched_signals.csv')
+    METRICS.write(METRICS_FILE)
@@ -1,33 +1,61 @@
 # all_in_one_workflow.py
 import os
+import sys
 import pandas as pd
 
-from screener import main as run_screener
+from bar_store import last_trading_day
+from screener import SYMBOLS_FILE, main as run_screener
 from final_enricher import enrich_csv
 from backtester import backtest
-from build_ml_training_data import main as build_dataset
+from build_ml_training_data import (HISTORICAL_DIR, MANIFEST_FILE, RESULTS_DIR, dataset_version,
+                                    main as build_dataset)
+from metrics import METRICS, METRICS_FILE
+from pipeline_runner import Stage, run_pipeline
+from strategy_tester import strategy_version
 
-def run_full_pipeline():
-    # 1. Run the screener (writes csv_results/daily_results.csv).
-    run_screener()
+DAILY_CSV = "csv_results/daily_results.csv"
+ENRICHED_CSV = "csv_results/enriched_signals.csv"
+BACKTEST_SUMMARY = "results/backtest_summary.csv"
+BACKTEST_START, BACKTEST_END = "2022-01-01", "2023-01-01"
 
-    # 2. Enrich the screener output with recent data and TA patterns.
-    input_csv = "csv_results/daily_results.csv"
-    enriched_csv = "csv_results/enriched_signals.csv"
-    enrich_csv(input_csv, enriched_csv)
+def enriched_tickers():
+    return pd.read_csv(ENRICHED_CSV)["Ticker"].unique().tolist()
 
-    # 3. Backtest each ticker found in the enriched CSV.
-    df = pd.read_csv(enriched_csv)
-    tickers = df["Ticker"].unique().tolist()
-    stats = backtest(tickers, start="2022-01-01", end="2023-01-01")
-
-    # 4. Save summary metrics.
+def run_backtest():
+    stats = backtest(enriched_tickers(), start=BACKTEST_START, end=BACKTEST_END)
     os.makedirs("results", exist_ok=True)
-    stats.to_csv("results/backtest_summary.csv", index=False)
+    stats.to_csv(BACKTEST_SUMMARY, index=False)
     print(stats)
 
-    # 5. Optional: build ML dataset from historical_data/*.csv.
-    build_dataset()
+def pipeline_stages():
+    """Screener -> enricher -> backtest, with the ML dataset build alongside.
+
+    The screener and enricher use live bars, so they rerun once per trading day.
+    The backtest only reruns when the ticker set, date range or strategy rules
+    change. The dataset build depends only on ``historical_data/``.
+    """
+    day = str(last_trading_day().date())
+    return [
+        # 1. Run the screener (writes csv_results/daily_results.csv).
+        Stage("screener", run_screener, inputs=[p for p in [SYMBOLS_FILE] if os.path.exists(p)],
+              outputs=[DAILY_CSV], config={"day": day}),
+        # 2. Enrich the screener output with recent data and TA patterns.
+        Stage("enrich", lambda: enrich_csv(DAILY_CSV, ENRICHED_CSV), deps=["screener"],
+              inputs=[DAILY_CSV], outputs=[ENRICHED_CSV], config={"day": day}),
+        # 3. Backtest each ticker found in the enriched CSV and save summary metrics.
+        Stage("backtest", run_backtest, deps=["enrich"], outputs=[BACKTEST_SUMMARY],
+              config=lambda: {"tickers": sorted(enriched_tickers()), "start": BACKTEST_START,
+                              "end": BACKTEST_END, "strategy": strategy_version()}),
+        # 4. Build the ML dataset from historical_data/*.csv; independent of the screener.
+        Stage("dataset", build_dataset, inputs=[HISTORICAL_DIR],
+              outputs=[os.path.join(RESULTS_DIR, MANIFEST_FILE)], config={"version": dataset_version()}),
+    ]
+
+def run_full_pipeline(force=()):
+    report = run_pipeline(pipeline_stages(), force=force)
+    print(f"📈 Metrics written to {METRICS.write(METRICS_FILE)}")
+    return report
 
 if __name__ == "__main__":
-    run_full_pipeline()
+    # e.g. ``python full_pipeline.py backtest`` to rerun the backtest even if cached
+    run_full_pipeline(force=sys.argv[1:])
@@ -0,0 +1,65 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+# === CONFIGURATION ===
+CACHE_MAXSIZE = 512
+FINGERPRINT_COLUMNS = {'date', 'open', 'high', 'low', 'close', 'volume'}
+
+# === FINGERPRINT ===
+def frame_fingerprint(df):
+    """Content hash of a frame's OHLCV bars.
+
+    Only the date/OHLCV columns (in any letter case) are hashed, so frames that
+    carry extra indicator columns still map to the same entry as the raw bars.
+    """
+    cols = [c for c in df.columns if str(c).lower() in FINGERPRINT_COLUMNS]
+    hashed = pd.util.hash_pandas_object(df[cols], index=False).to_numpy()
+    digest = hashlib.blake2b(hashed.tobytes(), digest_size=16)
+    digest.update(','.join(map(str, cols)).encode())
+    return digest.hexdigest()
+
+# === LRU CACHE ===
+class IndicatorCache:
+    """Thread-safe LRU of per-ticker results keyed by ``(kind, ticker, fingerprint)``.
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, maxsize=CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+INDICATOR_CACHE = IndicatorCache()
+
+def memoize(kind, ticker, df, func, cache=INDICATOR_CACHE):
+    """Return ``func(df)``, computed at most once per ticker and bar content."""
+    return cache.get_or_compute((kind, ticker, frame_fingerprint(df)), lambda: func(df))
@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import asyncio
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from market_data import FETCHER
+from metrics import METRICS, METRICS_PORT, serve_metrics
+from streaming_indicators import STRATEGY_COLUMNS, StreamingIndicators
+from strategy_tester import COMPILED_FILTER_RULES, DEFAULT_BIAS, classify_bias, rule_mask
+
+# === CONFIGURATION ===
+CHART_URL = os.environ.get('YAHOO_CHART_URL', 'https://query1.finance.yahoo.com/v8/finance/chart')
+INTERVAL = '5m'
+INTERVAL_SECONDS = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600}
+WARMUP_RANGE = '5d'
+POLL_RANGE = '1d'
+POLL_SECONDS = 60
+MAX_CONCURRENCY = 32
+WATCHLIST_CSV = 'csv_results/daily_results.csv'
+SIGNALS_CSV = 'csv_results/intraday_signals.csv'
+
+# === CHART FETCH ===
+def parse_chart(payload):
+    """Bars of a Yahoo ``v8/finance/chart`` response as a lowercase OHLCV frame.
+
+    ``date`` is the bar's start as a UTC epoch second; bars without a close
+    (no trades yet) are dropped.
+    """
+    result = (payload.get('chart', {}).get('result') or [None])[0]
+    if not result or not result.get('timestamp'):
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume'])
+    quote = result['indicators']['quote'][0]
+    bars = pd.DataFrame({'date': result['timestamp'],
+                         **{f: quote.get(f) for f in ['open', 'high', 'low', 'close', 'volume']}})
+    return bars.dropna(subset=['close']).fillna({'volume': 0}).reset_index(drop=True)
+
+def fetch_chart(ticker, interval=INTERVAL, range_=POLL_RANGE, base_url=CHART_URL, fetcher=FETCHER):
+    return parse_chart(fetcher.get_json(f'{base_url}/{ticker}', {'interval': interval, 'range': range_}))
+
+# === LIVE STATE ===
+class IntradayScreener:
+    """Polls intraday bars for a watchlist and emits bias crossings as they happen.
+
+    Each ticker keeps a ``StreamingIndicators`` engine fed with *closed* bars only,
+    so a poll costs one request plus O(new bars) per ticker however long the
+    session has run. A closed bar passes ``FILTER_RULES`` or counts as
+    ``DEFAULT_BIAS``; a signal is emitted when that status turns Long or Short.
+    Requests go through the shared ``market_data`` fetcher (pooled connections,
+    rate limit, retries) from a thread pool of ``max_concurrency`` workers, and a
+    ticker that still fails is simply retried on the next cycle.
+    """
+
+    def __init__(self, watchlist, interval=INTERVAL, base_url=CHART_URL,
+                 max_concurrency=MAX_CONCURRENCY, on_signal=None, fetcher=FETCHER):
+        self.watchlist = list(dict.fromkeys(watchlist))
+        self.interval = interval
+        self.bar_seconds = INTERVAL_SECONDS[interval]
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.on_signal = on_signal or print_signal
+        self.engines = {}
+        self.last_bar = {}
+        self.status = {}
+        self.fetcher = fetcher
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    async def _fetch(self, ticker):
+        range_ = POLL_RANGE if ticker in self.engines else WARMUP_RANGE
+        loop = asyncio.get_running_loop()
+        try:
+            with METRICS.timer('step_seconds', stage='intraday', step='fetch'):
+                return ticker, await loop.run_in_executor(
+                    self.executor, fetch_chart, ticker, self.interval, range_, self.base_url, self.fetcher)
+        except Exception as e:
+            METRICS.error('intraday', ticker, e)
+            return ticker, None
+
+    def ingest(self, ticker, bars, now=None):
+        """Push the closed bars of ``bars`` not seen yet; returns the rows of the new bars."""
+        now = time.time() if now is None else now
+        warming_up = ticker not in self.engines
+        engine = self.engines.setdefault(ticker, StreamingIndicators())
+        closed = bars[(bars['date'] > self.last_bar.get(ticker, -1)) & (bars['date'] + self.bar_seconds <= now)]
+        rows = []
+        for bar in closed.itertuples(index=False):
+            values = engine.update(bar.open, bar.high, bar.low, bar.close, bar.volume)
+            rows.append({'Ticker': ticker, 'date': bar.date, 'close': bar.close, **values})
+        if len(closed):
+            self.last_bar[ticker] = int(closed['date'].iloc[-1])
+        return rows, warming_up
+
+    def score(self, rows, warm_rows):
+        """Bias per new bar, in bar order per ticker; returns the crossings into Long/Short."""
+        if not rows:
+            return []
+        frame = pd.DataFrame(rows)
+        passed = pd.Series(rule_mask(frame, COMPILED_FILTER_RULES), index=frame.index).astype(bool)
+        frame['Bias'] = classify_bias(frame).where(passed, DEFAULT_BIAS)
+        signals = []
+        for row, warm in zip(frame.to_dict('records'), warm_rows):
+            previous = self.status.get(row['Ticker'], DEFAULT_BIAS)
+            self.status[row['Ticker']] = row['Bias']
+            if not warm and row['Bias'] != previous and row['Bias'] != DEFAULT_BIAS:
+                signals.append(row)
+        return signals
+
+    async def poll(self, now=None):
+        """One cycle: fetch every ticker concurrently, ingest closed bars, emit crossings."""
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._fetch(ticker) for ticker in self.watchlist))
+        rows, warm_rows = [], []
+        for ticker, bars in results:
+            if bars is None:
+                continue
+            with METRICS.timer('step_seconds', stage='intraday', step='indicators'):
+                new_rows, warming_up = self.ingest(ticker, bars, now)
+            rows.extend(new_rows)
+            warm_rows.extend([warming_up] * len(new_rows))
+        with METRICS.timer('step_seconds', stage='intraday', step='filter'):
+            signals = self.score(rows, warm_rows)
+        for signal in signals:
+            self.on_signal(signal)
+        METRICS.observe('cycle_seconds', time.perf_counter() - started, stage='intraday')
+        METRICS.inc('signals_total', len(signals), stage='intraday')
+        print(f'⏱️ Intraday cycle: {len(self.watchlist)} tickers, {len(rows)} new bars, '
+              f'{len(signals)} signals in {time.perf_counter() - started:.2f}s')
+        return signals
+
+    async def run(self, poll_seconds=POLL_SECONDS, cycles=None):
+        """Poll every ``poll_seconds`` until cancelled (or for ``cycles`` cycles)."""
+        done = 0
+        try:
+            while cycles is None or done < cycles:
+                started = time.monotonic()
+                await self.poll()
+                done += 1
+                if cycles is None or done < cycles:
+                    await asyncio.sleep(max(0.0, poll_seconds - (time.monotonic() - started)))
+        finally:
+            self.close()
+
+# === SIGNAL OUTPUT ===
+def print_signal(signal):
+    arrow = '🟢' if signal['Bias'] == 'Long' else '🔴'
+    stamp = pd.Timestamp(signal['date'], unit='s', tz='UTC').strftime('%Y-%m-%d %H:%M')
+    print(f"{arrow} {signal['Ticker']} turned {signal['Bias']} at {stamp} UTC (close {signal['close']:.2f}, "
+          f"RSI {signal['RSI 14']:.1f}, volume surge {signal['Volume Surge %']:.0f}%)")
+
+def save_signal(signal, path=SIGNALS_CSV):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    row = pd.DataFrame([{k: signal[k] for k in ['Ticker', 'date', 'close', 'Bias', *STRATEGY_COLUMNS]}])
+    row.to_csv(path, mode='a', header=not os.path.exists(path), index=False)
+
+def print_and_save(signal):
+    print_signal(signal)
+    save_signal(signal)
+
+def load_watchlist(path=WATCHLIST_CSV):
+    """Tickers of the latest daily screener run."""
+    return pd.read_csv(path)['Ticker'].dropna().astype(str).tolist()
+
+if __name__ == '__main__':
+    watchlist = sys.argv[1:] or load_watchlist()
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT))
+        print(f'📈 Metrics at http://127.0.0.1:{METRICS_PORT}/metrics')
+    print(f'🚀 Intraday screening {len(watchlist)} tickers on {INTERVAL} bars every {POLL_SECONDS}s...')
+    asyncio.run(IntradayScreener(watchlist, on_signal=print_and_save).run())
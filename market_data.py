@@ -0,0 +1,242 @@
+import time
+import random
+import asyncio
+import threading
+from concurrent.futures import Future
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+
+# === CONFIGURATION ===
+RATE_PER_SECOND = 5.0
+BURST = 10
+MAX_CONCURRENCY = 8
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 10
+RETRY_STATUS = {429, 500, 502, 503, 504}
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+# === RATE LIMITING ===
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` requests per second with bursts of ``capacity``."""
+
+    def __init__(self, rate=RATE_PER_SECOND, capacity=BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until one is available; returns the time waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+
+# === RETRIES ===
+class RetryableStatus(Exception):
+    """HTTP response worth retrying (throttling or a server error)."""
+
+    def __init__(self, response):
+        super().__init__(f'HTTP {response.status_code} from {response.url}')
+        self.response = response
+
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError, RetryableStatus)
+# matched by name so yfinance (and its curl_cffi transport) need not be imported to recognise them
+RETRYABLE_NAMES = {'YFRateLimitError', 'ConnectionError', 'Timeout', 'ConnectTimeout', 'ReadTimeout'}
+
+def is_retryable(error):
+    return isinstance(error, RETRYABLE_ERRORS) or type(error).__name__ in RETRYABLE_NAMES
+
+def backoff_delay(attempt, error=None, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff, never shorter than a server's ``Retry-After``."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    retry_after = getattr(getattr(error, 'response', None), 'headers', {}).get('Retry-After')
+    if retry_after:
+        try:
+            delay = max(delay, min(cap, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+# === FETCHER ===
+class Fetcher:
+    """Shared gateway for every market-data request.
+
+    Each call is coalesced with an identical call already in flight, then waits
+    for a rate-limit token and a concurrency slot, and is retried with jittered
+    backoff on throttling and connection errors. HTTP requests reuse keep-alive
+    connections from one pooled session, and yfinance requests from one session
+    of its own (see ``yf_session``).
+    """
+
+    def __init__(self, rate=RATE_PER_SECOND, burst=BURST, max_concurrency=MAX_CONCURRENCY,
+                 max_retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT, sleep=time.sleep):
+        self.bucket = TokenBucket(rate, burst, sleep=sleep)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.sleep = sleep
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.stats = {'calls': 0, 'coalesced': 0, 'retries': 0, 'throttled_seconds': 0.0}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._yf_session = None
+
+    def call(self, key, func, *args, **kwargs):
+        """Run ``func(*args, **kwargs)`` through the limiter; duplicate ``key``s share one run."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.stats['calls'] += 1
+            else:
+                self.stats['coalesced'] += 1
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(self._run(func, *args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+    def _count(self, stat, amount=1):
+        with self._lock:
+            self.stats[stat] += amount
+
+    def _run(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self._count('throttled_seconds', self.bucket.acquire())
+            try:
+                with self.slots:
+                    return func(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, e)
+                self._count('retries')
+                print(f'⚠️ {e.__class__.__name__} on attempt {attempt + 1}; retrying in {delay:.1f}s')
+                self.sleep(delay)
+
+    # --- HTTP ---
+    def _get(self, url, params=None):
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        if response.status_code in RETRY_STATUS:
+            raise RetryableStatus(response)
+        response.raise_for_status()
+        return response.json()
+
+    def get_json(self, url, params=None):
+        key = ('GET', url, tuple(sorted((params or {}).items())))
+        return self.call(key, self._get, url, params)
+
+    # --- yfinance (imported on first use; it is slow to import and HTTP-only callers never need it) ---
+    @property
+    def yf_session(self):
+        """Session shared by every yfinance request.
+
+        yfinance prefers curl_cffi's browser impersonation (Yahoo throttles
+        plain ``requests`` clients harder), so that is used when installed and
+        the pooled HTTP session otherwise.
+        """
+        with self._lock:
+            if self._yf_session is None:
+                try:
+                    from curl_cffi import requests as curl_requests
+                    self._yf_session = curl_requests.Session(impersonate='chrome')
+                except ImportError:
+                    self._yf_session = self.session
+            return self._yf_session
+
+    def _download(self, tickers, **kwargs):
+        import yfinance as yf
+        return yf.download(tickers, session=self.yf_session, **kwargs)
+
+    def download(self, tickers, **kwargs):
+        """Batched ``yf.download`` for ``tickers``; returns ``{ticker: frame}`` for those with bars.
+
+        Each batch is one request through the limiter. yfinance reports
+        per-ticker failures, throttling included, only as tickers missing from
+        the result, so the missing ones are requested again as one smaller
+        batch after a backoff, for as long as a retry recovers some of them.
+        Tickers still missing are left out.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        frames, missing = {}, tickers
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                delay = backoff_delay(attempt - 1)
+                self._count('retries')
+                print(f'⚠️ {len(missing)} of {len(tickers)} tickers missing from a download; retrying in {delay:.1f}s')
+                self.sleep(delay)
+            key = ('download', tuple(missing), tuple(sorted((k, str(v)) for k, v in kwargs.items())))
+            recovered = split_download(self.call(key, self._download, missing, **kwargs), missing)
+            frames.update(recovered)
+            missing = [t for t in missing if t not in frames]
+            if not missing or (attempt and not recovered):
+                break
+        return frames
+
+    def ticker_info(self, ticker):
+        import yfinance as yf
+        return self.call(('info', ticker), lambda: yf.Ticker(ticker, session=self.yf_session).info)
+
+    # --- asyncio ---
+    async def get_json_async(self, url, params=None, executor=None):
+        """``get_json`` from an event loop; blocking I/O runs on ``executor``."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.get_json, url, params)
+
+def split_download(raw, tickers):
+    """Split a (possibly multi-ticker) ``yf.download`` frame into ``{ticker: frame}``.
+
+    Tickers without a single close in the frame (failed or no data) are left out.
+    """
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    if isinstance(raw.columns, pd.MultiIndex):
+        for ticker in tickers:
+            if ticker in raw.columns.get_level_values(0):
+                frames[ticker] = raw[ticker]
+            elif ticker in raw.columns.get_level_values(1):
+                frames[ticker] = raw.xs(ticker, axis=1, level=1)
+    elif len(tickers) == 1:
+        frames[tickers[0]] = raw
+    frames = {t: f.dropna(how='all') for t, f in frames.items()}
+    return {t: f for t, f in frames.items() if 'Close' in f.columns and f['Close'].notna().any()}
+
+FETCHER = Fetcher()
+
+def get_json(url, params=None):
+    return FETCHER.get_json(url, params)
+
+def download(tickers, **kwargs):
+    return FETCHER.download(tickers, **kwargs)
+
+def ticker_info(ticker):
+    return FETCHER.ticker_info(ticker)
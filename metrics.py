@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import bisect
+import cProfile
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# === CONFIGURATION ===
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+# ``.json`` writes a snapshot, anything else the Prometheus text format
+METRICS_FILE = os.environ.get('METRICS_FILE', 'results/metrics.prom')
+# long-running processes (the intraday screener) serve /metrics on this port when set
+METRICS_PORT = os.environ.get('METRICS_PORT')
+# set to write a cProfile ``<name>.prof`` per entry point / pipeline stage
+PROFILE_DIR = os.environ.get('PROFILE_DIR')
+SLOWEST_TICKERS = 20
+MAX_ERROR_SAMPLES = 50
+
+# === REGISTRY ===
+class Metrics:
+    """Thread-safe counters, latency histograms and per-ticker timings.
+
+    Series are keyed by name plus a sorted tuple of label pairs. ``snapshot()``
+    is plain JSON so worker processes can ship their metrics back to the parent
+    for ``merge()``.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.tickers = {}
+            self.errors = []
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            i = bisect.bisect_left(self.buckets, seconds)
+            if i < len(self.buckets):
+                hist['buckets'][i] += 1
+            hist['sum'] += seconds
+            hist['count'] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Observe the wall time of the ``with`` block, including when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    @contextmanager
+    def track_ticker(self, stage, ticker):
+        """Time one ticker through ``stage``: a ``ticker_seconds`` histogram plus its running total."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.observe('ticker_seconds', seconds, stage=stage)
+            with self._lock:
+                per_stage = self.tickers.setdefault(stage, {})
+                per_stage[ticker] = per_stage.get(ticker, 0.0) + seconds
+
+    def outcome(self, stage, outcome, count=1):
+        """Count tickers leaving ``stage`` as passed, filtered, skipped or error."""
+        if count:
+            self.inc('tickers_total', count, stage=stage, outcome=outcome)
+
+    def error(self, stage, ticker, exc):
+        self.outcome(stage, 'error')
+        with self._lock:
+            self.errors.append({'stage': stage, 'ticker': ticker, 'error': f'{type(exc).__name__}: {exc}'})
+            del self.errors[:-MAX_ERROR_SAMPLES]
+
+    def slowest(self, stage, n=SLOWEST_TICKERS):
+        with self._lock:
+            totals = dict(self.tickers.get(stage, {}))
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    # === SNAPSHOT / MERGE ===
+    def snapshot(self):
+        with self._lock:
+            return {
+                'buckets': list(self.buckets),
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self.counters.items()],
+                'histograms': [{'name': n, 'labels': dict(l), **{k: list(v) if k == 'buckets' else v for k, v in h.items()}}
+                               for (n, l), h in self.histograms.items()],
+                'tickers': {stage: dict(t) for stage, t in self.tickers.items()},
+                'errors': list(self.errors),
+            }
+
+    def merge(self, snapshot):
+        """Add another registry's ``snapshot()`` (e.g. from a worker process) into this one."""
+        if tuple(snapshot['buckets']) != self.buckets:
+            raise ValueError('cannot merge metrics with different histogram buckets')
+        for c in snapshot['counters']:
+            self.inc(c['name'], c['value'], **c['labels'])
+        with self._lock:
+            for h in snapshot['histograms']:
+                key = (h['name'], tuple(sorted(h['labels'].items())))
+                hist = self.histograms.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+                hist['buckets'] = [a + b for a, b in zip(hist['buckets'], h['buckets'])]
+                hist['sum'] += h['sum']
+                hist['count'] += h['count']
+            for stage, totals in snapshot['tickers'].items():
+                per_stage = self.tickers.setdefault(stage, {})
+                for ticker, seconds in totals.items():
+                    per_stage[ticker] = per_stage.get(ticker, 0.0) + seconds
+            self.errors.extend(snapshot['errors'])
+            del self.errors[:-MAX_ERROR_SAMPLES]
+
+    # === EXPORT ===
+    def render_text(self):
+        """Prometheus text exposition of every series plus the slowest tickers per stage."""
+        snap = self.snapshot()
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} {kind}')
+
+        for c in sorted(snap['counters'], key=lambda c: (c['name'], sorted(c['labels'].items()))):
+            header(c['name'], 'counter')
+            lines.append(f"{c['name']}{_labels(c['labels'])} {c['value']}")
+        for h in sorted(snap['histograms'], key=lambda h: (h['name'], sorted(h['labels'].items()))):
+            header(h['name'], 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets, h['buckets']):
+                cumulative += count
+                lines.append(f"{h['name']}_bucket{_labels({**h['labels'], 'le': bound})} {cumulative}")
+            lines.append(f"{h['name']}_bucket{_labels({**h['labels'], 'le': '+Inf'})} {h['count']}")
+            lines.append(f"{h['name']}_sum{_labels(h['labels'])} {h['sum']:.6f}")
+            lines.append(f"{h['name']}_count{_labels(h['labels'])} {h['count']}")
+        for stage in sorted(snap['tickers']):
+            header('slowest_ticker_seconds', 'gauge')
+            for ticker, seconds in self.slowest(stage):
+                lines.append(f"slowest_ticker_seconds{_labels({'stage': stage, 'ticker': ticker})} {seconds:.6f}")
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=METRICS_FILE):
+        """Write ``path`` as JSON (``.json``) or Prometheus text; returns the path."""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if path.endswith('.json'):
+            snap = self.snapshot()
+            snap['slowest'] = {stage: self.slowest(stage) for stage in snap['tickers']}
+            text = json.dumps(snap, indent=1)
+        else:
+            text = self.render_text()
+        with open(path + '.tmp', 'w') as f:
+            f.write(text)
+        os.replace(path + '.tmp', path)
+        return path
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+METRICS = Metrics()
+
+# === HTTP EXPOSITION ===
+def serve_metrics(port, metrics=METRICS, host='127.0.0.1'):
+    """Serve ``metrics.render_text()`` at ``/metrics`` from a daemon thread; returns the server."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = metrics.render_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# === PROFILING ===
+@contextmanager
+def profiled(name, directory=PROFILE_DIR):
+    """cProfile the ``with`` block into ``<directory>/<name>.prof``; a no-op when ``directory`` is unset.
+
+    cProfile only sees the calling thread, so wrap the code on the thread doing
+    the work (each pipeline stage is profiled on its own thread).
+    """
+    if not directory:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        os.makedirs(directory, exist_ok=True)
+        profile.dump_stats(os.path.join(directory, f'{name}.prof'))
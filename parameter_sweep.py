@@ -0,0 +1,136 @@
+import os
+import itertools
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from backtester import sort_by_ticker, summary_stats_panel
+from strategy_tester import (OPERATORS, add_technical_indicators, build_bias_rules,
+                             build_filter_rules, strategy_params)
+
+# === CONFIGURATION ===
+CHUNK_SIZE = 8
+MAX_WORKERS = os.cpu_count()
+SWEEP_START_METHOD = 'spawn'
+RANK_BY = 'Sharpe Ratio'
+
+# Features shared with pool workers by the initializer, so each worker unpickles
+# the indicator arrays once rather than once per chunk.
+_features = None
+
+# === PARAMETER GRID ===
+def parameter_grid(grid):
+    """Every combination of ``grid`` (``{param: [values]}``) as full parameter dicts.
+
+    Parameters not in ``grid`` keep their current ``strategy_tester`` value.
+    """
+    defaults = strategy_params()
+    unknown = set(grid) - set(defaults)
+    if unknown:
+        raise ValueError(f'Unknown strategy parameters: {sorted(unknown)}')
+    names = list(grid)
+    return [{**defaults, **dict(zip(names, values))} for values in itertools.product(*(grid[n] for n in names))]
+
+# === SHARED PRECOMPUTATION ===
+def _rule_sets(params):
+    """Filter rules followed by the bias rule sets, in ``classify_bias`` order."""
+    return [build_filter_rules(params)] + list(build_bias_rules(params).values())
+
+def prepare_features(prices):
+    """Indicators and next-bar returns for a long (date, Ticker) price frame, computed once.
+
+    Rows are re-ordered by date (ticker order kept within a date) so daily
+    portfolio returns can be summed with ``np.add.reduceat``. Returns a dict of
+    plain arrays that is cheap to ship to worker processes.
+    """
+    df = add_technical_indicators(sort_by_ticker(prices), group_col='Ticker')
+    next_close = df.groupby('Ticker', sort=False)['close'].shift(-1)
+    df['market_return'] = next_close / df['close'] - 1
+    df = df.sort_values('date', kind='stable').reset_index(drop=True)
+    dates = df['date'].to_numpy()
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]]) if len(df) else np.array([], dtype=int)
+    columns = set()
+    for rules in _rule_sets(strategy_params()):
+        for col, _, value in rules:
+            columns.update([col, value] if isinstance(value, str) else [col])
+    features = {col: df[col].to_numpy(dtype=float) for col in columns}
+    features['market_return'] = df['market_return'].to_numpy(dtype=float)
+    features['day_starts'] = starts
+    features['bars_per_day'] = np.diff(np.r_[starts, len(df)])
+    features['dates'] = dates[starts]
+    return features
+
+# === BROADCAST EVALUATION ===
+def _broadcast_mask(features, rules_by_combo):
+    """(rows x combos) mask of one rule set whose thresholds differ per combo.
+
+    Every combo shares the rule structure, so each condition is evaluated once
+    with the combos' thresholds broadcast along the second axis.
+    """
+    mask = None
+    for conditions in zip(*rules_by_combo):
+        col, op, value = conditions[0]
+        if isinstance(value, str):
+            cond = OPERATORS[op](features[col], features[value])[:, None]
+        else:
+            thresholds = np.array([c[2] for c in conditions], dtype=float)
+            cond = OPERATORS[op](features[col][:, None], thresholds[None, :])
+        mask = cond if mask is None else mask & cond
+    return mask
+
+def portfolio_returns(features, combos):
+    """(days x combos) equal-weight portfolio returns, as ``backtest_panel`` computes them."""
+    filter_rules, long_rules, short_rules = zip(*(_rule_sets(p) for p in combos))
+    passed = _broadcast_mask(features, filter_rules)
+    long_ = _broadcast_mask(features, long_rules)
+    short = _broadcast_mask(features, short_rules)
+    position = np.where(long_, 1.0, np.where(short, -1.0, 0.0)) * passed
+    strategy = np.nan_to_num(position * features['market_return'][:, None])
+    if not len(strategy):
+        return np.zeros((0, len(combos)))
+    return np.add.reduceat(strategy, features['day_starts'], axis=0) / features['bars_per_day'][:, None]
+
+def _chunk_returns(combos):
+    return portfolio_returns(_features, combos)
+
+def _init_worker(features):
+    global _features
+    _features = features
+
+def sweep_returns(features, combos, max_workers=1, chunk_size=CHUNK_SIZE):
+    """(days x combos) portfolio returns of every combo, chunked and optionally in a process pool."""
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+    if max_workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(features,),
+                                 mp_context=multiprocessing.get_context(SWEEP_START_METHOD)) as executor:
+            results = list(executor.map(_chunk_returns, chunks))
+    else:
+        results = [portfolio_returns(features, chunk) for chunk in chunks]
+    return np.hstack(results) if results else np.zeros((len(features['dates']), 0))
+
+def returns_stats(returns):
+    """``summary_stats`` for each column of a (days x combos) portfolio returns frame."""
+    equity = (1 + returns).cumprod()
+    return summary_stats_panel(returns, equity, returns.notna(), label='Combo').drop(columns='Combo')
+
+# === SWEEP ===
+def sweep(prices, grid, max_workers=1, chunk_size=CHUNK_SIZE, rank_by=RANK_BY):
+    """Backtest every threshold combination of ``grid`` on ``prices``; best first.
+
+    Indicators are computed once; each chunk of combos is then a handful of
+    broadcast comparisons. With ``max_workers > 1`` chunks run in a process pool.
+    Returns one row per combo: the swept parameters followed by the stats of
+    the equal-weight portfolio (the ``PORTFOLIO`` row of ``backtest_panel``).
+    """
+    combos = parameter_grid(grid)
+    features = prepare_features(prices)
+    print(f'🔁 Sweeping {len(combos)} parameter sets over {len(prices)} bars')
+    returns = pd.DataFrame(sweep_returns(features, combos, max_workers, chunk_size), index=features['dates'])
+    table = pd.concat([pd.DataFrame(combos, columns=list(grid)), returns_stats(returns)], axis=1)
+    return table.sort_values(rank_by, ascending=False, kind='stable').reset_index(drop=True)
+
+if __name__ == '__main__':
+    from backtester import download_universe
+    prices = download_universe(['AAPL', 'MSFT', 'NVDA'], start='2022-01-01', end='2023-01-01')
+    grid = {'VOLUME_SURGE_MIN': [50, 80, 120], 'VOLATILITY_MIN': [1, 2, 3], 'RSI_LONG_MIN': [45, 50, 55]}
+    print(sweep(prices, grid, max_workers=MAX_WORKERS).head(10))
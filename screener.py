@@ -1,125 +1,250 @@
 import os
-import yfinance as yf
+import sys
+import csv
+import zlib
+import argparse
+import multiprocessing
 import pandas as pd
-import numpy as np
-import requests
 from io import StringIO
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email.mime.text import MIMEText
 from email import encoders
+from bar_store import get_recent_bars, last_trading_day
+from market_data import BURST, FETCHER, RATE_PER_SECOND, TokenBucket, get_json, ticker_info
+from metrics import METRICS, METRICS_FILE, profiled
+from screening_engine import MIN_BARS, build_panel, screen_panel
 
 # === CONFIGURATION ===
-BATCH_SIZE = 500
+BATCH_SIZE = 500  # tickers per multi-ticker history request
 MIN_VOLUME = 100_000
 MIN_PRICE = 1
 MAX_PRICE = 30
 MIN_ATR = 0.1
 MAX_WORKERS = 10
+HISTORY_DAYS = 21
 CSV_FILENAME = "csv_results/daily_results.csv"
+# full exchange list (e.g. nasdaqlisted.txt from NASDAQ Trader); most-actives when absent
+SYMBOLS_FILE = os.environ.get("SYMBOLS_FILE", "symbols/nasdaqlisted.txt")
+SHARD_DIR = "csv_results/shards"
+SCAN_PROCESSES = os.cpu_count() or 1
+# scan workers start as fresh interpreters: a child forked while other threads
+# hold a lock (metrics, the fetcher) inherits it held and can deadlock
+SCAN_START_METHOD = "spawn"
 
-# credentials from environment variables
-EMAIL_SENDER = os.environ.get("EMAIL_SENDER")
-EMAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
-EMAIL_RECEIVER = os.environ.get("EMAIL_RECEIVER")
-
-if not all([EMAIL_SENDER, EMAIL_PASSWORD, EMAIL_RECEIVER]):
-    raise EnvironmentError("EMAIL_SENDER, EMAIL_PASSWORD, and EMAIL_RECEIVER must be set as environment variables")
+# === EMAIL CREDENTIALS ===
+def email_credentials():
+    """``(sender, password, receiver)`` from the environment, read when an email is sent."""
+    sender = os.environ.get("EMAIL_SENDER")
+    password = os.environ.get("EMAIL_PASSWORD")
+    receiver = os.environ.get("EMAIL_RECEIVER")
+    if not all([sender, password, receiver]):
+        raise EnvironmentError("EMAIL_SENDER, EMAIL_PASSWORD, and EMAIL_RECEIVER must be set as environment variables")
+    return sender, password, receiver
 
 # === FETCH TICKERS ===
 def get_most_active_stocks():
-    url = "https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved?count=100&scrIds=most_actives"
-    headers = {"User-Agent": "Mozilla/5.0"}
-    response = requests.get(url, headers=headers)
-    data = response.json()
+    url = "https://query1.finance.yahoo.com/v1/finance/screener/predefined/saved"
+    data = get_json(url, {"count": 100, "scrIds": "most_actives"})
     return [item['symbol'] for item in data['finance']['result'][0]['quotes']]
 
-# === ATR CALCULATION ===
-def calculate_atr(hist, period=14):
-    high_low = hist['High'] - hist['Low']
-    high_close = np.abs(hist['High'] - hist['Close'].shift(1))
-    low_close = np.abs(hist['Low'] - hist['Close'].shift(1))
-    ranges = pd.concat([high_low, high_close, low_close], axis=1)
-    true_range = ranges.max(axis=1)
-    atr = true_range.rolling(window=period).mean().iloc[-1]
-    return round(atr, 2)
-
-# === VWAP CALCULATION ===
-def calculate_vwap(hist):
-    vwap = (hist['Close'] * hist['Volume']).cumsum() / hist['Volume'].cumsum()
-    return vwap
+# === SYMBOL UNIVERSE ===
+def _yahoo_symbol(symbol):
+    # class shares are BRK.B on the exchange and BRK-B on Yahoo
+    return symbol.strip().upper().replace('.', '-')
+
+def load_symbols(path=SYMBOLS_FILE):
+    """Symbols from a local list, de-duplicated in file order.
+
+    Reads NASDAQ Trader's pipe-delimited ``nasdaqlisted.txt`` / ``otherlisted.txt``
+    (test issues and the creation-time footer are dropped), a CSV with a
+    ``Symbol`` or ``Ticker`` column, or plain text with one symbol per line.
+    """
+    with open(path) as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    if not lines:
+        return []
+    if '|' in lines[0] or ',' in lines[0]:
+        rows = csv.DictReader(lines, delimiter='|' if '|' in lines[0] else ',')
+        column = next((c for c in ['Symbol', 'ACT Symbol', 'Ticker'] if c in rows.fieldnames), None)
+        if column is None:
+            raise ValueError(f"{path} has no Symbol or Ticker column")
+        symbols = [row[column] for row in rows
+                   if row.get('Test Issue', 'N') != 'Y' and not row[column].startswith('File Creation Time')]
+    else:
+        symbols = lines
+    symbols = [_yahoo_symbol(s) for s in symbols if s and '$' not in s and ' ' not in s.strip()]
+    return list(dict.fromkeys(symbols))
+
+def shard_symbols(symbols, shard_index, shard_count):
+    """The symbols of shard ``shard_index`` of ``shard_count``.
+
+    Assignment is by CRC32 of the symbol, so it is the same on every machine
+    and a symbol keeps its shard when others are listed or delisted.
+    """
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"shard index {shard_index} is outside 0..{shard_count - 1}")
+    return [s for s in symbols if zlib.crc32(s.encode()) % shard_count == shard_index]
+
+def universe(symbols_file=SYMBOLS_FILE):
+    """The full symbol list when ``symbols_file`` exists, else Yahoo's most-actives."""
+    if symbols_file and os.path.exists(symbols_file):
+        return load_symbols(symbols_file)
+    return get_most_active_stocks()
+
+# === HISTORY FROM BAR STORE ===
+def load_history(ticker):
+    """Recent daily bars for one ticker from the local bar store."""
+    return get_recent_bars(ticker, HISTORY_DAYS)[ticker]
+
+def load_history_batch(tickers):
+    """Recent daily bars for a batch, topped up with one multi-ticker request."""
+    return get_recent_bars(tickers, HISTORY_DAYS)
+
+# === METADATA ===
+def fetch_info(ticker):
+    try:
+        with METRICS.timer('step_seconds', stage='screener', step='info'):
+            return ticker_info(ticker) or {}
+    except Exception:
+        # the ticker still passes, just without 52-week range and sector
+        METRICS.inc('info_errors_total', stage='screener')
+        return {}
+
+def add_info(result, info):
+    result['52W High'] = info.get('fiftyTwoWeekHigh')
+    result['52W Low'] = info.get('fiftyTwoWeekLow')
+    result['Sector'] = info.get('sector')
+    result['News Link'] = f"https://finance.yahoo.com/quote/{result['Ticker']}/news"
+    return result
+
+# === SCREEN METRICS ===
+def screen_bars(bars_map):
+    """Apply the price/volume/ATR filter to a batch of histories in one panel pass.
+
+    Only uses bar history, so it runs before any per-ticker metadata request.
+    Returns the passing tickers' metrics as a DataFrame.
+    """
+    with METRICS.timer('step_seconds', stage='screener', step='filter'):
+        return screen_panel(build_panel(bars_map), MIN_PRICE, MAX_PRICE, MIN_VOLUME, MIN_ATR)
+
+def has_enough_bars(bars):
+    return bars is not None and len(bars) >= MIN_BARS
 
 # === PROCESS SINGLE TICKER ===
 def process_ticker(ticker):
-    try:
-        print(f"🔎 Checking {ticker}...")
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="21d", interval="1d")
-        if hist.empty or len(hist) < 14 or hist['Close'].isnull().all():
-            print(f"❌ Skipping {ticker}: no recent data.")
-            return None
-        current_price = hist['Close'].iloc[-1]
-        volume = hist['Volume'].iloc[-1]
-        atr = calculate_atr(hist)
+    with METRICS.track_ticker('screener', ticker):
         try:
-            info = stock.info or {}
-        except Exception:
-            print(f"⚠️ Info fetch failed for {ticker}")
-            info = {}
-        if (MIN_PRICE <= current_price <= MAX_PRICE) and (volume >= MIN_VOLUME) and (atr >= MIN_ATR):
-            today = hist.iloc[-1]
-            yesterday = hist.iloc[-2]
-            price_action = (today['Close'] - today['Open']) / today['Open'] * 100
-            volatility = (today['High'] - today['Low']) / today['Open'] * 100
-            delta = hist['Close'].diff()
-            gain = np.where(delta > 0, delta, 0)
-            loss = np.where(delta < 0, -delta, 0)
-            avg_gain = pd.Series(gain).rolling(window=14).mean()
-            avg_loss = pd.Series(loss).rolling(window=14).mean()
-            rs = avg_gain / avg_loss
-            rsi = 100 - (100 / (1 + rs))
-            rsi_value = rsi.iloc[-1] if not rsi.isna().iloc[-1] else None
-            vwap_today = calculate_vwap(hist).iloc[-1]
-            vwap_deviation = (today['Close'] - vwap_today) / vwap_today * 100
-            gap = (today['Open'] - yesterday['Close']) / yesterday['Close'] * 100
-            avg_volume = hist['Volume'].mean()
-            volume_surge = today['Volume'] / avg_volume * 100
-            print(f"✅ Passed: {ticker} | Price: {current_price}, Vol: {volume}, ATR: {atr}")
-            return {
-                'Ticker': ticker,
-                'Current Price': round(current_price, 2),
-                'Volume': int(volume),
-                'ATR': atr,
-                'Price Action %': round(price_action, 2),
-                'Volatility %': round(volatility, 2),
-                'RSI 14': round(rsi_value, 2) if rsi_value else None,
-                'VWAP Deviation %': round(vwap_deviation, 2),
-                'Gap %': round(gap, 2),
-                'Volume Surge %': round(volume_surge, 2),
-                '52W High': info.get('fiftyTwoWeekHigh'),
-                '52W Low': info.get('fiftyTwoWeekLow'),
-                'Sector': info.get('sector'),
-                'News Link': f"https://finance.yahoo.com/quote/{ticker}/news"
-            }
-        else:
-            print(f"⚠️ Filtered out: {ticker} | Price: {current_price}, Vol: {volume}, ATR: {atr}")
+            with METRICS.timer('step_seconds', stage='screener', step='fetch'):
+                bars = load_history(ticker)
+            if not has_enough_bars(bars):
+                METRICS.outcome('screener', 'skipped')
+                return None
+            passed = screen_bars({ticker: bars})
+            if passed.empty:
+                METRICS.outcome('screener', 'filtered')
+                return None
+            METRICS.outcome('screener', 'passed')
+            return add_info(passed.iloc[0].to_dict(), fetch_info(ticker))
+        except Exception as e:
+            METRICS.error('screener', ticker, e)
             return None
-    except Exception as e:
-        print(f"⚠️ Error with {ticker}: {e}")
-        return None
 
 # === SCREENING FUNCTION ===
 def screen_stocks(ticker_batch):
+    """Screen a batch: one history request for the batch, metadata only for survivors."""
+    try:
+        with METRICS.timer('step_seconds', stage='screener', step='fetch'):
+            bars_map = load_history_batch(ticker_batch)
+        passed = screen_bars(bars_map)
+    except Exception as e:
+        METRICS.error('screener', f'batch of {len(ticker_batch)}', e)
+        print(f"⚠️ Batch screening failed: {e}")
+        return pd.DataFrame()
+    # the store returns a frame for every ticker; ones without enough bars were never screened
+    usable = sum(has_enough_bars(bars_map.get(ticker)) for ticker in set(ticker_batch))
+    METRICS.outcome('screener', 'passed', len(passed))
+    METRICS.outcome('screener', 'filtered', usable - len(passed))
+    METRICS.outcome('screener', 'skipped', len(set(ticker_batch)) - usable)
+    print(f"✅ {len(passed)} of {usable} tickers passed the price/volume/ATR filter.")
     with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        results = list(executor.map(process_ticker, ticker_batch))
-    return pd.DataFrame([res for res in results if res is not None])
+        infos = list(executor.map(fetch_info, passed['Ticker']))
+    return pd.DataFrame([add_info(res, info) for res, info in zip(passed.to_dict('records'), infos)])
+
+# === PROCESS POOL SCAN ===
+def _init_scan_worker(processes):
+    # every process has its own limiter; split the request budget between them
+    FETCHER.bucket = TokenBucket(RATE_PER_SECOND / processes, max(1, BURST // processes))
+
+def _scan_batch(batch):
+    # pool workers only: start each task from empty metrics so the parent merges a delta
+    METRICS.reset()
+    return screen_stocks(batch), METRICS.snapshot()
+
+def scan_symbols(symbols, processes=SCAN_PROCESSES):
+    """Screen ``symbols`` in batches spread over a process pool; returns the passing rows."""
+    if not symbols:
+        return pd.DataFrame()
+    processes = max(1, min(processes, len(symbols)))
+    size = max(1, min(BATCH_SIZE, -(-len(symbols) // processes)))
+    batches = [symbols[i:i + size] for i in range(0, len(symbols), size)]
+    METRICS.inc('symbols_total', len(symbols), stage='screener')
+    if processes == 1:
+        results = [screen_stocks(batch) for batch in batches]
+    else:
+        results = []
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context(SCAN_START_METHOD),
+                                 initializer=_init_scan_worker, initargs=(processes,)) as executor:
+            for frame, snapshot in executor.map(_scan_batch, batches):
+                METRICS.merge(snapshot)
+                results.append(frame)
+    results = [r for r in results if not r.empty]
+    return pd.concat(results, ignore_index=True) if results else pd.DataFrame()
+
+# === SHARDS ===
+def shard_path(shard_index, shard_count, shard_dir=SHARD_DIR, day=None):
+    day = str((day or last_trading_day()).date())
+    return os.path.join(shard_dir, day, f"shard-{shard_index:03d}-of-{shard_count:03d}.csv")
+
+def run_shard(shard_index, shard_count, symbols_file=SYMBOLS_FILE, processes=SCAN_PROCESSES, shard_dir=SHARD_DIR):
+    """Scan one shard of the universe into its own CSV for ``merge_shards``."""
+    symbols = shard_symbols(universe(symbols_file), shard_index, shard_count)
+    print(f"🚀 Shard {shard_index + 1}/{shard_count}: screening {len(symbols)} symbols on {processes} processes...")
+    results = scan_symbols(symbols, processes)
+    path = shard_path(shard_index, shard_count, shard_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    results.to_csv(path + '.tmp', index=False)
+    os.replace(path + '.tmp', path)
+    print(f"✅ Shard {shard_index + 1}/{shard_count}: {len(results)} stocks saved to {path}.")
+    return path
+
+def merge_shards(shard_count, shard_dir=SHARD_DIR, output=CSV_FILENAME):
+    """Combine today's ``shard_count`` shard CSVs into ``output``; every shard must be present."""
+    paths = [shard_path(i, shard_count, shard_dir) for i in range(shard_count)]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} of {shard_count} shards have not finished: {', '.join(missing)}")
+    frames = []
+    for path in paths:
+        try:
+            frames.append(pd.read_csv(path))
+        except pd.errors.EmptyDataError:
+            continue  # a shard where nothing passed
+    merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if not merged.empty:
+        merged = merged.drop_duplicates('Ticker').sort_values('Ticker').reset_index(drop=True)
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    merged.to_csv(output, index=False)
+    print(f"✅ Merged {shard_count} shards: {len(merged)} stocks saved to {output}.")
+    return merged
 
 # === EMAIL FUNCTION ===
 def send_email_with_csv(to_email, subject, body, file_path):
+    sender, password, _ = email_credentials()
     msg = MIMEMultipart()
-    msg['From'] = EMAIL_SENDER
+    msg['From'] = sender
     msg['To'] = to_email
     msg['Subject'] = subject
     msg.attach(MIMEText(body, 'plain'))
@@ -132,7 +257,7 @@ def send_email_with_csv(to_email, subject, body, file_path):
     try:
         with smtplib.SMTP('smtp.gmail.com', 587) as server:
             server.starttls()
-            server.login(EMAIL_SENDER, EMAIL_PASSWORD)
+            server.login(sender, password)
             server.send_message(msg)
         print("📧 Email sent successfully.")
     except smtplib.SMTPAuthenticationError as e:
@@ -142,23 +267,48 @@ def send_email_with_csv(to_email, subject, body, file_path):
         print(f"❌ Email sending failed: {e}")
 
 # === MAIN FUNCTION ===
-def main():
-    print("🚀 Starting NASDAQ stock screener...")
-    tickers = get_most_active_stocks()
-    all_results = pd.DataFrame()
-    for i in range(0, len(tickers), BATCH_SIZE):
-        batch = tickers[i:i + BATCH_SIZE]
-        batch_result = screen_stocks(batch)
-        all_results = pd.concat([all_results, batch_result], ignore_index=True)
-    os.makedirs(os.path.dirname(CSV_FILENAME), exist_ok=True)
-    all_results.to_csv(CSV_FILENAME, index=False)
-    print(f"✅ Screener complete. {len(all_results)} stocks saved to {CSV_FILENAME}.")
+def email_report(receiver):
     send_email_with_csv(
-        to_email=EMAIL_RECEIVER,
+        to_email=receiver,
         subject="📊 Daily Stock Screener csv_results",
         body="Attached is your daily NASDAQ stock screening report.",
         file_path=CSV_FILENAME
     )
 
+def main(symbols_file=SYMBOLS_FILE, processes=SCAN_PROCESSES):
+    """Screen the whole universe on this machine, save ``CSV_FILENAME`` and email it."""
+    # fail before the screening run, not after it, when the report cannot be sent
+    _, _, receiver = email_credentials()
+    print("🚀 Starting NASDAQ stock screener...")
+    all_results = scan_symbols(universe(symbols_file), processes)
+    os.makedirs(os.path.dirname(CSV_FILENAME), exist_ok=True)
+    all_results.to_csv(CSV_FILENAME, index=False)
+    print(f"✅ Screener complete. {len(all_results)} stocks saved to {CSV_FILENAME}.")
+    email_report(receiver)
+
+def cli(argv=None):
+    parser = argparse.ArgumentParser(description="Screen the symbol universe, whole or one shard at a time.")
+    parser.add_argument("--symbols", default=SYMBOLS_FILE, help="symbol list file (most-actives when missing)")
+    parser.add_argument("--shard-index", type=int, help="scan only this shard (0-based)")
+    parser.add_argument("--shard-count", type=int, help="number of shards the universe is split into")
+    parser.add_argument("--merge", action="store_true", help="combine all shard CSVs into the daily results and email")
+    parser.add_argument("--processes", type=int, default=SCAN_PROCESSES)
+    parser.add_argument("--shard-dir", default=SHARD_DIR)
+    args = parser.parse_args(argv)
+    if args.merge:
+        if not args.shard_count:
+            parser.error("--merge needs --shard-count")
+        _, _, receiver = email_credentials()
+        merge_shards(args.shard_count, args.shard_dir)
+        email_report(receiver)
+    elif args.shard_index is not None or args.shard_count is not None:
+        if args.shard_index is None or not args.shard_count:
+            parser.error("--shard-index and --shard-count go together")
+        run_shard(args.shard_index, args.shard_count, args.symbols, args.processes, args.shard_dir)
+    else:
+        main(args.symbols, args.processes)
+
 if __name__ == "__main__":
-    main()
+    with profiled('screener'):
+        cli(sys.argv[1:])
+    METRICS.write(METRICS_FILE)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+MIN_BARS = 14
+ATR_PERIOD = 14
+RSI_PERIOD = 14
+FIELDS = ['open', 'high', 'low', 'close', 'volume']
+
+# === PANEL CONSTRUCTION ===
+def build_panel(bars_map, days=None):
+    """Stack per-ticker bar frames into (tickers x days) arrays.
+
+    Rows are right-aligned so column ``-1`` is every ticker's latest bar, matching
+    the ``iloc[-1]`` semantics of per-ticker screening; shorter histories are
+    left-padded with NaN. ``days`` caps the width to the most recent bars.
+    """
+    tickers = [t for t, df in bars_map.items() if df is not None and not df.empty]
+    width = max((len(bars_map[t]) for t in tickers), default=0)
+    if days is not None:
+        width = min(width, days)
+    panel = {field: np.full((len(tickers), width), np.nan) for field in FIELDS}
+    counts = np.zeros(len(tickers), dtype=int)
+    for i, ticker in enumerate(tickers):
+        df = bars_map[ticker]
+        cols = {c.lower(): c for c in df.columns}
+        n = min(len(df), width)
+        counts[i] = n
+        for field in FIELDS:
+            panel[field][i, width - n:] = df[cols[field]].to_numpy(dtype=float)[-n:]
+    panel['tickers'] = tickers
+    panel['counts'] = counts
+    return panel
+
+# === METRICS ===
+def compute_metrics(panel):
+    """Every screener metric for every ticker of ``panel`` in one pass of array ops."""
+    o, h, l, c, v = (panel[f] for f in FIELDS)
+    n_tickers = len(panel['tickers'])
+    if o.shape[1] < 2:
+        return pd.DataFrame({'Ticker': panel['tickers']}, index=range(n_tickers))
+    prev_close = np.concatenate([np.full((n_tickers, 1), np.nan), c[:, :-1]], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        true_range = np.fmax(h - l, np.fmax(np.abs(h - prev_close), np.abs(l - prev_close)))
+        atr = true_range[:, -ATR_PERIOD:].mean(axis=1)
+
+        delta = c - prev_close
+        gain = np.where(delta > 0, delta, 0.0)[:, -RSI_PERIOD:].mean(axis=1)
+        loss = np.where(delta < 0, -delta, 0.0)[:, -RSI_PERIOD:].mean(axis=1)
+        rsi = 100 - 100 / (1 + gain / loss)
+
+        vwap = np.nansum(c * v, axis=1) / np.nansum(v, axis=1)
+        today_o, today_h, today_l, today_c, today_v = o[:, -1], h[:, -1], l[:, -1], c[:, -1], v[:, -1]
+        metrics = pd.DataFrame({
+            'Ticker': panel['tickers'],
+            'Current Price': today_c,
+            'Volume': today_v,
+            'ATR': np.round(atr, 2),
+            'Price Action %': (today_c - today_o) / today_o * 100,
+            'Volatility %': (today_h - today_l) / today_o * 100,
+            'RSI 14': rsi,
+            'VWAP Deviation %': (today_c - vwap) / vwap * 100,
+            'Gap %': (today_o - c[:, -2]) / c[:, -2] * 100,
+            'Volume Surge %': today_v / np.nanmean(v, axis=1) * 100,
+        })
+    metrics['Bars'] = panel['counts']
+    return metrics
+
+# === FILTERS ===
+def filter_mask(metrics, min_price, max_price, min_volume, min_atr):
+    """Boolean mask of tickers passing the history, price, volume and ATR filters."""
+    return (
+        (metrics['Bars'] >= MIN_BARS) &
+        metrics['Current Price'].between(min_price, max_price) &
+        (metrics['Volume'] >= min_volume) &
+        (metrics['ATR'] >= min_atr)
+    ).to_numpy()
+
+def screen_panel(panel, min_price, max_price, min_volume, min_atr):
+    """Metrics for the tickers of ``panel`` that pass the filters, rounded for output."""
+    metrics = compute_metrics(panel)
+    if 'ATR' not in metrics:
+        return metrics.iloc[0:0]
+    passed = metrics[filter_mask(metrics, min_price, max_price, min_volume, min_atr)].drop(columns='Bars').reset_index(drop=True)
+    round_cols = ['Current Price', 'Price Action %', 'Volatility %', 'RSI 14',
+                  'VWAP Deviation %', 'Gap %', 'Volume Surge %']
+    passed[round_cols] = passed[round_cols].round(2)
+    passed['Volume'] = passed['Volume'].astype('int64')
+    passed['RSI 14'] = passed['RSI 14'].where(passed['RSI 14'] != 0)
+    return passed
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import pandas as pd
+
+# === CONFIGURATION ===
+SIGNAL_DB = 'filtered_csv_results/signals.db'
+LEGACY_CSV = 'filtered_csv_results/smart_filtered_results.csv'
+LEGACY_VERSION = 'legacy'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+BUSY_TIMEOUT = 30  # seconds to wait on a writer in another process
+
+# One row per (ticker, bar, strategy version). The primary key serves ticker
+# and ticker + date range lookups; the other indexes serve date-only and bias
+# queries. Every other filtered-frame column is kept in a JSON ``payload``, so
+# new indicator columns need no migration.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS signals (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    strategy_version TEXT NOT NULL,
+    bias TEXT,
+    payload TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (ticker, date, strategy_version)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS signals_date ON signals (date);
+CREATE INDEX IF NOT EXISTS signals_bias_date ON signals (bias, date);
+'''
+
+UPSERT = '''
+INSERT INTO signals (ticker, date, strategy_version, bias, payload, updated) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (ticker, date, strategy_version)
+DO UPDATE SET bias = excluded.bias, payload = excluded.payload, updated = excluded.updated
+'''
+
+# === CONNECTION ===
+def connect(path=SIGNAL_DB):
+    """Open (creating if needed) the store. WAL lets readers query while a run writes."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def format_date(value):
+    return pd.Timestamp(value).strftime(DATE_FORMAT)
+
+# === WRITE ===
+def save_signals(filtered_df, version, path=SIGNAL_DB):
+    """Upsert ``filtered_df`` rows keyed by (Ticker, date, ``version``) in one transaction.
+
+    A rerun of the same strategy version replaces its earlier rows instead of
+    appending duplicates. Returns the number of rows written.
+    """
+    if filtered_df.empty:
+        return 0
+    missing = {'Ticker', 'date'} - set(filtered_df.columns)
+    if missing:
+        raise ValueError(f'filtered rows need {sorted(missing)} columns to be stored')
+    dates = pd.to_datetime(filtered_df['date']).dt.strftime(DATE_FORMAT)
+    bias = filtered_df.get('Bias', pd.Series(None, index=filtered_df.index)).astype(object)
+    bias = bias.where(bias.notna(), None)
+    extra = filtered_df.drop(columns=['Ticker', 'date', 'Bias'], errors='ignore')
+    # one vectorized JSON encode for the whole frame, one line per row
+    payloads = extra.to_json(orient='records', lines=True, date_format='iso').splitlines() if len(extra.columns) \
+        else ['{}'] * len(extra)
+    now = time.time()
+    rows = [(str(t), d, version, b, p, now) for t, d, b, p in zip(filtered_df['Ticker'], dates, bias, payloads)]
+    conn = connect(path)
+    try:
+        with conn:
+            conn.executemany(UPSERT, rows)
+    finally:
+        conn.close()
+    return len(rows)
+
+def import_csv(csv_path=LEGACY_CSV, path=SIGNAL_DB, version=LEGACY_VERSION):
+    """Load a filtered-results CSV from before the store, tagged with ``version``."""
+    return save_signals(pd.read_csv(csv_path), version, path)
+
+# === READ ===
+def query_signals(path=SIGNAL_DB, ticker=None, start=None, end=None, bias=None, version=None, columns=None):
+    """Stored signals as a DataFrame, newest date last within each ticker.
+
+    ``ticker`` and ``bias`` take one value or a list; ``start <= date < end``.
+    ``columns`` limits which payload columns are expanded (all by default).
+    """
+    clauses, params = [], []
+    for column, value in [('ticker', ticker), ('bias', bias), ('strategy_version', version)]:
+        if value is None:
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    if start is not None:
+        clauses.append('date >= ?')
+        params.append(format_date(start))
+    if end is not None:
+        clauses.append('date < ?')
+        params.append(format_date(end))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    conn = connect(path)
+    try:
+        rows = conn.execute(f'SELECT ticker, date, strategy_version, bias, payload FROM signals {where} '
+                            'ORDER BY ticker, date, strategy_version', params).fetchall()
+    finally:
+        conn.close()
+    base = pd.DataFrame(rows, columns=['Ticker', 'date', 'Strategy Version', 'Bias', 'payload'])
+    base['date'] = pd.to_datetime(base['date'], format=DATE_FORMAT)
+    payload = pd.DataFrame.from_records([json.loads(p) for p in base.pop('payload')], index=base.index)
+    if columns is not None:
+        payload = payload.reindex(columns=list(columns))
+    return pd.concat([base, payload], axis=1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the filtered signal store.')
+    parser.add_argument('ticker', nargs='*', help='tickers to show (all by default)')
+    parser.add_argument('--start')
+    parser.add_argument('--end')
+    parser.add_argument('--bias', nargs='+')
+    parser.add_argument('--version', help='strategy version (all by default)')
+    parser.add_argument('--db', default=SIGNAL_DB)
+    parser.add_argument('--import-csv', metavar='CSV', help=f'load a legacy CSV such as {LEGACY_CSV}')
+    args = parser.parse_args(argv)
+    if args.import_csv:
+        saved = import_csv(args.import_csv, args.db)
+        print(f"✅ Imported {saved} rows from '{args.import_csv}' into '{args.db}'.")
+        return
+    signals = query_signals(args.db, args.ticker or None, args.start, args.end, args.bias, args.version)
+    print(signals.to_string(index=False))
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
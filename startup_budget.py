@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import subprocess
+
+# === CONFIGURATION ===
+# Seconds allowed for ``import <module>`` in a fresh interpreter. Measured at
+# 0.3-0.5s each (mostly pandas), down from 1.9-2.6s when TA-Lib, SciPy,
+# mplfinance and yfinance loaded at import; the budgets leave ~2x headroom, so
+# an entry point that pulls one of them back in (+0.5-1.5s each) goes over.
+IMPORT_BUDGETS = {
+    'strategy_tester': 1.0,
+    'backtester': 1.0,
+    'screener': 1.0,
+    'final_enricher': 1.0,
+    'build_ml_training_data': 1.0,
+    'full_pipeline': 1.25,
+    'intraday_screener': 1.0,
+}
+# libraries each entry point should only load when the work that needs them runs
+HEAVY_MODULES = ['talib', 'mplfinance', 'cv2', 'scipy', 'yfinance', 'matplotlib']
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": seconds, "heavy": heavy}}))
+'''
+
+# === MEASUREMENT ===
+def measure_import(module, cwd=None):
+    """Time ``import module`` in a fresh interpreter; returns ``{'seconds', 'heavy'}``.
+
+    Email credentials are removed from the environment, as for a cron job that
+    only imports the module.
+    """
+    env = {k: v for k, v in os.environ.items() if not k.startswith('EMAIL_')}
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_DIR, env.get('PYTHONPATH')]))
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    result = subprocess.run([sys.executable, '-c', probe], cwd=cwd or REPO_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    over = 0
+    for module, budget in IMPORT_BUDGETS.items():
+        measured = measure_import(module)
+        ok = measured['seconds'] <= budget and not measured['heavy']
+        over += not ok
+        heavy = f" loads {', '.join(measured['heavy'])}" if measured['heavy'] else ''
+        print(f"{'✅' if ok else '❌'} {module:<24} {measured['seconds']:.2f}s / {budget:.2f}s{heavy}")
+    return over
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,13 @@
-import os
+import json
+import hashlib
+import operator
+import numpy as np
 import pandas as pd
-from analysis_engine import enrich_with_technical_analysis
+from signal_store import SIGNAL_DB, save_signals
+
+# Bump when indicator or filter *code* changes; threshold and rule changes are
+# picked up by ``strategy_version()`` automatically.
+STRATEGY_REVISION = 1
 
 # === SMART FILTER PARAMETERS ===
 VWAP_THRESHOLD = 0
@@ -8,71 +15,184 @@ RSI_LONG_MIN = 50
 RSI_SHORT_MAX = 50
 VOLUME_SURGE_MIN = 80
 VOLATILITY_MIN = 2
+BIAS_VOLUME_SURGE_MIN = 50
+PRICE_ACTION_LIMIT = 5
+
+STRATEGY_PARAMS = ['VWAP_THRESHOLD', 'RSI_LONG_MIN', 'RSI_SHORT_MAX', 'VOLUME_SURGE_MIN',
+                   'VOLATILITY_MIN', 'BIAS_VOLUME_SURGE_MIN', 'PRICE_ACTION_LIMIT']
+
+def strategy_params():
+    """Current values of the tunable thresholds, keyed by constant name."""
+    return {name: globals()[name] for name in STRATEGY_PARAMS}
+
+# === DECLARATIVE RULES ===
+# A rule set is a list of (column, op, value) conditions that must all hold.
+# ``value`` is either a number or the name of another column. Bias rule sets are
+# tried in order and the first match wins, so new setups are added as data here
+# and are evaluated column-wise like the built-in ones. The rules are built from
+# a params dict so ``parameter_sweep`` can rebuild them for other thresholds.
+# The module-level sets below, and their compiled forms in the rule engine, are
+# built once at import: after changing a threshold constant, rebuild them via
+# ``build_*_rules(strategy_params())`` and ``compile_*_rules``.
+def build_filter_rules(p):
+    return [
+        ('Volume Surge %', '>=', p['VOLUME_SURGE_MIN']),
+        ('Volatility %', '>=', p['VOLATILITY_MIN']),
+    ]
+
+def build_bias_rules(p):
+    return {
+        'Long': [
+            ('VWAP Deviation %', '>', p['VWAP_THRESHOLD']),
+            ('RSI 14', '>=', p['RSI_LONG_MIN']),
+            ('MACD Line', '>', 'MACD Signal Line'),
+            ('Volume Surge %', '>', p['BIAS_VOLUME_SURGE_MIN']),
+            ('9 EMA', '>', '20 EMA'),
+            ('Price Action %', '>', -p['PRICE_ACTION_LIMIT']),
+        ],
+        'Short': [
+            ('VWAP Deviation %', '<', p['VWAP_THRESHOLD']),
+            ('RSI 14', '<=', p['RSI_SHORT_MAX']),
+            ('MACD Line', '<', 'MACD Signal Line'),
+            ('Volume Surge %', '>', p['BIAS_VOLUME_SURGE_MIN']),
+            ('9 EMA', '<', '20 EMA'),
+            ('Price Action %', '<', p['PRICE_ACTION_LIMIT']),
+        ],
+    }
+
+FILTER_RULES = build_filter_rules(strategy_params())
+BIAS_RULES = build_bias_rules(strategy_params())
+DEFAULT_BIAS = 'Neutral'
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+}
+
+# === GROUP-AWARE SERIES OPS ===
+# With ``keys`` (a per-row ticker Series) each op runs per ticker in a single
+# grouped call instead of a Python loop over tickers.
+def _ewm(s, span, keys=None):
+    if keys is None:
+        return s.ewm(span=span, adjust=False).mean()
+    return s.groupby(keys, sort=False).ewm(span=span, adjust=False).mean().droplevel(0)
+
+def _rolling_mean(s, window, keys=None):
+    if keys is None:
+        return s.rolling(window=window).mean()
+    return s.groupby(keys, sort=False).rolling(window=window).mean().droplevel(0)
+
+def _diff(s, keys=None):
+    return s.diff() if keys is None else s.groupby(keys, sort=False).diff()
+
+def _cumsum(s, keys=None):
+    return s.cumsum() if keys is None else s.groupby(keys, sort=False).cumsum()
+
+def _pct_change(s, keys=None):
+    return s.pct_change() if keys is None else s.groupby(keys, sort=False).pct_change()
 
-def add_technical_indicators(df):
-    ema_12 = df['close'].ewm(span=12, adjust=False).mean()
-    ema_26 = df['close'].ewm(span=26, adjust=False).mean()
+def add_technical_indicators(df, group_col=None):
+    """Add MACD, EMA, RSI, VWAP, price action, volume surge and volatility columns.
+
+    With ``group_col`` (e.g. ``'Ticker'``) ``df`` may hold many tickers, each in
+    date order; every ticker gets the values a separate call on its rows would give.
+    """
+    # integer codes factorized once are much cheaper to group by than ticker strings
+    keys = pd.Series(pd.factorize(df[group_col])[0], index=df.index) if group_col else None
+    ema_12 = _ewm(df['close'], 12, keys)
+    ema_26 = _ewm(df['close'], 26, keys)
     df['MACD Line'] = ema_12 - ema_26
-    df['MACD Signal Line'] = df['MACD Line'].ewm(span=9, adjust=False).mean()
-    df['9 EMA'] = df['close'].ewm(span=9, adjust=False).mean()
-    df['20 EMA'] = df['close'].ewm(span=20, adjust=False).mean()
-    delta = df['close'].diff()
+    df['MACD Signal Line'] = _ewm(df['MACD Line'], 9, keys)
+    df['9 EMA'] = _ewm(df['close'], 9, keys)
+    df['20 EMA'] = _ewm(df['close'], 20, keys)
+    delta = _diff(df['close'], keys)
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
+    avg_gain = _rolling_mean(gain, 14, keys)
+    avg_loss = _rolling_mean(loss, 14, keys)
     rs = avg_gain / avg_loss
     df['RSI 14'] = 100 - (100 / (1 + rs))
     typical_price = (df['high'] + df['low'] + df['close']) / 3
-    df['VWAP'] = (typical_price * df['volume']).cumsum() / df['volume'].cumsum()
+    df['VWAP'] = _cumsum(typical_price * df['volume'], keys) / _cumsum(df['volume'], keys)
     df['VWAP Deviation %'] = ((df['close'] - df['VWAP']) / df['VWAP']) * 100
-    df['Price Action %'] = df['close'].pct_change() * 100
-    df['20D Avg Volume'] = df['volume'].rolling(window=20).mean()
+    df['Price Action %'] = _pct_change(df['close'], keys) * 100
+    df['20D Avg Volume'] = _rolling_mean(df['volume'], 20, keys)
     df['Volume Surge %'] = ((df['volume'] - df['20D Avg Volume']) / df['20D Avg Volume']) * 100
     df['Volatility %'] = ((df['high'] - df['low']) / df['close']) * 100
     df.drop(columns=['20D Avg Volume'], inplace=True, errors='ignore')
     return df
 
+# === RULE ENGINE ===
+def compile_rules(rules):
+    """Resolve a rule set's operators once; returns ``(column, func, value, value_is_column)`` tuples."""
+    return [(col, OPERATORS[op], value, isinstance(value, str)) for col, op, value in rules]
+
+def compile_bias_rules(rules):
+    """``compile_rules`` for each set of a ``{label: rules}`` mapping, keeping its order."""
+    return {label: compile_rules(conds) for label, conds in rules.items()}
+
+COMPILED_FILTER_RULES = compile_rules(FILTER_RULES)
+COMPILED_BIAS_RULES = compile_bias_rules(BIAS_RULES)
+
+def rule_mask(data, compiled):
+    """Evaluate a compiled rule set against a DataFrame (boolean mask) or a row (bool).
+
+    Comparisons against NaN are False, so rows with missing indicators never match.
+    """
+    mask = True
+    for col, func, value, value_is_column in compiled:
+        mask = mask & func(data[col], data[value] if value_is_column else value)
+    return mask
+
+def classify_bias(df, rules=None, default=DEFAULT_BIAS):
+    """Vectorized bias for every row of ``df``; the first matching rule set wins.
+
+    ``rules`` is an uncompiled ``{label: rules}`` mapping, defaulting to ``BIAS_RULES``.
+    """
+    compiled = COMPILED_BIAS_RULES if rules is None else compile_bias_rules(rules)
+    if df.empty:
+        return pd.Series(default, index=df.index, dtype=object)
+    conditions = [np.asarray(rule_mask(df, conds), dtype=bool) for conds in compiled.values()]
+    return pd.Series(np.select(conditions, list(compiled), default=default), index=df.index)
+
 def smart_filter(df):
-    filtered = df[
-        (df['Volume Surge %'] >= VOLUME_SURGE_MIN) &
-        (df['Volatility %'] >= VOLATILITY_MIN)
-    ].copy()
-    filtered['Bias'] = filtered.apply(determine_bias, axis=1)
+    filtered = df[rule_mask(df, COMPILED_FILTER_RULES)].copy()
+    filtered['Bias'] = classify_bias(filtered)
     return filtered
 
 def determine_bias(row):
-    if (
-        row['VWAP Deviation %'] > 0 and
-        row['RSI 14'] >= 50 and
-        row['MACD Line'] > row['MACD Signal Line'] and
-        row['Volume Surge %'] > 50 and
-        row['9 EMA'] > row['20 EMA'] and
-        row['Price Action %'] > -5
-    ):
-        return 'Long'
-    elif (
-        row['VWAP Deviation %'] < 0 and
-        row['RSI 14'] <= 50 and
-        row['MACD Line'] < row['MACD Signal Line'] and
-        row['Volume Surge %'] > 50 and
-        row['9 EMA'] < row['20 EMA'] and
-        row['Price Action %'] < 5
-    ):
-        return 'Short'
-    return 'Neutral'
-
-def run_all_strategies(df):
+    """Scalar bias for a single row, using the same rules as ``classify_bias``."""
+    for label, conds in COMPILED_BIAS_RULES.items():
+        if rule_mask(row, conds):
+            return label
+    return DEFAULT_BIAS
+
+def strategy_version():
+    """Short hash of the strategy revision, filter rules and bias rules."""
+    spec = json.dumps([STRATEGY_REVISION, FILTER_RULES, BIAS_RULES], sort_keys=True, default=str)
+    return hashlib.sha256(spec.encode()).hexdigest()[:12]
+
+def save_filtered_results(filtered_df, path=SIGNAL_DB):
+    """Upsert ``filtered_df`` into the signal store under the current ``strategy_version()``."""
+    return save_signals(filtered_df, strategy_version(), path)
+
+def run_all_strategies(df, save_filtered=True):
+    """Indicators, smart filter and TA enrichment for ``df``.
+
+    ``save_filtered=False`` skips writing to the shared signal store, for
+    callers such as the parallel dataset builder that persist results themselves.
+    """
+    # imported here so indicator-only users (backtester, sweeps, intraday) skip the pattern stack
+    from analysis_engine import enrich_with_technical_analysis
     df = add_technical_indicators(df)
     filtered_df = smart_filter(df)
-    os.makedirs('filtered_csv_results', exist_ok=True)
-    filtered_csv_path = 'filtered_csv_results/smart_filtered_results.csv'
-    if os.path.exists(filtered_csv_path):
-        filtered_df.to_csv(filtered_csv_path, mode='a', header=False, index=False)
-    else:
-        filtered_df.to_csv(filtered_csv_path, index=False)
-    print(f"✅ Appended {len(filtered_df)} rows to '{filtered_csv_path}'.")
+    if save_filtered:
+        saved = save_filtered_results(filtered_df)
+        print(f"✅ Saved {saved} rows to '{SIGNAL_DB}'.")
     ticker_ohlcv_map = {ticker: group.sort_values('date').copy() for ticker, group in df.groupby('Ticker') if len(group) >= 20}
     enriched_df = enrich_with_technical_analysis(filtered_df, ticker_ohlcv_map)
-    print("\n✅ All strategies complete.")
     return enriched_df, filtered_df, []
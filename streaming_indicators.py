@@ -0,0 +1,441 @@
+import copy
+import math
+from collections import deque
+import pandas as pd
+
+# === CONFIGURATION ===
+NAN = float('nan')
+# TA-Lib treats values within this distance of zero as zero (``TA_IS_ZERO``)
+TA_EPSILON = 1e-8
+RSI_PERIOD = 14
+VOLUME_AVG_PERIOD = 20
+SMA_PERIOD = 20
+TRIX_PERIOD = 15
+STOCH_FASTK, STOCH_SLOWK, STOCH_SLOWD = 5, 3, 3
+CCI_PERIOD = 14
+ULTOSC_PERIODS = (7, 14, 28)
+WILLR_PERIOD = 14
+MFI_PERIOD = 14
+ATR_PERIOD = 14
+BBANDS_PERIOD, BBANDS_DEV = 20, 2.0
+ADX_PERIOD = 14
+SAR_ACCELERATION, SAR_MAXIMUM = 0.02, 0.2
+AROON_PERIOD = 14
+
+# Same columns as ``strategy_tester.add_technical_indicators`` and
+# ``analysis_engine.compute_ta_indicators``.
+STRATEGY_COLUMNS = ['MACD Line', 'MACD Signal Line', '9 EMA', '20 EMA', 'RSI 14', 'VWAP',
+                    'VWAP Deviation %', 'Price Action %', 'Volume Surge %', 'Volatility %']
+TA_COLUMNS = ['SMA_20', 'TRIX', 'STOCH_slowk', 'STOCH_slowd', 'CCI', 'ULTOSC', 'WILLR', 'OBV',
+              'MFI', 'ATR', 'BB_upper', 'BB_middle', 'BB_lower', 'ADX', 'SAR', 'AROON_up', 'AROON_down']
+INDICATOR_COLUMNS = STRATEGY_COLUMNS + TA_COLUMNS
+
+def _ratio(a, b):
+    """``a / b`` with NumPy/pandas semantics for a zero divisor (``inf`` or NaN)."""
+    if b == 0:
+        return NAN if a == 0 or a != a else math.copysign(math.inf, a)
+    return a / b
+
+def _is_zero(value):
+    return -TA_EPSILON < value < TA_EPSILON
+
+# === BUILDING BLOCKS ===
+class RollingSum:
+    """Sum of the last ``n`` values in O(1), re-summed each time the ring wraps to bound drift."""
+
+    def __init__(self, n):
+        self.n = n
+        self.values = deque(maxlen=n)
+        self.total = 0.0
+        self.pushed = 0
+
+    def push(self, value):
+        if len(self.values) == self.n:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.pushed += 1
+        if self.pushed % self.n == 0:
+            self.total = math.fsum(self.values)
+        return self.total
+
+    @property
+    def full(self):
+        return len(self.values) == self.n
+
+    def mean(self):
+        return self.total / self.n if self.full else NAN
+
+class RollingExtreme:
+    """Max (or min) of the last ``n`` values with its bar index, via a monotonic deque.
+
+    Ties resolve to the most recent bar, as TA-Lib's ``AROON`` does.
+    """
+
+    def __init__(self, n, highest=True):
+        self.n = n
+        self.highest = highest
+        self.items = deque()
+
+    def push(self, t, value):
+        if self.highest:
+            while self.items and self.items[-1][1] <= value:
+                self.items.pop()
+        else:
+            while self.items and self.items[-1][1] >= value:
+                self.items.pop()
+        self.items.append((t, value))
+        while self.items[0][0] <= t - self.n:
+            self.items.popleft()
+        return self.items[0]
+
+class Ema:
+    """``Series.ewm(span=span, adjust=False).mean()``: seeded with the first value."""
+
+    def __init__(self, span):
+        self.alpha = 2 / (span + 1)
+        self.value = None
+
+    def push(self, value):
+        if self.value is None:
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+class TaEma:
+    """TA-Lib's ``EMA``: NaN for ``n - 1`` bars, seeded with the SMA of the first ``n``."""
+
+    def __init__(self, n):
+        self.n = n
+        self.k = 2 / (n + 1)
+        self.seed = RollingSum(n)
+        self.value = None
+
+    def push(self, value):
+        if self.value is None:
+            self.seed.push(value)
+            if self.seed.full:
+                self.value = self.seed.total / self.n
+                self.seed = None
+            return NAN if self.value is None else self.value
+        self.value = (value - self.value) * self.k + self.value
+        return self.value
+
+# === INDICATOR ENGINE ===
+class StreamingIndicators:
+    """Every strategy and TA-Lib indicator of one ticker, updated one bar at a time.
+
+    ``update(open, high, low, close, volume)`` returns ``{column: value}`` for the
+    new bar with the values the batch functions give for the last row of the
+    whole history, in constant time per bar. ``snapshot()`` returns a copy of the
+    state that ``StreamingIndicators.restore`` resumes from, e.g. after warming
+    up on history once and replaying each intraday bar from the same snapshot.
+    """
+
+    def __init__(self):
+        self.t = -1
+        self.prev = None
+        # strategy_tester
+        self.ema_12, self.ema_26 = Ema(12), Ema(26)
+        self.macd_signal = Ema(9)
+        self.ema_9, self.ema_20 = Ema(9), Ema(20)
+        self.gains, self.losses = RollingSum(RSI_PERIOD), RollingSum(RSI_PERIOD)
+        self.cum_pv = 0.0
+        self.cum_volume = 0.0
+        self.volumes = RollingSum(VOLUME_AVG_PERIOD)
+        # analysis_engine
+        self.closes = RollingSum(SMA_PERIOD)
+        self.squares = RollingSum(BBANDS_PERIOD)
+        self.trix = [TaEma(TRIX_PERIOD) for _ in range(3)]
+        self.trix_prev = NAN
+        self.stoch_high = RollingExtreme(STOCH_FASTK, highest=True)
+        self.stoch_low = RollingExtreme(STOCH_FASTK, highest=False)
+        self.fastk, self.slowk = RollingSum(STOCH_SLOWK), RollingSum(STOCH_SLOWD)
+        self.typical = deque(maxlen=CCI_PERIOD)
+        self.ult_bp = [RollingSum(n) for n in ULTOSC_PERIODS]
+        self.ult_tr = [RollingSum(n) for n in ULTOSC_PERIODS]
+        self.willr_high = RollingExtreme(WILLR_PERIOD, highest=True)
+        self.willr_low = RollingExtreme(WILLR_PERIOD, highest=False)
+        self.obv = 0.0
+        self.mfi_pos, self.mfi_neg = RollingSum(MFI_PERIOD), RollingSum(MFI_PERIOD)
+        self.true_ranges = RollingSum(ATR_PERIOD)
+        self.atr = None
+        self.plus_dm = self.minus_dm = self.adx_tr = self.sum_dx = 0.0
+        self.adx = NAN
+        self.sar = self.sar_ep = self.sar_af = NAN
+        self.sar_long = True
+        self.aroon_high = RollingExtreme(AROON_PERIOD + 1, highest=True)
+        self.aroon_low = RollingExtreme(AROON_PERIOD + 1, highest=False)
+
+    # --- strategy_tester.add_technical_indicators ---
+    def _strategy(self, o, h, l, c, v):
+        prev_close = self.prev[3] if self.prev else NAN
+        macd = self.ema_12.push(c) - self.ema_26.push(c)
+        delta = c - prev_close
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        rsi = 100 - 100 / (1 + _ratio(self.gains.mean(), self.losses.mean()))
+        self.cum_pv += (h + l + c) / 3 * v
+        self.cum_volume += v
+        vwap = _ratio(self.cum_pv, self.cum_volume)
+        self.volumes.push(v)
+        avg_volume = self.volumes.mean()
+        return {
+            'MACD Line': macd,
+            'MACD Signal Line': self.macd_signal.push(macd),
+            '9 EMA': self.ema_9.push(c),
+            '20 EMA': self.ema_20.push(c),
+            'RSI 14': rsi,
+            'VWAP': vwap,
+            'VWAP Deviation %': _ratio(c - vwap, vwap) * 100,
+            'Price Action %': _ratio(c - prev_close, prev_close) * 100,
+            'Volume Surge %': _ratio(v - avg_volume, avg_volume) * 100,
+            'Volatility %': _ratio(h - l, c) * 100,
+        }
+
+    # --- analysis_engine.compute_ta_indicators (TA-Lib algorithms) ---
+    def _trix(self, c):
+        value = c
+        for ema in self.trix:
+            value = ema.push(value)
+            if value != value:
+                return NAN
+        prev, self.trix_prev = self.trix_prev, value
+        if prev != prev:
+            return NAN
+        return (value - prev) / prev * 100 if prev != 0 else 0.0
+
+    def _stoch(self, h, l, c):
+        highest = self.stoch_high.push(self.t, h)[1]
+        lowest = self.stoch_low.push(self.t, l)[1]
+        if self.t < STOCH_FASTK - 1:
+            return NAN, NAN
+        diff = (highest - lowest) / 100.0
+        self.fastk.push((c - lowest) / diff if diff != 0 else 0.0)
+        if not self.fastk.full:
+            return NAN, NAN
+        slowk = self.fastk.mean()
+        self.slowk.push(slowk)
+        return (slowk, self.slowk.mean()) if self.slowk.full else (NAN, NAN)
+
+    def _cci(self, tp):
+        self.typical.append(tp)
+        if len(self.typical) < CCI_PERIOD:
+            return NAN
+        average = sum(self.typical) / CCI_PERIOD
+        deviation = sum(abs(x - average) for x in self.typical)
+        above = tp - average
+        return above / (0.015 * (deviation / CCI_PERIOD)) if above != 0 and deviation != 0 else 0.0
+
+    def _ultosc(self, h, l, c, prev_close):
+        true_low = min(l, prev_close)
+        buying_pressure = c - true_low
+        true_range = max(h, prev_close) - true_low
+        for bp, tr in zip(self.ult_bp, self.ult_tr):
+            bp.push(buying_pressure)
+            tr.push(true_range)
+        if not self.ult_tr[-1].full:
+            return NAN
+        output = 0.0
+        for weight, bp, tr in zip((4.0, 2.0, 1.0), self.ult_bp, self.ult_tr):
+            if not _is_zero(tr.total):
+                output += weight * (bp.total / tr.total)
+        return 100.0 * (output / 7.0)
+
+    def _willr(self, h, l, c):
+        highest = self.willr_high.push(self.t, h)[1]
+        lowest = self.willr_low.push(self.t, l)[1]
+        if self.t < WILLR_PERIOD - 1:
+            return NAN
+        diff = (highest - lowest) / -100.0
+        return (highest - c) / diff if diff != 0 else 0.0
+
+    def _mfi(self, tp, v, prev_tp):
+        change = tp - prev_tp
+        flow = tp * v
+        self.mfi_pos.push(flow if change > 0 else 0.0)
+        self.mfi_neg.push(flow if change < 0 else 0.0)
+        if not self.mfi_pos.full:
+            return NAN
+        total = self.mfi_pos.total + self.mfi_neg.total
+        return 0.0 if total < 1.0 else 100.0 * (self.mfi_pos.total / total)
+
+    def _atr(self, true_range):
+        if self.atr is None:
+            self.true_ranges.push(true_range)
+            if not self.true_ranges.full:
+                return NAN
+            self.atr = self.true_ranges.total / ATR_PERIOD
+            return self.atr
+        self.atr = (self.atr * (ATR_PERIOD - 1) + true_range) / ATR_PERIOD
+        return self.atr
+
+    def _adx(self, h, l, true_range):
+        """Wilder's ADX exactly as TA-Lib seeds and smooths it (first value at bar ``2n - 1``)."""
+        n = ADX_PERIOD
+        prev_high, prev_low = self.prev[1], self.prev[2]
+        diff_plus, diff_minus = h - prev_high, prev_low - l
+        if self.t >= n:
+            self.minus_dm -= self.minus_dm / n
+            self.plus_dm -= self.plus_dm / n
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self.minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self.plus_dm += diff_plus
+        if self.t < n:
+            self.adx_tr += true_range
+            return NAN
+        self.adx_tr = self.adx_tr - self.adx_tr / n + true_range
+        dx = None
+        if not _is_zero(self.adx_tr):
+            minus_di = 100.0 * (self.minus_dm / self.adx_tr)
+            plus_di = 100.0 * (self.plus_dm / self.adx_tr)
+            total = minus_di + plus_di
+            if not _is_zero(total):
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+        if self.t < 2 * n - 1:
+            self.sum_dx += dx or 0.0
+            return NAN
+        if self.t == 2 * n - 1:
+            self.sum_dx += dx or 0.0
+            self.adx = self.sum_dx / n
+        elif dx is not None:
+            self.adx = (self.adx * (n - 1) + dx) / n
+        return self.adx
+
+    def _sar(self, h, l):
+        """Parabolic SAR as TA-Lib runs it, starting from the second bar."""
+        if self.t == 1:
+            prev_high, prev_low = self.prev[1], self.prev[2]
+            diff_plus, diff_minus = h - prev_high, prev_low - l
+            self.sar_long = not (diff_minus > 0 and diff_plus < diff_minus)
+            self.sar_af = SAR_ACCELERATION
+            self.sar_ep, self.sar = (h, prev_low) if self.sar_long else (l, prev_high)
+            # TA-Lib's first step compares the second bar against itself
+            prev_high, prev_low = h, l
+        else:
+            prev_high, prev_low = self.prev[1], self.prev[2]
+        if self.sar_long:
+            if l <= self.sar:
+                self.sar_long = False
+                out = max(self.sar_ep, prev_high, h)
+                self.sar_af = SAR_ACCELERATION
+                self.sar_ep = l
+                self.sar = max(out + self.sar_af * (self.sar_ep - out), prev_high, h)
+                return out
+            out = self.sar
+            if h > self.sar_ep:
+                self.sar_ep = h
+                self.sar_af = min(self.sar_af + SAR_ACCELERATION, SAR_MAXIMUM)
+            self.sar = min(self.sar + self.sar_af * (self.sar_ep - self.sar), prev_low, l)
+            return out
+        if h >= self.sar:
+            self.sar_long = True
+            out = min(self.sar_ep, prev_low, l)
+            self.sar_af = SAR_ACCELERATION
+            self.sar_ep = h
+            self.sar = min(out + self.sar_af * (self.sar_ep - out), prev_low, l)
+            return out
+        out = self.sar
+        if l < self.sar_ep:
+            self.sar_ep = l
+            self.sar_af = min(self.sar_af + SAR_ACCELERATION, SAR_MAXIMUM)
+        self.sar = max(self.sar + self.sar_af * (self.sar_ep - self.sar), prev_high, h)
+        return out
+
+    def _aroon(self, h, l):
+        high_t = self.aroon_high.push(self.t, h)[0]
+        low_t = self.aroon_low.push(self.t, l)[0]
+        if self.t < AROON_PERIOD:
+            return NAN, NAN
+        factor = 100.0 / AROON_PERIOD
+        return factor * (AROON_PERIOD - (self.t - high_t)), factor * (AROON_PERIOD - (self.t - low_t))
+
+    def _ta(self, o, h, l, c, v):
+        tp = (h + l + c) / 3
+        self.closes.push(c)
+        self.squares.push(c * c)
+        middle = self.closes.mean()
+        values = {'SMA_20': middle, 'TRIX': self._trix(c)}
+        values['STOCH_slowk'], values['STOCH_slowd'] = self._stoch(h, l, c)
+        values['CCI'] = self._cci(tp)
+        values['WILLR'] = self._willr(h, l, c)
+        values['AROON_up'], values['AROON_down'] = self._aroon(h, l)
+        if self.prev is None:
+            self.obv = v
+            values.update(ULTOSC=NAN, OBV=self.obv, MFI=NAN, ATR=NAN, ADX=NAN, SAR=NAN)
+        else:
+            prev_close = self.prev[3]
+            prev_tp = (self.prev[1] + self.prev[2] + prev_close) / 3
+            true_range = max(h - l, abs(prev_close - h), abs(prev_close - l))
+            if c > prev_close:
+                self.obv += v
+            elif c < prev_close:
+                self.obv -= v
+            values['ULTOSC'] = self._ultosc(h, l, c, prev_close)
+            values['OBV'] = self.obv
+            values['MFI'] = self._mfi(tp, v, prev_tp)
+            values['ATR'] = self._atr(true_range)
+            values['ADX'] = self._adx(h, l, true_range)
+            values['SAR'] = self._sar(h, l)
+        if self.squares.full:
+            variance = self.squares.total / BBANDS_PERIOD - middle * middle
+            band = BBANDS_DEV * math.sqrt(variance) if variance > 0 and not _is_zero(variance) else 0.0
+            values.update(BB_upper=middle + band, BB_middle=middle, BB_lower=middle - band)
+        else:
+            values.update(BB_upper=NAN, BB_middle=NAN, BB_lower=NAN)
+        return values
+
+    def update(self, open_, high, low, close, volume):
+        """Add one bar; returns every indicator's value for it."""
+        bar = (float(open_), float(high), float(low), float(close), float(volume))
+        self.t += 1
+        values = self._strategy(*bar)
+        values.update(self._ta(*bar))
+        self.prev = bar
+        return values
+
+    # --- state ---
+    def snapshot(self):
+        return copy.deepcopy(self.__dict__)
+
+    @classmethod
+    def restore(cls, state):
+        engine = cls.__new__(cls)
+        engine.__dict__.update(copy.deepcopy(state))
+        return engine
+
+# === MANY TICKERS ===
+class IndicatorBook:
+    """One ``StreamingIndicators`` per ticker, e.g. for scoring a universe on every intraday bar."""
+
+    def __init__(self):
+        self.engines = {}
+
+    def warm_up(self, ticker, df):
+        """Feed a ticker's history (lowercase OHLCV columns) and return its latest values."""
+        engine = self.engines[ticker] = StreamingIndicators()
+        values = {}
+        for bar in df[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False):
+            values = engine.update(*bar)
+        return values
+
+    def update(self, ticker, open_, high, low, close, volume):
+        engine = self.engines.setdefault(ticker, StreamingIndicators())
+        return engine.update(open_, high, low, close, volume)
+
+    def snapshot(self):
+        return {ticker: engine.snapshot() for ticker, engine in self.engines.items()}
+
+    @classmethod
+    def restore(cls, states):
+        book = cls()
+        book.engines = {ticker: StreamingIndicators.restore(state) for ticker, state in states.items()}
+        return book
+
+def stream_indicators(df):
+    """Run ``df`` through a fresh engine bar by bar; one row of values per bar."""
+    engine = StreamingIndicators()
+    rows = [engine.update(*bar) for bar in df[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False)]
+    return pd.DataFrame(rows, columns=INDICATOR_COLUMNS, index=df.index)
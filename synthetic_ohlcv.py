@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+# === CONFIGURATION ===
+END_DATE = '2024-12-31'
+TRADING_DAYS = 252
+SPIKE_PROBABILITY = 0.05
+
+# === GENERATOR ===
+def synthetic_panel(n_tickers, n_bars, seed=0, end=END_DATE):
+    """Seeded daily OHLCV for ``n_tickers`` as (tickers x bars) arrays plus dates and names.
+
+    Closes follow a geometric random walk with a per-ticker price level, drift
+    and volatility; opens gap from the previous close, highs/lows wrap the
+    body, and volume is lognormal with occasional surges so the smart filter
+    and pattern detectors see realistic hit rates. The same arguments always
+    give the same bars.
+    """
+    rng = np.random.default_rng(seed)
+    level = np.exp(rng.uniform(np.log(2), np.log(300), n_tickers))[:, None]
+    drift = rng.normal(0.0003, 0.0005, n_tickers)[:, None]
+    vol = rng.uniform(0.01, 0.04, n_tickers)[:, None]
+    log_returns = drift + vol * rng.standard_normal((n_tickers, n_bars))
+    close = level * np.exp(np.cumsum(log_returns, axis=1))
+    prev_close = np.concatenate([close[:, :1], close[:, :-1]], axis=1)
+    open_ = prev_close * np.exp(0.3 * vol * rng.standard_normal((n_tickers, n_bars)))
+    wick = vol * np.abs(rng.standard_normal((2, n_tickers, n_bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    base_volume = np.exp(rng.uniform(np.log(5e4), np.log(5e7), n_tickers))[:, None]
+    volume = base_volume * rng.lognormal(0, 0.4, (n_tickers, n_bars))
+    volume *= np.where(rng.random((n_tickers, n_bars)) < SPIKE_PROBABILITY, rng.uniform(2, 6, (n_tickers, n_bars)), 1)
+    return {
+        'tickers': [f'SYN{i:05d}' for i in range(n_tickers)],
+        'dates': pd.bdate_range(end=end, periods=n_bars),
+        'open': np.round(open_, 4),
+        'high': np.round(high, 4),
+        'low': np.round(low, 4),
+        'close': np.round(close, 4),
+        'volume': np.round(volume),
+    }
+
+def synthetic_bars(n_tickers, n_bars, seed=0, end=END_DATE):
+    """``{ticker: bars}`` with the lowercase ``date/open/high/low/close/volume`` columns of ``bar_store``."""
+    panel = synthetic_panel(n_tickers, n_bars, seed, end)
+    return {
+        ticker: pd.DataFrame({'date': panel['dates'], **{f: panel[f][i] for f in ['open', 'high', 'low', 'close', 'volume']}})
+        for i, ticker in enumerate(panel['tickers'])
+    }
+
+def synthetic_universe(n_tickers, n_bars, seed=0, end=END_DATE):
+    """Long (date, Ticker) frame of the same bars, grouped by ticker in date order."""
+    panel = synthetic_panel(n_tickers, n_bars, seed, end)
+    frame = pd.DataFrame({
+        'date': np.tile(panel['dates'].to_numpy(), n_tickers),
+        **{f: panel[f].ravel() for f in ['open', 'high', 'low', 'close', 'volume']},
+    })
+    frame['Ticker'] = np.repeat(panel['tickers'], n_bars)
+    return frame
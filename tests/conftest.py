@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from synthetic_ohlcv import synthetic_bars
+
+
+@pytest.fixture
+def make_bars():
+    """Factory for one ticker's seeded ``synthetic_ohlcv`` daily bars.
+
+    ``make_bars(n, seed, start=..., price=..., volume=...)`` gives lowercase
+    ``date/open/high/low/close/volume`` columns with business days from
+    ``start``; ``price`` rescales the series to open at that level and
+    ``volume`` replaces the volumes with a constant.
+    """
+    def make(n, seed=0, start='2024-01-01', price=None, volume=None):
+        df = synthetic_bars(1, n, seed)['SYN00000']
+        df['date'] = pd.bdate_range(start, periods=n)
+        if price is not None:
+            df[['open', 'high', 'low', 'close']] *= price / df['close'].iloc[0]
+        if volume is not None:
+            df['volume'] = float(volume)
+        return df
+    return make
+
+
+@pytest.fixture
+def price_universe(make_bars):
+    """Long ``Ticker`` price frame of three tickers with different lengths and start dates."""
+    frames = [make_bars(150, 1, start='2022-01-03', price=20).assign(Ticker='ZZZ'),
+              make_bars(120, 2, start='2022-01-17', price=20).assign(Ticker='AAA'),
+              make_bars(90, 3, start='2022-01-03', price=20).assign(Ticker='MMM')]
+    return pd.concat(frames, ignore_index=True)
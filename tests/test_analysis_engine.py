@@ -0,0 +1,23 @@
+import numpy as np
+from analysis_engine import (candle_pattern_matrix, candle_pattern_names, candle_pattern_tail,
+                             detect_ta_patterns_dynamic, enrich_with_technical_analysis, pattern_labels)
+
+
+def test_tail_mode_matches_full_history_matrix(make_bars):
+    df = make_bars(300)
+    matrix = candle_pattern_matrix(df)
+    assert matrix.dtype == np.int8
+    assert matrix.shape == (300, len(candle_pattern_names()))
+    assert (candle_pattern_tail(df, bars=5) == matrix[-5:]).all()
+    assert detect_ta_patterns_dynamic(df) == pattern_labels(matrix[-1])
+
+
+def test_enrichment_labels_each_row_at_its_own_bar(make_bars):
+    df = make_bars(300, seed=1)
+    df['Ticker'] = 'AAA'
+    matrix = candle_pattern_matrix(df)
+    active = np.flatnonzero(matrix.any(axis=1))
+    rows = df.iloc[[active[0], active[-1], 299]]
+    enriched = enrich_with_technical_analysis(rows, {'AAA': df})
+    expected = [pattern_labels(matrix[i]) for i in [active[0], active[-1], 299]]
+    assert enriched['TA-Lib Pattern'].tolist() == expected
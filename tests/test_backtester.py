@@ -0,0 +1,29 @@
+import pandas as pd
+from backtester import (PORTFOLIO_LABEL, backtest_panel, backtest_signals, generate_signals,
+                        generate_signals_panel, summary_stats)
+
+
+def test_panel_backtest_matches_per_ticker_loop(tmp_path, monkeypatch, price_universe):
+    monkeypatch.chdir(tmp_path)
+    frames = [rows.reset_index(drop=True) for _, rows in price_universe.groupby('Ticker', sort=False)]
+    expected = []
+    for prices in frames:
+        stats = summary_stats(backtest_signals(generate_signals(prices.copy())))
+        stats['Ticker'] = prices['Ticker'].iloc[0]
+        expected.append(stats)
+
+    tested, stats = backtest_panel(generate_signals_panel(pd.concat(frames, ignore_index=True)))
+    per_ticker = stats[stats['Ticker'] != PORTFOLIO_LABEL].reset_index(drop=True)
+    pd.testing.assert_frame_equal(per_ticker, pd.DataFrame(expected), check_dtype=False)
+    assert stats['Ticker'].iloc[-1] == PORTFOLIO_LABEL
+    assert len(tested) == sum(len(f) for f in frames)
+
+
+def test_backtest_with_no_prices_returns_empty_results(tmp_path, monkeypatch):
+    import backtester
+    monkeypatch.setattr(backtester, 'get_bars', lambda tickers, start, end: {t: pd.DataFrame() for t in tickers})
+    for tickers in [[], ['GONE']]:
+        results = backtester.backtest(tickers, '2022-01-01', '2023-01-01', output_dir=str(tmp_path))
+        assert results.empty
+        assert list(results.columns) == backtester.STATS_COLUMNS
+        assert (tmp_path / 'summary.csv').exists()
@@ -0,0 +1,75 @@
+import pandas as pd
+from unittest.mock import patch
+import bar_store
+
+
+def make_bars(start, end):
+    dates = pd.bdate_range(start, end)
+    return pd.DataFrame({
+        'date': dates,
+        'open': 10.0,
+        'high': 11.0,
+        'low': 9.0,
+        'close': 10.0,
+        'volume': 1000,
+    })
+
+
+def fake_download(tickers, start, end=None):
+    return {ticker: make_bars(start, end) for ticker in tickers}
+
+
+def test_refresh_fetches_only_missing_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, 'STORE_DIR', str(tmp_path))
+    with patch('bar_store.download_bars', side_effect=fake_download) as mock_dl:
+        first = bar_store.get_bars(['AAA', 'BBB'], '2024-01-01', '2024-01-31')
+        assert mock_dl.call_count == 1
+        assert len(first['AAA']) == len(pd.bdate_range('2024-01-01', '2024-01-31'))
+
+        bar_store.get_bars(['AAA', 'BBB'], '2024-01-10', '2024-01-31')
+        assert mock_dl.call_count == 1
+
+        extended = bar_store.get_bars(['AAA', 'BBB'], '2024-01-01', '2024-02-15')
+        assert mock_dl.call_count == 2
+        tickers, start, end = mock_dl.call_args.args
+        assert sorted(tickers) == ['AAA', 'BBB']
+        assert start == pd.Timestamp('2024-01-31')
+        assert extended['BBB']['date'].is_unique
+        assert extended['BBB']['date'].iloc[-1] == pd.Timestamp('2024-02-15')
+
+
+def test_recent_window_does_not_cover_the_gap_before_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, 'STORE_DIR', str(tmp_path))
+    monkeypatch.setattr(bar_store, 'last_trading_day', lambda now=None: pd.Timestamp('2024-06-28'))
+    with patch('bar_store.download_bars', side_effect=fake_download) as mock_dl:
+        bar_store.get_bars(['AAA'], '2022-01-01', '2022-12-31')
+        bar_store.get_recent_bars(['AAA'], 21)
+        gap = bar_store.get_bars(['AAA'], '2023-01-01', '2023-12-31')
+        assert mock_dl.call_count == 3
+        assert mock_dl.call_args.args[1:] == (pd.Timestamp('2023-01-01'), pd.Timestamp('2023-12-31'))
+    assert len(gap['AAA']) == len(pd.bdate_range('2023-01-01', '2023-12-31'))
+    ranges = bar_store.covered_ranges(bar_store.load_manifest()['AAA'])
+    assert ranges[0] == (pd.Timestamp('2022-01-01'), pd.Timestamp('2023-12-31'))
+    assert ranges[-1][1] == pd.Timestamp('2024-06-28')
+
+
+def test_failed_tickers_are_not_marked_covered(tmp_path, monkeypatch):
+    monkeypatch.setattr(bar_store, 'STORE_DIR', str(tmp_path))
+
+    def flaky(tickers, start, end=None):
+        # BBB failed outright, CCC answered with no bars
+        return {'AAA': make_bars(start, end), 'CCC': make_bars(start, end).iloc[:0]}
+
+    with patch('bar_store.download_bars', side_effect=flaky):
+        bar_store.get_bars(['AAA', 'BBB', 'CCC'], '2024-01-01', '2024-01-31')
+    assert sorted(bar_store.load_manifest()) == ['AAA', 'CCC']
+    with patch('bar_store.download_bars', side_effect=fake_download) as mock_dl:
+        retried = bar_store.get_bars(['AAA', 'BBB', 'CCC'], '2024-01-01', '2024-01-31')
+    assert mock_dl.call_args.args[0] == ['BBB']
+    assert len(retried['BBB']) == len(pd.bdate_range('2024-01-01', '2024-01-31'))
+
+
+def test_legacy_manifest_span_is_read_as_one_range():
+    manifest = {'AAA': {'start': '2024-01-01', 'end': '2024-01-31'}}
+    assert bar_store._missing_ranges('AAA', pd.Timestamp('2024-01-10'), pd.Timestamp('2024-02-10'), manifest) == \
+        [(pd.Timestamp('2024-01-31'), pd.Timestamp('2024-02-10'))]
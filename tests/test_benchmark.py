@@ -0,0 +1,47 @@
+import json
+import pytest
+import numpy as np
+import benchmark
+from synthetic_ohlcv import synthetic_bars, synthetic_panel, synthetic_universe
+
+
+def test_synthetic_bars_are_seeded_and_valid():
+    a, b = synthetic_panel(5, 100, seed=3), synthetic_panel(5, 100, seed=3)
+    assert np.array_equal(a['close'], b['close'])
+    assert not np.array_equal(a['close'], synthetic_panel(5, 100, seed=4)['close'])
+    assert a['close'].shape == (5, 100)
+    assert (a['high'] >= np.maximum(a['open'], a['close'])).all()
+    assert (a['low'] <= np.minimum(a['open'], a['close'])).all()
+    assert (a['low'] > 0).all() and (a['volume'] > 0).all()
+
+    bars = synthetic_bars(5, 100, seed=3)
+    universe = synthetic_universe(5, 100, seed=3)
+    assert list(bars) == a['tickers']
+    assert np.allclose(bars['SYN00002']['close'], universe[universe['Ticker'] == 'SYN00002']['close'])
+
+
+def test_benchmark_run_flags_regressions(tmp_path):
+    sizes = {'small': (3, 80)}
+    results = benchmark.run_benchmarks(['small'], ['smart_filter', 'backtest_panel'], repeat=1, sizes=sizes)
+    assert [r['case'] for r in results] == ['smart_filter', 'backtest_panel']
+
+    baseline = {'small': {'smart_filter': 1e-9}}
+    results[0]['seconds'] = 1.0  # well past the noise floor
+    benchmark.compare(results, baseline, tolerance=0.25)
+    assert results[0]['status'] == 'regression'
+    assert results[1]['status'] == 'no-baseline'
+
+    out = tmp_path / 'results.json'
+    benchmark.write_results(results, str(out))
+    report = json.loads(out.read_text())
+    assert report['results'][0]['threshold'] == pytest.approx(1.25e-9 + benchmark.NOISE_FLOOR_SECONDS)
+
+    base_file = tmp_path / 'baseline.json'
+    benchmark.update_baseline(results, str(base_file))
+    benchmark.compare(results, benchmark.load_baseline(str(base_file)))
+    assert {r['status'] for r in results} == {'ok'}
+
+    # timings recorded on another machine are not compared against
+    recorded = json.loads(base_file.read_text())
+    base_file.write_text(json.dumps({**recorded, 'machine': {**recorded['machine'], 'cpus': -1}}))
+    assert benchmark.load_baseline(str(base_file)) == {}
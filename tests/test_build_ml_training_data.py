@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+import pandas as pd
+from synthetic_ohlcv import synthetic_bars
+from build_ml_training_data import (SETUPS_DATASET, DatasetBudgetError, dataset_version, file_sha256, list_input_files, load_manifest,
+                                    main, plan_build)
+from metrics import METRICS
+
+
+def csv_bars(n, seed):
+    # historical_data CSVs carry yfinance-style column names and string dates
+    df = synthetic_bars(1, n, seed)['SYN00000'].rename(columns=str.capitalize)
+    df['Date'] = pd.bdate_range('2023-01-02', periods=n).strftime('%Y-%m-%d')
+    return df
+
+
+def write_malformed(df, path, ticker):
+    # yfinance multi-header layout: Price/Ticker/Date rows before the data
+    cols = ['Close', 'High', 'Low', 'Open', 'Volume']
+    lines = ['Price,' + ','.join(cols), 'Ticker,' + ','.join([ticker] * 5), 'Date,,,,,']
+    lines += [','.join([row['Date']] + [str(row[c]) for c in cols]) for _, row in df.iterrows()]
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def test_main_writes_one_partition_per_ticker(tmp_path):
+    src = tmp_path / 'historical_data'
+    src.mkdir()
+    csv_bars(120, 1).to_csv(src / 'AAA.csv', index=False)
+    write_malformed(csv_bars(120, 2), src / 'BBB.csv', 'BBB')
+    csv_bars(10, 3).to_csv(src / 'SHORT.csv', index=False)
+
+    out = tmp_path / 'ml_dataset'
+    METRICS.reset()
+    main(historical_dir=str(src), results_dir=str(out), max_workers=2)
+
+    # worker-process metrics are merged into the parent's registry
+    assert set(METRICS.tickers['dataset']) == {'AAA', 'BBB', 'SHORT'}
+    assert METRICS.counters[('tickers_total', (('outcome', 'skipped'), ('stage', 'dataset')))] == 1
+    partitions = sorted(p.name for p in (out / SETUPS_DATASET).iterdir())
+    assert partitions == ['Ticker=AAA', 'Ticker=BBB']
+    setups = pd.read_parquet(out / SETUPS_DATASET)
+    assert set(setups['Ticker'].astype(str)) == {'AAA', 'BBB'}
+    assert {'Label', 'Bias', 'TA-Lib Pattern'}.issubset(setups.columns)
+    assert setups['RSI 14'].dtype == np.float32
+    assert setups['Label'].dtype == np.int8
+    assert setups['TA-Lib Pattern'].dtype == np.uint64
+    assert isinstance(setups['Bias'].dtype, pd.CategoricalDtype)
+    assert all(entry['bytes'] > 0 for name, entry in load_manifest(str(out)).items() if name != 'SHORT.csv')
+
+
+def test_memory_budget_stops_the_build(tmp_path):
+    src = tmp_path / 'historical_data'
+    src.mkdir()
+    csv_bars(120, 1).to_csv(src / 'AAA.csv', index=False)
+    out = tmp_path / 'ml_dataset'
+    with pytest.raises(DatasetBudgetError, match='AAA partition needs') as error:
+        main(historical_dir=str(src), results_dir=str(out), max_workers=1, memory_budget_mb=1e-6)
+    assert error.value.ticker == 'AAA' and error.value.size > 0
+    # the partition that went over is neither written nor recorded, so a larger budget builds it
+    assert 'AAA.csv' not in load_manifest(str(out))
+    assert not (out / SETUPS_DATASET / 'Ticker=AAA').exists()
+    main(historical_dir=str(src), results_dir=str(out), max_workers=1)
+    assert load_manifest(str(out))['AAA.csv']['bytes'] == error.value.size
+
+
+def test_rebuild_only_touches_new_changed_and_removed_inputs(tmp_path):
+    src = tmp_path / 'historical_data'
+    src.mkdir()
+    out = tmp_path / 'ml_dataset'
+    for i, ticker in enumerate(['AAA', 'BBB', 'CCC']):
+        csv_bars(100, i).to_csv(src / f'{ticker}.csv', index=False)
+    main(historical_dir=str(src), results_dir=str(out), max_workers=2)
+    part = lambda t: out / SETUPS_DATASET / f'Ticker={t}' / 'part-0.parquet'
+    before = {t: part(t).stat().st_mtime_ns for t in ['AAA', 'BBB']}
+
+    csv_bars(101, 0).to_csv(src / 'AAA.csv', index=False)
+    (src / 'CCC.csv').unlink()
+    csv_bars(100, 9).to_csv(src / 'DDD.csv', index=False)
+    main(historical_dir=str(src), results_dir=str(out), max_workers=2)
+
+    assert part('AAA').stat().st_mtime_ns != before['AAA']
+    assert part('BBB').stat().st_mtime_ns == before['BBB']
+    assert not part('CCC').exists()
+    setups = pd.read_parquet(out / SETUPS_DATASET)
+    assert set(setups['Ticker'].astype(str)) == {'AAA', 'BBB', 'DDD'}
+    manifest = load_manifest(str(out))
+    assert sorted(manifest) == ['AAA.csv', 'BBB.csv', 'DDD.csv']
+    assert manifest['AAA.csv']['sha256'] == file_sha256(src / 'AAA.csv')
+
+
+def test_failed_files_are_retried_on_the_next_run(tmp_path):
+    src = tmp_path / 'historical_data'
+    src.mkdir()
+    out = tmp_path / 'ml_dataset'
+    csv_bars(100, 1).to_csv(src / 'AAA.csv', index=False)
+    csv_bars(100, 2)[['Date', 'Close']].to_csv(src / 'BAD.csv', index=False)
+    METRICS.reset()
+    main(historical_dir=str(src), results_dir=str(out), max_workers=1)
+    assert sorted(load_manifest(str(out))) == ['AAA.csv']
+    assert METRICS.counters[('tickers_total', (('outcome', 'error'), ('stage', 'dataset')))] == 1
+    stale, _ = plan_build(list_input_files(str(src)), load_manifest(str(out)), dataset_version())
+    assert [p.rsplit('/', 1)[-1] for p in stale] == ['BAD.csv']
+
+    csv_bars(100, 2).to_csv(src / 'BAD.csv', index=False)
+    main(historical_dir=str(src), results_dir=str(out), max_workers=1)
+    assert sorted(load_manifest(str(out))) == ['AAA.csv', 'BAD.csv']
+    assert (out / SETUPS_DATASET / 'Ticker=BAD').exists()
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+from build_ml_training_data import main
+from dataset_reader import default_features, iter_batches, iter_frames, iter_tables, open_dataset
+from synthetic_ohlcv import synthetic_bars
+
+
+@pytest.fixture(scope='module')
+def dataset_dir(tmp_path_factory):
+    root = tmp_path_factory.mktemp('reader')
+    src = root / 'historical_data'
+    src.mkdir()
+    for ticker, bars in synthetic_bars(4, 600, seed=2).items():
+        bars.to_csv(src / f'{ticker}.csv', index=False)
+    main(historical_dir=str(src), results_dir=str(root / 'ml_dataset'), max_workers=1)
+    return str(root / 'ml_dataset' / 'strategy_setups')
+
+
+def test_batches_cover_every_row_once(dataset_dir):
+    expected = pd.read_parquet(dataset_dir)
+    features = default_features(open_dataset(dataset_dir).schema)
+    assert 'RSI 14' in features and not any(f.startswith('Return_') for f in features)
+
+    batches = list(iter_batches(dataset_dir, batch_size=32))
+    assert all(X.shape == (32, len(features)) for X, _ in batches[:-1])
+    assert batches[0][0].dtype == np.float32
+    assert sum(len(y) for _, y in batches) == len(expected)
+    assert np.concatenate([y for _, y in batches]).sum() == expected['Label'].sum()
+
+    dropped = list(iter_batches(dataset_dir, batch_size=32, drop_last=True))
+    assert len(dropped) == len(expected) // 32
+
+
+def test_shuffle_is_bounded_and_seeded(dataset_dir):
+    def dates(seed):
+        frames = iter_frames(dataset_dir, columns=['date', 'Ticker'], batch_size=16, shuffle_buffer=64, seed=seed)
+        return pd.concat(list(frames), ignore_index=True)
+
+    plain = pd.concat(list(iter_frames(dataset_dir, columns=['date', 'Ticker'], batch_size=16)), ignore_index=True)
+    first, again, other = dates(1), dates(1), dates(2)
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other) and not first.equals(plain)
+    key = ['Ticker', 'date']
+    pd.testing.assert_frame_equal(first.sort_values(key).reset_index(drop=True),
+                                  plain.sort_values(key).reset_index(drop=True))
+
+
+def test_projection_and_filters(dataset_dir):
+    tables = list(iter_tables(dataset_dir, columns=['date', 'Ticker', 'RSI 14'], batch_size=10_000,
+                              tickers=['SYN00001', 'SYN00003'], start='2024-06-01', end='2024-10-01'))
+    frame = pd.concat([t.to_pandas() for t in tables])
+    full = pd.read_parquet(dataset_dir)
+    expected = full[full['Ticker'].isin(['SYN00001', 'SYN00003'])
+                    & (full['date'] >= '2024-06-01') & (full['date'] < '2024-10-01')]
+    assert list(frame.columns) == ['date', 'Ticker', 'RSI 14']
+    assert len(frame) == len(expected) > 0
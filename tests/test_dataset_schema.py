@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dataset_schema import (BIAS_DTYPE, compact_frame, decode_patterns, encode_patterns, memory_bytes,
+                            pattern_names)
+
+
+def make_setups(n):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2024-01-01', periods=n),
+        'close': rng.uniform(5, 50, n),
+        'RSI 14': rng.uniform(0, 100, n),
+        'Label': rng.integers(0, 2, n),
+        'Ticker': rng.choice(['AAA', 'BBB', 'CCC'], n),
+        'Bias': rng.choice(['Long', 'Short', 'Neutral'], n),
+        'TA-Lib Pattern': rng.choice(['None', 'CDLDOJI', 'CDLDOJI, CDLHAMMER', 'CDLXSIDEGAP3METHODS'], n),
+        'Visual Pattern': rng.choice(['None', 'Double Bottom, Bull Flag'], n),
+    })
+
+
+def test_pattern_masks_round_trip():
+    names = pattern_names('TA-Lib Pattern')
+    labels = pd.Series(['None', 'CDLDOJI, CDLHAMMER', names[-1], None])
+    masks = encode_patterns(labels, names)
+    assert masks.dtype == np.uint64
+    assert masks[0] == 0 and masks[3] == 0
+    assert decode_patterns(masks, names).tolist() == ['None', 'CDLDOJI, CDLHAMMER', names[-1], 'None']
+    assert encode_patterns(pd.Series(['Bull Flag']), pattern_names('Visual Pattern')).dtype == np.uint8
+    with pytest.raises(ValueError):
+        encode_patterns(pd.Series(['NOT A PATTERN']), names)
+
+
+def test_compact_frame_dtypes_and_size():
+    df = make_setups(5000)
+    compact = compact_frame(df)
+    assert compact['close'].dtype == np.float32
+    assert compact['Label'].dtype == np.int8
+    assert isinstance(compact['Ticker'].dtype, pd.CategoricalDtype)
+    assert compact['Bias'].dtype == BIAS_DTYPE
+    assert compact['Visual Pattern'].dtype == np.uint8
+    assert np.allclose(compact['RSI 14'], df['RSI 14'], rtol=1e-6)
+    assert decode_patterns(compact['TA-Lib Pattern'], pattern_names('TA-Lib Pattern')).tolist() == \
+        df['TA-Lib Pattern'].tolist()
+    assert memory_bytes(compact) * 3 < memory_bytes(df)
+    # already compact frames pass through unchanged
+    pd.testing.assert_frame_equal(compact_frame(compact), compact)
@@ -0,0 +1,76 @@
+import pandas as pd
+from unittest.mock import patch
+import final_enricher
+from signal_store import save_signals
+from final_enricher import DAYS_FORWARD, LABEL_THRESHOLD, calculate_returns, enrich_csv, history_start
+from strategy_tester import add_technical_indicators, determine_bias, strategy_version
+from synthetic_ohlcv import synthetic_bars
+
+
+def window_bars(tickers, seed=5):
+    end = final_enricher.last_trading_day()
+    bars = synthetic_bars(len(tickers), 40, seed=seed, end=end)
+    return {t: df[df['date'] >= history_start()].reset_index(drop=True) for t, df in zip(tickers, bars.values())}
+
+
+def reference_row(ticker, df):
+    df = add_technical_indicators(calculate_returns(df.copy()))
+    latest = df.iloc[-(max(final_enricher.DAYS_FORWARD) + 1)]
+    row = latest.to_dict()
+    label = int(any(latest[f'Return_{d}d'] >= LABEL_THRESHOLD for d in DAYS_FORWARD))
+    row.update(Ticker=ticker, Label=label, Bias=determine_bias(latest))
+    return row
+
+
+def test_enrich_csv_batches_fetches_and_matches_per_ticker(tmp_path):
+    tickers = ['AAA', 'BBB', 'CCC', 'DDD']
+    bars = window_bars(tickers)
+    screener_csv, out_csv = tmp_path / 'daily.csv', tmp_path / 'enriched.csv'
+    pd.DataFrame({'Ticker': tickers + ['SHORT']}).to_csv(screener_csv, index=False)
+    available = {**bars, 'SHORT': bars['AAA'].tail(2)}
+
+    def fake_recent(requested, days):
+        return {t: available[t] for t in requested}
+
+    with patch('final_enricher.get_recent_bars', side_effect=fake_recent) as mock_bars:
+        # the screener already holds AAA and BBB; one batched call fetches the rest
+        enrich_csv(str(screener_csv), str(out_csv), bars={'AAA': bars['AAA'], 'BBB': bars['BBB']}, max_workers=4,
+                   signal_db=str(tmp_path / 'signals.db'))
+    mock_bars.assert_called_once_with(['CCC', 'DDD', 'SHORT'], final_enricher.HISTORY_DAYS)
+
+    enriched = pd.read_csv(out_csv)
+    assert enriched['Ticker'].tolist() == tickers
+    assert list(enriched.columns[-6:]) == ['Ticker', 'Label', 'TA-Lib Pattern', 'Visual Pattern', 'Bias', 'Stored Bias']
+    assert enriched['Stored Bias'].isna().all()
+    for _, row in enriched.iterrows():
+        expected = reference_row(row['Ticker'], bars[row['Ticker']])
+        assert row['Bias'] == expected['Bias']
+        assert row['Label'] == expected['Label']
+        assert row['close'] == expected['close']
+        assert abs(row['RSI 14'] - expected['RSI 14']) < 1e-9
+
+
+def test_short_screener_history_is_refetched(tmp_path):
+    bars = window_bars(['AAA'])
+    # 21-day screener history does not reach back to the 30-day window start
+    partial = {'AAA': bars['AAA'].tail(10)}
+    with patch('final_enricher.get_recent_bars', return_value=bars) as mock_bars:
+        result = final_enricher.enrich_tickers(['AAA'], bars=partial)
+    mock_bars.assert_called_once()
+    assert len(result) == 1
+
+
+def test_stored_bias_comes_from_the_current_strategy_version(tmp_path):
+    bars = window_bars(['AAA', 'BBB', 'CCC'])
+    db = str(tmp_path / 'signals.db')
+    day = lambda t: bars[t]['date'].iloc[-final_enricher.ROW_OFFSET]
+    save_signals(pd.DataFrame({'Ticker': ['AAA'], 'date': [day('AAA')], 'Bias': ['Long']}), strategy_version(), db)
+    save_signals(pd.DataFrame({'Ticker': ['BBB'], 'date': [day('BBB')], 'Bias': ['Short']}), 'older', db)
+    # a stored bar other than the enriched one does not match
+    save_signals(pd.DataFrame({'Ticker': ['CCC'], 'date': [bars['CCC']['date'].iloc[-1]], 'Bias': ['Long']}),
+                 strategy_version(), db)
+    with patch('final_enricher.get_recent_bars', return_value=bars):
+        result = final_enricher.enrich_tickers(['AAA', 'BBB', 'CCC'], signal_db=db)
+    stored = result.set_index('Ticker')['Stored Bias']
+    assert stored['AAA'] == 'Long'
+    assert stored[['BBB', 'CCC']].isna().all()
@@ -0,0 +1,41 @@
+import pandas as pd
+from indicator_cache import IndicatorCache, frame_fingerprint, memoize
+
+
+def make_bars(close):
+    return pd.DataFrame({
+        'date': pd.bdate_range('2024-01-01', periods=len(close)),
+        'open': close,
+        'high': close,
+        'low': close,
+        'close': close,
+        'volume': [1000] * len(close),
+    })
+
+
+def test_fingerprint_ignores_derived_columns_but_not_bars():
+    bars = make_bars([1.0, 2.0, 3.0])
+    with_indicators = bars.assign(**{'RSI 14': [50.0, 51.0, 52.0]})
+    assert frame_fingerprint(bars) == frame_fingerprint(with_indicators)
+    assert frame_fingerprint(bars) != frame_fingerprint(make_bars([1.0, 2.0, 4.0]))
+
+
+def test_memoize_computes_once_per_content_and_evicts_lru():
+    cache = IndicatorCache(maxsize=2)
+    calls = []
+
+    def compute(df):
+        calls.append(len(df))
+        return df['close'].sum()
+
+    bars = make_bars([1.0, 2.0, 3.0])
+    for _ in range(3):
+        assert memoize('sum', 'AAA', bars, compute, cache=cache) == 6.0
+    assert calls == [3]
+    assert cache.hits == 2
+
+    memoize('sum', 'BBB', bars, compute, cache=cache)
+    memoize('sum', 'CCC', bars, compute, cache=cache)
+    assert len(cache) == 2
+    memoize('sum', 'AAA', bars, compute, cache=cache)
+    assert len(calls) == 4
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+import pytest
+from intraday_screener import IntradayScreener, parse_chart
+from market_data import Fetcher
+from strategy_tester import COMPILED_FILTER_RULES, DEFAULT_BIAS, add_technical_indicators, classify_bias, rule_mask
+
+START = 1_700_000_000
+STEP = 300
+
+
+def as_intraday(df):
+    # Yahoo chart bars are keyed by epoch seconds
+    return df.assign(date=START + STEP * np.arange(len(df)))
+
+
+class FakeChartServer:
+    """Serves the first ``visible`` bars of each ticker in Yahoo chart format."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.visible = 0
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                ticker = url.path.rsplit('/', 1)[-1]
+                server.requests.append((ticker, parse_qs(url.query)['range'][0]))
+                if ticker not in server.bars:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                df = server.bars[ticker].iloc[:server.visible]
+                quote = {col: df[col].tolist() for col in ['open', 'high', 'low', 'close', 'volume']}
+                body = json.dumps({'chart': {'result': [{'timestamp': df['date'].tolist(),
+                                                         'indicators': {'quote': [quote]}}], 'error': None}})
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/v8/finance/chart'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+@pytest.fixture
+def fake_server(make_bars):
+    bars = {t: as_intraday(make_bars(200, seed, price=10)) for seed, t in enumerate(['AAA', 'BBB', 'CCC'])}
+    server = FakeChartServer(bars)
+    yield server
+    server.close()
+
+
+def expected_crossings(df, ticker, closed, warmup):
+    frame = add_technical_indicators(df.iloc[:closed].copy())
+    passed = pd.Series(rule_mask(frame, COMPILED_FILTER_RULES), index=frame.index).astype(bool)
+    status = classify_bias(frame).where(passed, DEFAULT_BIAS).tolist()
+    return [(ticker, int(frame['date'].iloc[i]), status[i]) for i in range(warmup, closed)
+            if status[i] != DEFAULT_BIAS and status[i] != (status[i - 1] if i else DEFAULT_BIAS)]
+
+
+def test_parse_chart_drops_bars_without_close():
+    payload = {'chart': {'result': [{'timestamp': [1, 2], 'indicators': {'quote': [
+        {'open': [1.0, 1.0], 'high': [1.0, 1.0], 'low': [1.0, 1.0], 'close': [1.0, None], 'volume': [5, None]}]}}]}}
+    assert parse_chart(payload)['date'].tolist() == [1]
+    assert parse_chart({'chart': {'result': None}}).empty
+
+
+def test_poll_emits_bias_crossings_on_closed_bars(fake_server):
+    emitted = []
+    screener = IntradayScreener(['AAA', 'BBB', 'CCC', 'MISSING'], base_url=fake_server.url,
+                                max_concurrency=4, on_signal=emitted.append,
+                                fetcher=Fetcher(rate=1000, burst=1000, max_retries=0))
+    try:
+        fake_server.visible = 60
+        # the last served bar is still forming at ``now``
+        assert asyncio.run(screener.poll(now=START + STEP * 59)) == []
+        fake_server.visible = 200
+        signals = asyncio.run(screener.poll(now=START + STEP * 199))
+    finally:
+        screener.close()
+
+    expected = [c for t, df in fake_server.bars.items() for c in expected_crossings(df, t, 199, 59)]
+    assert expected
+    assert sorted((s['Ticker'], s['date'], s['Bias']) for s in signals) == sorted(expected)
+    assert emitted == signals
+    ranges = [r for t, r in fake_server.requests if t == 'AAA']
+    assert ranges == ['5d', '1d']
@@ -0,0 +1,132 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from market_data import Fetcher, TokenBucket, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_allows_burst_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_backoff_respects_retry_after():
+    class Response:
+        headers = {'Retry-After': '7'}
+
+    class Throttled(Exception):
+        response = Response()
+
+    assert all(0 <= backoff_delay(attempt) <= 0.5 * 2 ** attempt for attempt in range(4))
+    assert backoff_delay(0, Throttled()) == 7
+
+
+def test_duplicate_calls_are_coalesced():
+    fetcher = Fetcher(rate=1000, burst=1000)
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow(ticker):
+        calls.append(ticker)
+        started.set()
+        release.wait(5)
+        return ticker.lower()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.call(('info', 'AAA'), slow, 'AAA')))
+               for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    while fetcher.stats['coalesced'] < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join(5)
+    assert calls == ['AAA']
+    assert results == ['aaa'] * 5
+    # once finished, the same key runs again
+    assert fetcher.call(('info', 'AAA'), lambda: 'fresh') == 'fresh'
+
+
+def test_get_json_retries_throttled_responses():
+    statuses = [429, 503, 200]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            status = statuses.pop(0)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"ok": true}')
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    clock = FakeClock()
+    fetcher = Fetcher(rate=1000, burst=1000, sleep=clock.sleep)
+    try:
+        assert fetcher.get_json(f'http://127.0.0.1:{httpd.server_port}/chart', {'range': '1d'}) == {'ok': True}
+    finally:
+        httpd.shutdown()
+    assert fetcher.stats['retries'] == 2
+    assert len(clock.slept) == 2
+
+    statuses.extend([404])
+    fetcher = Fetcher(rate=1000, burst=1000, sleep=clock.sleep)
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        with pytest.raises(Exception):
+            fetcher.get_json(f'http://127.0.0.1:{httpd.server_port}/chart')
+    finally:
+        httpd.shutdown()
+    assert fetcher.stats['retries'] == 0
+
+
+def test_download_retries_tickers_missing_from_a_batch(monkeypatch):
+    import pandas as pd
+    import yfinance as yf
+
+    dates = pd.to_datetime(['2024-01-02', '2024-01-03'])
+    # AAA answers at once, BBB only on the retry (throttled), GONE never
+    answers = [{'AAA'}, {'BBB'}, set()]
+    requests_made = []
+
+    def fake_download(tickers, session=None, **kwargs):
+        requests_made.append((list(tickers), session))
+        ok = answers.pop(0)
+        frames = {t: pd.DataFrame({'Close': [1.0, 2.0] if t in ok else [float('nan')] * 2}, index=dates)
+                  for t in tickers}
+        return pd.concat(frames, axis=1)
+
+    monkeypatch.setattr(yf, 'download', fake_download)
+    clock = FakeClock()
+    fetcher = Fetcher(rate=1000, burst=1000, sleep=clock.sleep)
+    fetched = fetcher.download(['AAA', 'BBB', 'GONE'], start='2024-01-01', group_by='ticker')
+    assert sorted(fetched) == ['AAA', 'BBB']
+    assert fetched['BBB']['Close'].tolist() == [1.0, 2.0]
+    # one token per batch request, each only for the tickers still missing
+    assert [t for t, _ in requests_made] == [['AAA', 'BBB', 'GONE'], ['BBB', 'GONE'], ['GONE']]
+    assert fetcher.stats['calls'] == 3
+    assert fetcher.stats['retries'] == 2
+    assert {session for _, session in requests_made} == {fetcher.yf_session}
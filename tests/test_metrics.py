@@ -0,0 +1,66 @@
+import json
+import pstats
+import urllib.request
+import pytest
+from metrics import Metrics, profiled, serve_metrics
+
+
+def test_counters_histograms_and_text_exposition():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.outcome('enrich', 'passed')
+    metrics.outcome('enrich', 'passed', 2)
+    metrics.observe('step_seconds', 0.05, stage='enrich', step='fetch')
+    metrics.observe('step_seconds', 0.5, stage='enrich', step='fetch')
+    metrics.observe('step_seconds', 5, stage='enrich', step='fetch')
+    with metrics.track_ticker('enrich', 'SLOW'):
+        pass
+    metrics.tickers['enrich']['SLOW'] = 3.0
+
+    text = metrics.render_text()
+    assert 'tickers_total{outcome="passed",stage="enrich"} 3' in text
+    assert 'step_seconds_bucket{stage="enrich",step="fetch",le="0.1"} 1' in text
+    assert 'step_seconds_bucket{stage="enrich",step="fetch",le="1"} 2' in text
+    assert 'step_seconds_bucket{stage="enrich",step="fetch",le="+Inf"} 3' in text
+    assert 'step_seconds_count{stage="enrich",step="fetch"} 3' in text
+    assert 'slowest_ticker_seconds{stage="enrich",ticker="SLOW"} 3.000000' in text
+    assert text.count('# TYPE step_seconds histogram') == 1
+
+
+def test_timer_records_failures_and_snapshots_merge(tmp_path):
+    worker = Metrics()
+    with pytest.raises(ValueError):
+        with worker.timer('step_seconds', step='read'):
+            raise ValueError('bad csv')
+    worker.error('dataset', 'AAA', ValueError('bad csv'))
+    snapshot = json.loads(json.dumps(worker.snapshot()))
+
+    parent = Metrics()
+    parent.merge(snapshot)
+    parent.merge(snapshot)
+    assert parent.counters[('tickers_total', (('outcome', 'error'), ('stage', 'dataset')))] == 2
+    assert parent.histograms[('step_seconds', (('step', 'read'),))]['count'] == 2
+    assert len(parent.errors) == 2
+
+    path = parent.write(str(tmp_path / 'metrics.json'))
+    assert json.loads(open(path).read())['errors'][0]['error'] == 'ValueError: bad csv'
+    with pytest.raises(ValueError):
+        Metrics(buckets=(1,)).merge(snapshot)
+
+
+def test_metrics_endpoint_and_profile(tmp_path):
+    metrics = Metrics()
+    metrics.inc('signals_total', 4, stage='intraday')
+    server = serve_metrics(0, metrics)
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url) as response:
+            assert 'signals_total{stage="intraday"} 4' in response.read().decode()
+    finally:
+        server.shutdown()
+
+    with profiled('run', str(tmp_path)):
+        sum(range(1000))
+    assert pstats.Stats(str(tmp_path / 'run.prof')).total_calls > 0
+    with profiled('off', None):
+        pass
+    assert not (tmp_path / 'off.prof').exists()
@@ -0,0 +1,30 @@
+import pytest
+from backtester import PORTFOLIO_LABEL, backtest_panel, generate_signals_panel
+from parameter_sweep import parameter_grid, sweep
+from strategy_tester import strategy_params
+
+
+def test_parameter_grid_fills_defaults():
+    combos = parameter_grid({'VOLUME_SURGE_MIN': [50, 80], 'RSI_LONG_MIN': [45, 55]})
+    assert len(combos) == 4
+    assert all(c['VOLATILITY_MIN'] == strategy_params()['VOLATILITY_MIN'] for c in combos)
+    with pytest.raises(ValueError):
+        parameter_grid({'NOT_A_PARAM': [1]})
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_sweep_matches_panel_backtest_portfolio(max_workers, price_universe):
+    prices = price_universe
+    defaults = strategy_params()
+    grid = {'VOLUME_SURGE_MIN': [0, defaults['VOLUME_SURGE_MIN'], 200],
+            'RSI_LONG_MIN': [40, defaults['RSI_LONG_MIN']]}
+    table = sweep(prices, grid, max_workers=max_workers, chunk_size=2)
+    assert len(table) == 6
+    assert table['Sharpe Ratio'].is_monotonic_decreasing
+
+    _, stats = backtest_panel(generate_signals_panel(prices.copy()))
+    expected = stats[stats['Ticker'] == PORTFOLIO_LABEL].iloc[0]
+    row = table[(table['VOLUME_SURGE_MIN'] == defaults['VOLUME_SURGE_MIN']) &
+                (table['RSI_LONG_MIN'] == defaults['RSI_LONG_MIN'])].iloc[0]
+    for col in ['Total Return', 'Win Rate', 'Sharpe Ratio']:
+        assert row[col] == pytest.approx(expected[col], abs=1e-4)
@@ -0,0 +1,50 @@
+import os
+import cv2
+import numpy as np
+import pandas as pd
+from pattern_scanner import (CANDLE_WIDTH, CHART_HEIGHT, chart_pattern, detect_opencv_pattern, rasterize_candles,
+                             run_pattern_scanner)
+
+
+def scanner_bars(df):
+    # the scanner reads yfinance-style capitalised columns on a date index
+    return df.set_index('date').rename(columns=str.capitalize)
+
+
+def test_rasterize_candles_draws_in_memory(make_bars):
+    img = rasterize_candles(scanner_bars(make_bars(80, 0)))
+    assert img.dtype == np.uint8
+    assert img.shape == (CHART_HEIGHT, 50 * CANDLE_WIDTH)
+    assert (img[:, CANDLE_WIDTH - 1::CANDLE_WIDTH] == 0).all()
+    assert (img[:, 1::CANDLE_WIDTH] > 0).any(axis=0).all()
+
+
+def test_run_pattern_scanner_writes_no_chart_files(tmp_path, monkeypatch, make_bars):
+    monkeypatch.chdir(tmp_path)
+    result = run_pattern_scanner({f'T{i}': scanner_bars(make_bars(60, i)) for i in range(5)})
+    assert result.columns.tolist() == ['Ticker', 'TA-Lib Pattern', 'OpenCV Pattern']
+    assert set(result['OpenCV Pattern']) <= {'Possible Head & Shoulders', 'Triple Bottom', 'None'}
+    assert os.listdir(tmp_path) == []
+
+
+def test_chart_pattern_labels_follow_chart_shape():
+    dates = pd.bdate_range('2024-01-01', periods=50)
+    flat = pd.DataFrame({'Open': 10.0, 'High': 10.0, 'Low': 10.0, 'Close': 10.0}, index=dates)
+    assert chart_pattern(flat) == 'None'
+
+    # left shoulder, head, right shoulder drawn with alternating long-wicked candles
+    x = np.linspace(0, 1, 50)
+    shape = 10 + sum(h * np.exp(-((x - c) / 0.07) ** 2) for h, c in [(1.5, 0.25), (3, 0.5), (1.5, 0.75)])
+    swing = 0.3 * np.where(np.arange(50) % 2, 1, -1)
+    hs = pd.DataFrame({'Open': shape - swing, 'Close': shape + swing}, index=dates)
+    hs['High'] = hs[['Open', 'Close']].max(axis=1) + 0.8
+    hs['Low'] = hs[['Open', 'Close']].min(axis=1) - 0.8
+    assert chart_pattern(hs) == 'Possible Head & Shoulders'
+
+
+def test_labels_match_between_memory_and_file_render(tmp_path, make_bars):
+    for seed in range(10):
+        img = rasterize_candles(scanner_bars(make_bars(80, seed)))
+        path = str(tmp_path / f'{seed}.png')
+        cv2.imwrite(path, img)
+        assert detect_opencv_pattern(cv2.imread(path, cv2.IMREAD_GRAYSCALE)) == detect_opencv_pattern(img)
@@ -0,0 +1,72 @@
+import threading
+import pytest
+from pipeline_runner import Stage, load_state, run_pipeline
+
+
+def make_stages(tmp_path, calls, config=None):
+    raw, out, other = tmp_path / 'raw.csv', tmp_path / 'out.csv', tmp_path / 'other.csv'
+
+    def step(name, path, text):
+        def run():
+            calls.append(name)
+            path.write_text(text() if callable(text) else text)
+        return run
+
+    return [
+        Stage('load', step('load', raw, 'a,b\n1,2\n'), outputs=[str(raw)], config=config),
+        Stage('transform', step('transform', out, lambda: raw.read_text().upper()), deps=['load'],
+              inputs=[str(raw)], outputs=[str(out)]),
+        Stage('side', step('side', other, 'x'), outputs=[str(other)]),
+    ]
+
+
+def test_unchanged_stages_are_cached(tmp_path):
+    state = str(tmp_path / 'state.json')
+    calls = []
+    report = run_pipeline(make_stages(tmp_path, calls), state_file=state)
+    assert sorted(calls) == ['load', 'side', 'transform']
+    assert {r['status'] for r in report.values()} == {'ran'}
+    assert set(load_state(state)) == {'load', 'side', 'transform'}
+
+    calls.clear()
+    report = run_pipeline(make_stages(tmp_path, calls), state_file=state)
+    assert calls == []
+    assert {r['status'] for r in report.values()} == {'cached'}
+
+    # a changed config reruns the stage; its output is unchanged so downstream stays cached
+    report = run_pipeline(make_stages(tmp_path, calls, config={'day': 2}), state_file=state)
+    assert calls == ['load']
+    assert report['transform']['status'] == 'cached'
+
+    # a changed input or a missing output reruns just that stage
+    (tmp_path / 'raw.csv').write_text('c\n3\n')
+    (tmp_path / 'other.csv').unlink()
+    calls.clear()
+    run_pipeline(make_stages(tmp_path, calls, config={'day': 2}), state_file=state)
+    assert sorted(calls) == ['side', 'transform']
+    assert (tmp_path / 'out.csv').read_text() == 'C\n3\n'
+
+
+def test_independent_stages_run_concurrently(tmp_path):
+    barrier = threading.Barrier(2, timeout=5)
+    stages = [Stage('a', barrier.wait), Stage('b', barrier.wait), Stage('c', lambda: None, deps=['a', 'b'])]
+    report = run_pipeline(stages, state_file=str(tmp_path / 'state.json'))
+    assert {name: r['status'] for name, r in report.items()} == {'a': 'ran', 'b': 'ran', 'c': 'ran'}
+
+
+def test_failure_skips_dependents_only(tmp_path):
+    def boom():
+        raise RuntimeError('boom')
+
+    stages = [Stage('bad', boom), Stage('after', lambda: None, deps=['bad']), Stage('ok', lambda: None)]
+    report = run_pipeline(stages, state_file=str(tmp_path / 'state.json'))
+    assert report['bad']['status'] == 'failed'
+    assert report['after']['status'] == 'skipped'
+    assert report['ok']['status'] == 'ran'
+
+
+def test_invalid_graphs_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        run_pipeline([Stage('a', None, deps=['b']), Stage('b', None, deps=['a'])], state_file=str(tmp_path / 's.json'))
+    with pytest.raises(ValueError):
+        run_pipeline([Stage('a', None, deps=['missing'])], state_file=str(tmp_path / 's.json'))
@@ -0,0 +1,11 @@
+from analysis_engine import detect_visual_pattern
+from rolling_patterns import rolling_visual_patterns, visual_labels
+
+
+def test_rolling_flags_match_batch_detector_on_every_window(make_bars):
+    df = make_bars(200, 3, price=20)[['close']].round(1)
+    window = 30
+    flags = rolling_visual_patterns(df, window).to_numpy()
+    for t in range(len(df)):
+        expected = detect_visual_pattern(df.iloc[max(0, t - window + 1):t + 1])
+        assert visual_labels(flags[t]) == expected, t
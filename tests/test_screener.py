@@ -1,6 +1,7 @@
 import pandas as pd
+import pytest
 from unittest.mock import patch
-from screener import process_ticker
+from screener import load_symbols, merge_shards, process_ticker, run_shard, screen_stocks, shard_symbols
 
 
 class DummyTicker:
@@ -12,19 +13,31 @@ class DummyTicker:
             'sector': 'Tech',
         }
 
-    def history(self, period="21d", interval="1d"):
-        data = {
-            'Open': [10] * 21,
-            'High': [11] * 21,
-            'Low': [9] * 21,
-            'Close': [10] * 21,
-            'Volume': [200000] * 21,
-        }
-        return pd.DataFrame(data)
 
 
-@patch('screener.yf.Ticker', return_value=DummyTicker('FAKE'))
-def test_process_ticker_returns_data(mock_yf):
+def dummy_bars(tickers, days):
+    data = {
+        'date': pd.bdate_range('2024-01-01', periods=21),
+        'open': [10] * 21,
+        'high': [11] * 21,
+        'low': [9] * 21,
+        'close': [10] * 21,
+        'volume': [200000] * 21,
+    }
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    bars = {ticker: pd.DataFrame(data) for ticker in tickers}
+    if 'PENNY' in bars:
+        bars['PENNY'][['open', 'high', 'low', 'close']] /= 100
+    for ticker in ['DELISTED', 'NEWLIST']:
+        if ticker in bars:
+            bars[ticker] = bars[ticker].iloc[:0 if ticker == 'DELISTED' else 5]
+    return bars
+
+
+@patch('screener.get_recent_bars', side_effect=dummy_bars)
+@patch('yfinance.Ticker', return_value=DummyTicker('FAKE'))
+def test_process_ticker_returns_data(mock_yf, mock_bars):
     result = process_ticker('FAKE')
     assert result is not None
     assert result['Ticker'] == 'FAKE'
@@ -45,3 +58,86 @@ def test_process_ticker_returns_data(mock_yf):
     }
     assert expected_keys.issubset(result.keys())
 
+
+
+@patch('screener.get_recent_bars', side_effect=dummy_bars)
+@patch('yfinance.Ticker', return_value=DummyTicker('FAKE'))
+def test_screen_stocks_fetches_info_only_for_survivors(mock_yf, mock_bars):
+    result = screen_stocks(['FAKE', 'PENNY'])
+    assert mock_bars.call_count == 1
+    assert result['Ticker'].tolist() == ['FAKE']
+    mock_yf.assert_called_once()
+    assert mock_yf.call_args.args == ('FAKE',)
+    assert result.loc[0, 'Sector'] == 'Tech'
+
+
+@patch('screener.get_recent_bars', side_effect=dummy_bars)
+@patch('yfinance.Ticker', return_value=DummyTicker('FAKE'))
+def test_screen_stocks_counts_outcomes(mock_yf, mock_bars):
+    from metrics import METRICS
+    METRICS.reset()
+    screen_stocks(['FAKE', 'PENNY', 'DELISTED', 'NEWLIST'])
+    assert process_ticker('DELISTED') is None
+    with patch('screener.get_recent_bars', side_effect=RuntimeError('down')):
+        assert process_ticker('BROKEN') is None
+    counts = {dict(labels)['outcome']: v for (name, labels), v in METRICS.counters.items() if name == 'tickers_total'}
+    assert counts == {'passed': 1, 'filtered': 1, 'skipped': 3, 'error': 1}
+    assert METRICS.errors[-1] == {'stage': 'screener', 'ticker': 'BROKEN', 'error': 'RuntimeError: down'}
+    assert sorted(t for t, _ in METRICS.slowest('screener')) == ['BROKEN', 'DELISTED']
+
+
+NASDAQ_LISTED = """Symbol|Security Name|Market Category|Test Issue|Financial Status|Round Lot Size|ETF|NextShares
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+ZXZZT|NASDAQ TEST STOCK|G|Y|N|100|N|N
+BRK.B|Berkshire Hathaway|Q|N|N|100|N|N
+AAPL|Apple Inc. - Common Stock|Q|N|N|100|N|N
+File Creation Time: 0101202500:00|||||||
+"""
+
+
+def test_load_symbols_formats(tmp_path):
+    listed = tmp_path / 'nasdaqlisted.txt'
+    listed.write_text(NASDAQ_LISTED)
+    assert load_symbols(str(listed)) == ['AAPL', 'BRK-B']
+    plain = tmp_path / 'symbols.txt'
+    plain.write_text('# watch\nmsft\n\nNVDA\n')
+    assert load_symbols(str(plain)) == ['MSFT', 'NVDA']
+    table = tmp_path / 'symbols.csv'
+    table.write_text('Ticker,Name\nAMD,Advanced Micro\n')
+    assert load_symbols(str(table)) == ['AMD']
+
+
+def test_shards_partition_the_universe():
+    symbols = [f'S{i:04d}' for i in range(1000)]
+    shards = [shard_symbols(symbols, i, 4) for i in range(4)]
+    assert sorted(sum(shards, [])) == symbols
+    assert all(150 < len(s) < 350 for s in shards)
+    # adding a symbol never moves the others between shards
+    assert shard_symbols(symbols + ['NEW'], 1, 4)[:len(shards[1])] == shards[1]
+    with pytest.raises(ValueError):
+        shard_symbols(symbols, 4, 4)
+
+
+@patch('screener.get_recent_bars', side_effect=dummy_bars)
+@patch('yfinance.Ticker', return_value=DummyTicker('FAKE'))
+def test_sharded_scan_and_merge(mock_yf, mock_bars, tmp_path, monkeypatch):
+    import screener
+    from metrics import METRICS
+    # the patched downloads only reach forked workers; this test starts no other threads
+    monkeypatch.setattr(screener, 'SCAN_START_METHOD', 'fork')
+    symbols = tmp_path / 'symbols.txt'
+    symbols.write_text('\n'.join(['AAA', 'BBB', 'CCC', 'PENNY', 'DDD', 'EEE']))
+    shard_dir, output = str(tmp_path / 'shards'), str(tmp_path / 'daily_results.csv')
+
+    METRICS.reset()
+    run_shard(0, 2, str(symbols), processes=2, shard_dir=shard_dir)
+    with pytest.raises(FileNotFoundError):
+        merge_shards(2, shard_dir, output)
+    run_shard(1, 2, str(symbols), processes=1, shard_dir=shard_dir)
+    merged = merge_shards(2, shard_dir, output)
+
+    assert merged['Ticker'].tolist() == ['AAA', 'BBB', 'CCC', 'DDD', 'EEE']
+    assert pd.read_csv(output)['Sector'].unique().tolist() == ['Tech']
+    # outcomes from the pool workers are merged into this process's metrics
+    counts = {dict(labels)['outcome']: v for (name, labels), v in METRICS.counters.items() if name == 'tickers_total'}
+    assert counts == {'passed': 5, 'filtered': 1}
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from screening_engine import build_panel, compute_metrics, screen_panel
+
+
+def test_panel_metrics_match_per_ticker_series_ops(make_bars):
+    bars = {'AAA': make_bars(15, 1, price=10, volume=200_000), 'BBB': make_bars(12, 2, price=20, volume=300_000)}
+    metrics = compute_metrics(build_panel(bars)).set_index('Ticker')
+    hist = bars['AAA']
+    prev_close = hist['close'].shift(1)
+    true_range = pd.concat([hist['high'] - hist['low'], (hist['high'] - prev_close).abs(),
+                            (hist['low'] - prev_close).abs()], axis=1).max(axis=1)
+    assert metrics.loc['AAA', 'ATR'] == round(true_range.rolling(14).mean().iloc[-1], 2)
+    vwap = (hist['close'] * hist['volume']).sum() / hist['volume'].sum()
+    expected_dev = (hist['close'].iloc[-1] - vwap) / vwap * 100
+    assert np.isclose(metrics.loc['AAA', 'VWAP Deviation %'], expected_dev)
+    assert metrics.loc['BBB', 'Bars'] == 12
+
+
+def test_screen_panel_applies_filters_as_masks(make_bars):
+    bars = {
+        'PASS': make_bars(15, 1, price=10, volume=200_000),
+        'PRICEY': make_bars(15, 1, price=100, volume=200_000),
+        'THIN': make_bars(15, 1, price=10, volume=1_000),
+        'SHORT': make_bars(10, 1, price=10, volume=200_000),
+    }
+    passed = screen_panel(build_panel(bars), 1, 30, 100_000, 0.1)
+    assert passed['Ticker'].tolist() == ['PASS']
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from signal_store import connect, import_csv, query_signals, save_signals
+
+
+def make_signals(tickers, days, bias='Long'):
+    dates = pd.bdate_range('2024-01-01', periods=days)
+    rows = pd.DataFrame([(t, d) for t in tickers for d in dates], columns=['Ticker', 'date'])
+    rows['Bias'] = bias
+    rows['RSI 14'] = np.linspace(40, 60, len(rows))
+    return rows
+
+
+def test_upsert_replaces_same_version_and_keeps_others(tmp_path):
+    db = str(tmp_path / 'signals.db')
+    rows = make_signals(['AAA', 'BBB'], 5)
+    assert save_signals(rows, 'v1', db) == 10
+    save_signals(rows.assign(Bias='Short'), 'v1', db)
+    save_signals(rows.head(3), 'v2', db)
+
+    stored = query_signals(db)
+    assert len(stored) == 13
+    assert set(query_signals(db, version='v1')['Bias']) == {'Short'}
+    pd.testing.assert_series_equal(query_signals(db, version='v1')['RSI 14'], rows['RSI 14'], check_names=False)
+    with pytest.raises(ValueError):
+        save_signals(rows.drop(columns='date'), 'v1', db)
+
+
+def test_queries_by_ticker_date_range_and_bias(tmp_path):
+    db = str(tmp_path / 'signals.db')
+    save_signals(make_signals(['AAA', 'BBB', 'CCC'], 20), 'v1', db)
+    save_signals(make_signals(['DDD'], 20, bias='Short'), 'v1', db)
+
+    one = query_signals(db, ticker='BBB', start='2024-01-08', end='2024-01-15')
+    assert one['Ticker'].unique().tolist() == ['BBB']
+    assert one['date'].min() == pd.Timestamp('2024-01-08') and one['date'].max() == pd.Timestamp('2024-01-12')
+    assert query_signals(db, bias='Short')['Ticker'].unique().tolist() == ['DDD']
+    assert len(query_signals(db, ticker=['AAA', 'DDD'], bias=['Long', 'Short'])) == 40
+    assert list(query_signals(db, ticker='AAA', columns=[]).columns) == ['Ticker', 'date', 'Strategy Version', 'Bias']
+
+
+def test_lookups_use_indexes(tmp_path):
+    conn = connect(str(tmp_path / 'signals.db'))
+    plans = {
+        'ticker': "SELECT * FROM signals WHERE ticker = 'A' AND date >= '2024'",
+        'date': "SELECT * FROM signals WHERE date >= '2024'",
+        'bias': "SELECT * FROM signals WHERE bias = 'Long' AND date >= '2024'",
+    }
+    for name, sql in plans.items():
+        plan = ' '.join(row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}'))
+        assert 'SCAN' not in plan, (name, plan)
+    conn.close()
+
+
+def test_import_legacy_csv(tmp_path):
+    csv = tmp_path / 'smart_filtered_results.csv'
+    make_signals(['AAA'], 3).to_csv(csv, index=False)
+    assert import_csv(str(csv), str(tmp_path / 'signals.db')) == 3
+    assert query_signals(str(tmp_path / 'signals.db'))['Strategy Version'].unique().tolist() == ['legacy']
@@ -0,0 +1,11 @@
+import pytest
+from startup_budget import IMPORT_BUDGETS, measure_import
+
+
+@pytest.mark.parametrize('module', sorted(IMPORT_BUDGETS))
+def test_entry_point_imports_within_budget(module, tmp_path):
+    measured = measure_import(module, cwd=tmp_path)
+    assert measured['heavy'] == []
+    assert measured['seconds'] <= IMPORT_BUDGETS[module]
+    # importing must not need email credentials or create directories
+    assert list(tmp_path.iterdir()) == []
@@ -1,5 +1,8 @@
 import pandas as pd
-from strategy_tester import add_technical_indicators
+from unittest.mock import patch
+from signal_store import query_signals
+from strategy_tester import (add_technical_indicators, classify_bias, determine_bias, save_filtered_results,
+                             strategy_version, BIAS_RULES)
 
 
 def test_add_technical_indicators_adds_columns():
@@ -27,3 +30,36 @@ def test_add_technical_indicators_adds_columns():
         assert col in result.columns, f"{col} not in DataFrame"
     assert len(result) == len(df)
 
+
+def test_classify_bias_matches_row_wise_determine_bias():
+    df = pd.DataFrame({
+        'VWAP Deviation %': [1.0, -1.0, 1.0, float('nan')],
+        'RSI 14': [60, 40, 40, 60],
+        'MACD Line': [1.0, -1.0, 1.0, 1.0],
+        'MACD Signal Line': [0.5, -0.5, 0.5, 0.5],
+        'Volume Surge %': [100, 100, 100, 100],
+        '9 EMA': [11, 9, 11, 11],
+        '20 EMA': [10, 10, 10, 10],
+        'Price Action %': [1.0, -1.0, 1.0, 1.0],
+    })
+    vectorized = classify_bias(df)
+    assert vectorized.tolist() == ['Long', 'Short', 'Neutral', 'Neutral']
+    assert vectorized.tolist() == [determine_bias(row) for _, row in df.iterrows()]
+
+    rules = {'Overbought': [('RSI 14', '>', 55)], **BIAS_RULES}
+    assert classify_bias(df, rules).tolist() == ['Overbought', 'Short', 'Neutral', 'Overbought']
+
+    # the default rule sets were compiled at import; scoring never recompiles them
+    with patch('strategy_tester.compile_rules', side_effect=AssertionError('recompiled')):
+        assert classify_bias(df).tolist() == [determine_bias(row) for _, row in df.iterrows()]
+
+
+def test_save_filtered_results_replaces_rows_for_same_ticker_and_date(tmp_path):
+    path = tmp_path / 'signals.db'
+    rows = pd.DataFrame({'Ticker': ['AAA', 'AAA'], 'date': pd.to_datetime(['2024-01-02', '2024-01-03']), 'Bias': ['Long', 'Short']})
+    save_filtered_results(rows, str(path))
+    save_filtered_results(rows.assign(Bias='Neutral'), str(path))
+    saved = query_signals(str(path))
+    assert len(saved) == 2
+    assert saved['Bias'].tolist() == ['Neutral', 'Neutral']
+    assert saved['Strategy Version'].unique().tolist() == [strategy_version()]
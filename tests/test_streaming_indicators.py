@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from analysis_engine import compute_ta_indicators
+from strategy_tester import add_technical_indicators
+from streaming_indicators import (STRATEGY_COLUMNS, TA_COLUMNS, IndicatorBook, StreamingIndicators,
+                                  stream_indicators)
+
+
+def with_ties(df):
+    """Flat runs, ties and zero-volume bars exercise the zero-divisor branches."""
+    close = np.round(df['close'].to_numpy())
+    close[50:90] = close[50]
+    volume = df['volume'].to_numpy().copy()
+    volume[:30] = 0
+    return df.assign(close=close, high=np.maximum(df['open'], close), low=np.minimum(df['open'], close),
+                     volume=volume)
+
+
+@pytest.mark.parametrize('rounded', [False, True])
+def test_stream_matches_batch_indicators(rounded, make_bars):
+    df = make_bars(300, 4, price=20)
+    if rounded:
+        df = with_ties(df)
+    streamed = stream_indicators(df)
+    strategy = add_technical_indicators(df.copy())
+    ta = compute_ta_indicators(df)
+    for columns, batch in [(STRATEGY_COLUMNS, strategy), (TA_COLUMNS, ta)]:
+        for col in columns:
+            np.testing.assert_allclose(streamed[col], batch[col], rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+def test_snapshot_restore_resumes_identically(make_bars):
+    df = make_bars(120, 5)
+    bars = list(df[['open', 'high', 'low', 'close', 'volume']].itertuples(index=False))
+    engine = StreamingIndicators()
+    for bar in bars[:100]:
+        engine.update(*bar)
+    state = engine.snapshot()
+    expected = [engine.update(*bar) for bar in bars[100:]]
+    restored = StreamingIndicators.restore(state)
+    assert [restored.update(*bar) for bar in bars[100:]] == pytest.approx(expected, nan_ok=True)
+
+
+def test_indicator_book_tracks_tickers_independently(make_bars):
+    book = IndicatorBook()
+    a, b = make_bars(60, 6), make_bars(60, 7)
+    book.warm_up('AAA', a.iloc[:-1])
+    book.warm_up('BBB', b)
+    last = a.iloc[-1]
+    values = book.update('AAA', last['open'], last['high'], last['low'], last['close'], last['volume'])
+    assert values['RSI 14'] == pytest.approx(stream_indicators(a)['RSI 14'].iloc[-1])
+    restored = IndicatorBook.restore(book.snapshot())
+    assert set(restored.engines) == {'AAA', 'BBB'}
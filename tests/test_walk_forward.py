@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from backtester import backtest_panel, generate_signals_panel
+from parameter_sweep import returns_stats
+from walk_forward import OOS_LABEL, walk_forward, walk_forward_windows
+
+
+def test_walk_forward_windows():
+    assert walk_forward_windows(10, train=4, test=2, step=2) == [(0, 4, 6), (2, 6, 8), (4, 8, 10)]
+    assert walk_forward_windows(5, train=4, test=2, step=2) == []
+    with pytest.raises(ValueError):
+        walk_forward_windows(10, train=4, test=0, step=2)
+
+
+def test_walk_forward_test_windows_match_full_range_backtest(price_universe):
+    prices = price_universe
+    windows, aggregate = walk_forward(prices, train=40, test=20, step=20)
+    assert len(windows) > 1
+
+    tested, _ = backtest_panel(generate_signals_panel(prices.copy()))
+    daily = tested.groupby('date')['strategy_return'].mean()
+    for _, window in windows.iterrows():
+        expected = returns_stats(daily.loc[window['Test Start']:window['Test End']].to_frame()).iloc[0]
+        for col in ['Total Return', 'Win Rate', 'Sharpe Ratio']:
+            assert window[f'Test {col}'] == pytest.approx(expected[col], abs=1e-4)
+
+    stitched = daily.loc[windows['Test Start'].iloc[0]:windows['Test End'].iloc[-1]].to_frame()
+    expected = returns_stats(stitched).iloc[0]
+    assert aggregate['Period'].iloc[0] == OOS_LABEL
+    assert aggregate['Sharpe Ratio'].iloc[0] == pytest.approx(expected['Sharpe Ratio'], abs=1e-4)
+
+
+def test_walk_forward_picks_best_train_params(price_universe):
+    grid = {'VOLUME_SURGE_MIN': [0, 80, 200]}
+    prices = price_universe
+    windows, _ = walk_forward(prices, grid, train=40, test=20, step=20)
+    singles = [walk_forward(prices, {'VOLUME_SURGE_MIN': [v]}, train=40, test=20, step=20)[0]
+               for v in grid['VOLUME_SURGE_MIN']]
+    best_train = np.max([s['Train Sharpe Ratio'] for s in singles], axis=0)
+    np.testing.assert_allclose(windows['Train Sharpe Ratio'], best_train)
+    for i, value in enumerate(windows['VOLUME_SURGE_MIN']):
+        chosen = singles[grid['VOLUME_SURGE_MIN'].index(value)].iloc[i]
+        assert windows['Test Sharpe Ratio'].iloc[i] == chosen['Test Sharpe Ratio']
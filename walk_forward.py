@@ -0,0 +1,81 @@
+import os
+import numpy as np
+import pandas as pd
+from backtester import download_universe
+from parameter_sweep import (CHUNK_SIZE, RANK_BY, parameter_grid, prepare_features,
+                             returns_stats, sweep_returns)
+
+# === CONFIGURATION ===
+TRAIN_DAYS = 252
+TEST_DAYS = 63
+STEP_DAYS = 63
+OOS_LABEL = 'OUT OF SAMPLE'
+STAT_COLUMNS = ['Total Return', 'Win Rate', 'Sharpe Ratio']
+
+# === WINDOWS ===
+def walk_forward_windows(n_days, train=TRAIN_DAYS, test=TEST_DAYS, step=STEP_DAYS):
+    """``(train_start, test_start, test_end)`` day positions of each walk-forward window.
+
+    Each window trains on ``train`` trading days and tests on the ``test`` days
+    right after them; successive windows move forward by ``step`` days.
+    """
+    if min(train, test, step) < 1:
+        raise ValueError('train, test and step must be at least one day')
+    return [(start, start + train, start + train + test)
+            for start in range(0, n_days - train - test + 1, step)]
+
+# === WALK-FORWARD ===
+def walk_forward(prices, grid=None, train=TRAIN_DAYS, test=TEST_DAYS, step=STEP_DAYS,
+                 max_workers=1, chunk_size=CHUNK_SIZE, rank_by=RANK_BY):
+    """Out-of-sample evaluation of the smart filter strategy over rolling windows.
+
+    Indicators are computed in one causal pass over the full range, which is the
+    same as carrying every ticker's EMA/RSI/VWAP state forward from one window
+    into the next, so no window recomputes from bar zero or sees future bars.
+    The daily portfolio returns of every ``grid`` combination (just the current
+    thresholds without a grid) are likewise computed once; each window then picks
+    the combination with the best ``rank_by`` on its train days and reports it on
+    its test days.
+
+    Returns ``(windows, aggregate)``: one row per window with its dates, chosen
+    parameters and train/test stats, and the stats of the stitched test-day
+    returns (later windows win where test periods overlap).
+    """
+    combos = parameter_grid(grid or {})
+    features = prepare_features(prices)
+    dates = features['dates']
+    returns = pd.DataFrame(sweep_returns(features, combos, max_workers, chunk_size), index=dates)
+    windows = walk_forward_windows(len(dates), train, test, step)
+    print(f'🚶 Walk-forward over {len(dates)} days: {len(windows)} windows of {train}/{test} days, {len(combos)} parameter sets')
+
+    rows, oos = [], pd.Series(np.nan, index=dates)
+    for i, (train_start, test_start, test_end) in enumerate(windows):
+        train_stats = returns_stats(returns.iloc[train_start:test_start])
+        best = int(train_stats[rank_by].to_numpy().argmax())
+        test_returns = returns.iloc[test_start:test_end, [best]]
+        test_stats = returns_stats(test_returns).iloc[0]
+        oos.iloc[test_start:test_end] = test_returns.iloc[:, 0].to_numpy()
+        row = {'Window': i, 'Train Start': dates[train_start], 'Test Start': dates[test_start],
+               'Test End': dates[test_end - 1]}
+        row.update({name: combos[best][name] for name in (grid or {})})
+        row.update({f'Train {col}': train_stats[col].iloc[best] for col in STAT_COLUMNS})
+        row.update({f'Test {col}': test_stats[col] for col in STAT_COLUMNS})
+        rows.append(row)
+
+    oos = oos.dropna().to_frame(OOS_LABEL)
+    aggregate = returns_stats(oos).assign(Period=OOS_LABEL)
+    return pd.DataFrame(rows), aggregate
+
+def run_walk_forward(tickers, start, end, grid=None, output_dir='backtests', **kwargs):
+    """Download ``tickers`` over ``[start, end)``, walk forward and save both tables."""
+    os.makedirs(output_dir, exist_ok=True)
+    windows, aggregate = walk_forward(download_universe(tickers, start, end), grid, **kwargs)
+    windows.to_csv(os.path.join(output_dir, 'walk_forward_windows.csv'), index=False)
+    aggregate.to_csv(os.path.join(output_dir, 'walk_forward_summary.csv'), index=False)
+    return windows, aggregate
+
+if __name__ == '__main__':
+    grid = {'VOLUME_SURGE_MIN': [50, 80, 120], 'RSI_LONG_MIN': [45, 50, 55]}
+    windows, aggregate = run_walk_forward(['AAPL', 'MSFT', 'NVDA'], '2020-01-01', '2024-01-01', grid)
+    print(windows)
+    print(aggregate)